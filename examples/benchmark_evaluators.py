@@ -0,0 +1,37 @@
+import time
+import numpy as np
+from platypus import NSGAII, DTLZ2, MapEvaluator, ThreadPoolEvaluator, \
+    ProcessPoolEvaluator, MultiprocessingEvaluator
+
+# simulate a problem whose evaluation is dominated by NumPy routines that
+# release the GIL, such as linear algebra or compiled simulation code
+class DTLZ2_NumPy(DTLZ2):
+    
+    def __init__(self, size=200):
+        super(DTLZ2_NumPy, self).__init__()
+        self.matrix = np.random.RandomState(0).rand(size, size)
+    
+    def evaluate(self, solution):
+        np.linalg.eigvalsh(self.matrix + self.matrix.T)
+        super(DTLZ2_NumPy, self).evaluate(solution)
+
+def benchmark(name, evaluator, problem, nfe):
+    with evaluator:
+        algorithm = NSGAII(problem, evaluator=evaluator)
+        start = time.time()
+        algorithm.run(nfe)
+        elapsed = time.time() - start
+        
+    print("%-40s %8.2f s %10.1f evals/s" % (name, elapsed, nfe / elapsed))
+
+if __name__ == "__main__":
+    problem = DTLZ2_NumPy()
+    nfe = 1000
+    workers = 4
+    
+    benchmark("MapEvaluator", MapEvaluator(), problem, nfe)
+    benchmark("ThreadPoolEvaluator", ThreadPoolEvaluator(workers), problem, nfe)
+    benchmark("ThreadPoolEvaluator (batched)", ThreadPoolEvaluator(workers, batch_size="adaptive"), problem, nfe)
+    benchmark("ProcessPoolEvaluator", ProcessPoolEvaluator(workers), problem, nfe)
+    benchmark("ProcessPoolEvaluator (registered problem)", ProcessPoolEvaluator(workers, problems=[problem]), problem, nfe)
+    benchmark("MultiprocessingEvaluator (batched)", MultiprocessingEvaluator(workers, batch_size="adaptive"), problem, nfe)
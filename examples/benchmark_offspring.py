@@ -0,0 +1,62 @@
+import copy
+import time
+import tracemalloc
+from platypus import NSGAII, GDE3, DTLZ2, SBX, PM, GAOperator, SBXPM, \
+    DifferentialEvolution, BatchDifferentialEvolution
+
+# compares copying parents with copy.deepcopy against the copy_for_offspring
+# fast path, counting the memory blocks allocated for each offspring
+
+def solutions_after_run(problem, nfe):
+    algorithm = NSGAII(problem)
+    algorithm.run(nfe)
+    return algorithm.population
+
+def allocations(name, func, parents, repeats=1000):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    offspring = [func(parents[i % len(parents)]) for i in range(repeats)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    
+    stats = after.compare_to(before, "filename")
+    blocks = sum([stat.count_diff for stat in stats])
+    size = sum([stat.size_diff for stat in stats])
+    
+    print("%-30s %8.1f blocks/offspring %10.1f bytes/offspring" % (name, blocks / float(repeats), size / float(repeats)))
+    return offspring
+
+def benchmark(name, variator, parents, repeats=1000):
+    pairs = [[parents[i % len(parents)], parents[(i+1) % len(parents)]] for i in range(repeats)]
+    start = time.time()
+    variator.evolve_batch(pairs)
+    elapsed = time.time() - start
+    print("%-30s %8.2f us/offspring" % (name, 1e6 * elapsed / (2*repeats)))
+
+def benchmark_gde3(name, variator, nvars, repeats=10):
+    algorithm = GDE3(DTLZ2(2, nvars), variator=variator)
+    algorithm.run(algorithm.population_size)
+    start = time.time()
+    
+    for _ in range(repeats):
+        if hasattr(variator, "evolve_population"):
+            variator.evolve_population(algorithm.population)
+        else:
+            for i in range(algorithm.population_size):
+                variator.evolve(algorithm.select(i, variator.arity))
+                
+    elapsed = time.time() - start
+    print("%-30s %8.2f ms/generation (%d variables)" % (name, 1e3 * elapsed / repeats, nvars))
+
+if __name__ == "__main__":
+    problem = DTLZ2(3)
+    parents = solutions_after_run(problem, 1000)
+    
+    allocations("copy.deepcopy", copy.deepcopy, parents)
+    allocations("copy_for_offspring", lambda s: s.copy_for_offspring(), parents)
+    benchmark("GAOperator(SBX(), PM())", GAOperator(SBX(), PM()), parents)
+    benchmark("SBXPM", SBXPM(), parents)
+    
+    for nvars in [30, 1000]:
+        benchmark_gde3("DifferentialEvolution", DifferentialEvolution(), nvars)
+        benchmark_gde3("BatchDifferentialEvolution", BatchDifferentialEvolution(), nvars)
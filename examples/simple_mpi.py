@@ -1,4 +1,5 @@
 from platypus import NSGAII, DTLZ2, PoolEvaluator
+from platypus.evaluator import broadcast_problems
 from platypus.mpipool import MPIPool
 import sys
 import logging
@@ -16,6 +17,9 @@ if __name__ == "__main__":
     # define the problem definition
     problem = DTLZ2_Slow()
     pool = MPIPool()
+    
+    # install the problem on every rank so jobs only carry the variables
+    broadcast_problems([problem], comm=pool.comm)
 
     # only run the algorithm on the master process
     if not pool.is_master():
@@ -18,8 +18,11 @@
 # along with Platypus.  If not, see <http://www.gnu.org/licenses/>.
 from __future__ import absolute_import, division, print_function
 
+import sys
 from .core import *
 from .algorithms import *
+from .cache import *
+from .checkpoint import *
 from .evaluator import *
 from .experimenter import *
 from .indicators import *
@@ -29,4 +32,7 @@ from .tools import *
 from .types import *
 from .weights import *
 
+if sys.version_info >= (3, 7):
+    from .asynchronous import AsyncEvaluator
+
 __version__ = "1.0.2" # Update setup.py if the version changes!
\ No newline at end of file
@@ -32,7 +32,7 @@ from .core import Algorithm, ParetoDominance, AttributeDominance,\
     EPSILON, POSITIVE_INFINITY, Archive, EpsilonDominance, FitnessArchive,\
     Solution, HypervolumeFitnessEvaluator, nondominated_cmp, fitness_key,\
     crowding_distance_key, AdaptiveGridArchive, Selector, EpsilonBoxArchive,\
-    PlatypusError, Problem
+    PlatypusError, Problem, Variator
 from .operators import TournamentSelector, RandomGenerator,\
     DifferentialEvolution, clip, UniformMutation, NonUniformMutation,\
     GAOperator, SBX, PM, UM, PCX, UNDX, SPX, Multimethod
@@ -41,6 +41,11 @@ from .tools import DistanceMatrix, choose, point_line_dist, lsolve,\
 from .weights import random_weights, chebyshev, normal_boundary_weights
 from .config import default_variator, default_mutator
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 try:
     set
 except NameError:
@@ -75,6 +80,61 @@ class AbstractGeneticAlgorithm(Algorithm):
     def iterate(self):
         raise NotImplementedError("method not implemented")
     
+    def _create_offspring(self, selector):
+        """Creates one generation of offspring from the population.
+        
+        If the variator overrides :code:`evolve_batch`, the parents for all
+        offspring are selected first and evolved with a single call.
+        """
+        # compare the underlying functions, since Python 2 creates a new
+        # unbound method object on each attribute access
+        evolve_batch = type(self.variator).evolve_batch
+        
+        if getattr(evolve_batch, "__func__", evolve_batch) is getattr(Variator.evolve_batch, "__func__", Variator.evolve_batch):
+            offspring = []
+            
+            while len(offspring) < self.population_size:
+                parents = selector.select(self.variator.arity, self.population)
+                offspring.extend(self.variator.evolve(parents))
+        else:
+            offspring = []
+            per_group = float(self.variator.arity)
+            
+            while len(offspring) < self.population_size:
+                ngroups = int(math.ceil((self.population_size - len(offspring)) / per_group))
+                parents = [selector.select(self.variator.arity, self.population) for _ in range(ngroups)]
+                batch = self.variator.evolve_batch(parents)
+                per_group = max(1.0, len(batch) / float(ngroups))
+                offspring.extend(batch)
+            
+        return offspring
+    
+    def generate_offspring(self):
+        """Generator producing offspring for asynchronous evaluation.
+        
+        Steady-state algorithms supporting the asynchronous mode override
+        this method.  Each offspring is requested only when a worker becomes
+        available, so it is created from the most recent population.
+        """
+        raise NotImplementedError("method not implemented")
+    
+    def next_evaluated(self):
+        """Returns the next offspring to complete asynchronous evaluation."""
+        if getattr(self, "_evaluations", None) is None:
+            self._evaluations = self.evaluate_async(self.generate_offspring())
+            
+        return next(self._evaluations)
+    
+    def __getstate__(self):
+        # generators can not be pickled; the offspring pending evaluation are
+        # discarded and new ones are generated when the run continues
+        state = self.__dict__.copy()
+        
+        if state.get("_evaluations") is not None:
+            state["_evaluations"] = None
+            
+        return state
+    
 class SingleObjectiveAlgorithm(AbstractGeneticAlgorithm):
     
     __metaclass__ = ABCMeta
@@ -197,11 +257,7 @@ class NSGAII(AbstractGeneticAlgorithm):
             self.variator = default_variator(self.problem)
         
     def iterate(self):
-        offspring = []
-        
-        while len(offspring) < self.population_size:
-            parents = self.selector.select(self.variator.arity, self.population)
-            offspring.extend(self.variator.evolve(parents))
+        offspring = self._create_offspring(self.selector)
             
         self.evaluate_all(offspring)
         
@@ -213,6 +269,13 @@ class NSGAII(AbstractGeneticAlgorithm):
             self.archive.extend(self.population)
 
 class EpsMOEA(AbstractGeneticAlgorithm):
+    """The epsilon-dominance MOEA (epsilon-MOEA).
+    
+    With :code:`asynchronous=True`, offspring are evaluated asynchronously:
+    each step waits for the next offspring to finish, adds it to the
+    population and archive, and a new offspring is submitted in its place.
+    This keeps all workers busy when evaluation times vary.
+    """
     
     def __init__(self, problem,
                  epsilons,
@@ -220,10 +283,12 @@ class EpsMOEA(AbstractGeneticAlgorithm):
                  generator = RandomGenerator(),
                  selector = TournamentSelector(2),
                  variator = None,
+                 asynchronous = False,
                  **kwargs):
         super(EpsMOEA, self).__init__(problem, population_size, generator, **kwargs)
         self.selector = selector
         self.variator = variator
+        self.asynchronous = asynchronous
         self.dominance = ParetoDominance()
         self.archive = EpsilonBoxArchive(epsilons)
         
@@ -241,29 +306,38 @@ class EpsMOEA(AbstractGeneticAlgorithm):
         
         if self.variator is None:
             self.variator = default_variator(self.problem)
-        
-    def iterate(self):
+            
+    def select(self):
         if len(self.archive) <= 1:
             parents = self.selector.select(self.variator.arity, self.population)
         else:
             parents = self.selector.select(self.variator.arity-1, self.population) + [random.choice(self.archive)]
 
         random.shuffle(parents)
+        return parents
         
-        children = self.variator.evolve(parents)
-        self.evaluate_all(children)
+    def iterate(self):
+        if self.asynchronous:
+            children = [self.next_evaluated()]
+        else:
+            children = self.variator.evolve(self.select())
+            self.evaluate_all(children)
         
         for child in children:
             self._add_to_population(child)
             self.archive.add(child)
             
+    def generate_offspring(self):
+        while True:
+            for child in self.variator.evolve(self.select()):
+                yield child
+            
     def _add_to_population(self, solution):
         dominates = []
         dominated = False
+        flags = self.dominance.compare_many(solution, self.population[:self.population_size])
         
-        for i in range(self.population_size):
-            flag = self.dominance.compare(solution, self.population[i])
-
+        for i, flag in enumerate(flags):
             if flag < 0:
                 dominates.append(i)
             elif flag > 0:
@@ -277,14 +351,24 @@ class EpsMOEA(AbstractGeneticAlgorithm):
             self.population.append(solution)
 
 class GDE3(AbstractGeneticAlgorithm):
+    """Generalized differential evolution 3 (GDE3).
+    
+    With :code:`asynchronous=True`, each offspring is compared against its
+    parent as soon as its evaluation completes, while new offspring are
+    submitted in its place.  Offspring that are non-dominated with respect to
+    their parent join the population, which is pruned back to
+    :code:`population_size` after every :code:`population_size` evaluations.
+    """
     
     def __init__(self, problem,
                  population_size = 100,
                  generator = RandomGenerator(),
                  variator = DifferentialEvolution(),
+                 asynchronous = False,
                  **kwargs):
         super(GDE3, self).__init__(problem, population_size, generator, **kwargs)
         self.variator = variator
+        self.asynchronous = asynchronous
         self.dominance = ParetoDominance()
         
     def select(self, i, arity):
@@ -313,18 +397,66 @@ class GDE3(AbstractGeneticAlgorithm):
         super(GDE3, self).initialize()
         
         if self.variator is None:
-            self.variator = default_variator(self.problem)   
+            self.variator = default_variator(self.problem)
+        
+        self.parents = {}
+        self.completed = 0
+        
+    def __getstate__(self):
+        # the pending offspring are discarded when pickled (e.g., by a
+        # checkpoint), so their parents are no longer needed
+        state = super(GDE3, self).__getstate__()
+        
+        if "parents" in state:
+            state["parents"] = {}
+            
+        return state
            
     def iterate(self):
-        offspring = []
+        if self.asynchronous:
+            self.iterate_async()
+            return
         
-        for i in range(self.population_size):
-            parents = self.select(i, self.variator.arity)
-            offspring.extend(self.variator.evolve(parents))
+        if hasattr(self.variator, "evolve_population"):
+            offspring = self.variator.evolve_population(self.population)
+        else:
+            offspring = []
+            
+            for i in range(self.population_size):
+                parents = self.select(i, self.variator.arity)
+                offspring.extend(self.variator.evolve(parents))
             
         self.evaluate_all(offspring)
         self.population = self.survival(offspring)
         
+    def iterate_async(self):
+        child = self.next_evaluated()
+        parent = self.parents.pop(child)
+        flag = self.dominance.compare(child, parent)
+        
+        if flag < 0 and parent in self.population:
+            self.population[self.population.index(parent)] = child
+        elif flag <= 0:
+            self.population.append(child)
+            
+        self.completed += 1
+        
+        if self.completed % self.population_size == 0 and len(self.population) > self.population_size:
+            nondominated_sort(self.population)
+            self.population = nondominated_prune(self.population, self.population_size)
+        
+    def generate_offspring(self):
+        i = 0
+        
+        while True:
+            parents = self.select(i % len(self.population), self.variator.arity)
+            
+            for child in self.variator.evolve(parents):
+                self.parents[child] = parents[0]
+                yield child
+                
+            i += 1
+        
 class SPEA2(AbstractGeneticAlgorithm):
      
     def __init__(self, problem,
@@ -349,7 +481,8 @@ class SPEA2(AbstractGeneticAlgorithm):
          
         # compute dominance flags
         keys = list(itertools.combinations(range(len(solutions)), 2))
-        flags = list(map(self.dominance.compare, [solutions[k[0]] for k in keys], [solutions[k[1]] for k in keys]))
+        matrix = self.dominance.all_pairs(solutions)
+        flags = [matrix[k[0]][k[1]] for k in keys]
         
         # compute the distance matrix
         distanceMatrix = DistanceMatrix(solutions)
@@ -402,11 +535,7 @@ class SPEA2(AbstractGeneticAlgorithm):
             self.variator = default_variator(self.problem)
          
     def iterate(self):
-        offspring = []
-         
-        while len(offspring) < self.population_size:
-            parents = self.selection.select(self.variator.arity, self.population)
-            offspring.extend(self.variator.evolve(parents))
+        offspring = self._create_offspring(self.selection)
              
         self.evaluate_all(offspring)
          
@@ -774,11 +903,7 @@ class NSGAIII(AbstractGeneticAlgorithm):
             self.variator = default_variator(self.problem)
     
     def iterate(self):
-        offspring = []
-        
-        while len(offspring) < self.population_size:
-            parents = self.selector.select(self.variator.arity, self.population)
-            offspring.extend(self.variator.evolve(parents))
+        offspring = self._create_offspring(self.selector)
             
         self.evaluate_all(offspring)
         
@@ -1026,6 +1151,19 @@ class SMPSO(ParticleSwarm):
                 self.particles[i] = self.mutate.mutate(self.particles[i])
                 
 class CMAES(Algorithm):
+    """Covariance matrix adaptation evolution strategy (CMA-ES).
+    
+    Two implementations are provided, selected with :code:`backend`.  The
+    :code:`"numpy"` backend stores the covariance matrix and eigenvectors as
+    NumPy arrays, computes the eigendecomposition with
+    :code:`numpy.linalg.eigh`, samples all offspring with one matrix product
+    and updates the covariance matrix with array operations.  Its random
+    numbers are drawn from a NumPy generator seeded from Python's
+    :code:`random` module, so it requires NumPy 1.17 or later.  The default
+    :code:`"python"` backend is the original pure Python implementation.
+    The backends draw different random numbers, so a seeded run gives
+    different results with each backend.
+    """
     
     def __init__(self, problem,
                  offspring_size = 100,
@@ -1040,6 +1178,7 @@ class CMAES(Algorithm):
                  initial_search_point = None,
                  check_consistency = False,
                  epsilons = None,
+                 backend = "python",
                  **kwargs):
         super(CMAES, self).__init__(problem, **kwargs)
         self.offspring_size = offspring_size
@@ -1057,6 +1196,15 @@ class CMAES(Algorithm):
         self.iteration = 0
         self.last_eigenupdate = 0
         
+        if backend not in ("numpy", "python"):
+            raise PlatypusError("backend must be 'numpy' or 'python'")
+        
+        if backend == "numpy" and (np is None or not hasattr(np.random, "default_rng")):
+            raise PlatypusError("the numpy backend requires NumPy 1.17 or later")
+        
+        self.backend = backend
+        self.rng = None
+        
         if epsilons is None:
             self.archive = Archive()
         else:
@@ -1078,24 +1226,41 @@ class CMAES(Algorithm):
             self.result = self.archive
         
     def initialize(self):
+        self._initialize_parameters()
+        
+        self.diag_D = [1.0]*self.problem.nvars
+        self.pc = [0.0]*self.problem.nvars
+        self.ps = [0.0]*self.problem.nvars
+        self.B = [[1.0 if i==j else 0.0 for j in range(self.problem.nvars)] for i in range(self.problem.nvars)]
+        self.C = [[1.0 if i==j else 0.0 for j in range(self.problem.nvars)] for i in range(self.problem.nvars)]
+            
+        if self.backend == "numpy":
+            self.rng = np.random.default_rng(random.getrandbits(64))
+            self.diag_D = np.array(self.diag_D)
+            self.pc = np.array(self.pc)
+            self.ps = np.array(self.ps)
+            self.B = np.array(self.B)
+            self.C = np.array(self.C)
+            self.xmean = np.array(self.xmean)
+            self.weights = np.array(self.weights)
+            
+        self.iterate()
+        
+    def _initialize_parameters(self):
+        """Sets the initial mean and the default strategy parameters."""
         if self.sigma is None:
             self.sigma = 0.5
             
         if self.diagonal_iterations is None:
             self.diagonal_iterations = 150 * self.problem.nvars / self.offspring_size
             
-        self.diag_D = [1.0]*self.problem.nvars
-        self.pc = [0.0]*self.problem.nvars
-        self.ps = [0.0]*self.problem.nvars
-        self.B = [[1.0 if i==j else 0.0 for j in range(self.problem.nvars)] for i in range(self.problem.nvars)]
-        self.C = [[1.0 if i==j else 0.0 for j in range(self.problem.nvars)] for i in range(self.problem.nvars)]
         self.xmean = [0.0]*self.problem.nvars
         
         if self.initial_search_point is None:
             for i in range(self.problem.nvars):
                 type = self.problem.types[i]
-                offset = self.sigma * self.diag_D[i]
-                rangev = type.max_value - type.min_value - 2*self.sigma*self.diag_D[i]
+                offset = self.sigma
+                rangev = type.max_value - type.min_value - 2*self.sigma
                 
                 if offset > 0.4 * (type.max_value - type.min_value):
                     offset = 0.4 * (type.max_value - type.min_value)
@@ -1104,7 +1269,7 @@ class CMAES(Algorithm):
                 self.xmean[i] = type.min_value + offset + random.uniform(0.0, 1.0) * rangev
         else:
             for i in range(self.problem.nvars):
-                self.xmean[i] = self.initial_search_point[i] + self.sigma*self.diag_D[i]*random.gauss()  
+                self.xmean[i] = self.initial_search_point[i] + self.sigma*random.gauss()  
             
         self.chi_N = math.sqrt(self.problem.nvars) * (1.0 - 1.0/(4.0*self.problem.nvars) + 1.0/(21.0*self.problem.nvars**2))
         self.mu = int(math.floor(self.offspring_size / 2.0))
@@ -1131,12 +1296,12 @@ class CMAES(Algorithm):
         if self.ccovsep is None:
             self.ccovsep = min(1.0, self.ccov * (self.problem.nvars + 1.5) / 3.0)
             
-        self.iterate()
-            
     def eigendecomposition(self):
         self.last_eigenupdate = self.iteration
         
-        if self.diagonal_iterations >= self.iteration:
+        if self.backend == "numpy":
+            self._eigendecomposition_numpy()
+        elif self.diagonal_iterations >= self.iteration:
             for i in range(self.problem.nvars):
                 self.diag_D[i] = math.sqrt(self.C[i][i])
         else:
@@ -1157,6 +1322,21 @@ class CMAES(Algorithm):
                     self.diag_D[i] = 0.0
                     
                 self.diag_D[i] = math.sqrt(self.diag_D[i])
+                
+    def _eigendecomposition_numpy(self):
+        if self.diagonal_iterations >= self.iteration:
+            self.diag_D = np.sqrt(np.diag(self.C))
+        else:
+            eigenvalues, self.B = np.linalg.eigh(self.C)
+            
+            if self.check_consistency:
+                check_eigensystem(self.problem.nvars, self.C, eigenvalues, self.B)
+                
+            if np.any(eigenvalues < 0.0):
+                print("an eigenvalue has become negative", file=sys.stderr)
+                eigenvalues = np.maximum(eigenvalues, 0.0)
+                
+            self.diag_D = np.sqrt(eigenvalues)
             
     def test_and_correct_numerics(self):
         # flat fitness, test if function values are identical
@@ -1175,7 +1355,12 @@ class CMAES(Algorithm):
         elif min(self.diag_D) > 1e4:
             fac = 1.0 / min(self.diag_D)
             
-        if fac != 1.0:
+        if fac != 1.0 and self.backend == "numpy":
+            self.sigma /= fac
+            self.pc *= fac
+            self.diag_D *= fac
+            self.C *= fac**2
+        elif fac != 1.0:
             self.sigma /= fac
         
             for i in range(self.problem.nvars):
@@ -1192,6 +1377,9 @@ class CMAES(Algorithm):
         if self.check_consistency:
             self.test_and_correct_numerics()
             
+        if self.backend == "numpy":
+            return self._sample_numpy()
+            
         samples = []
         
         for _ in range(self.offspring_size):
@@ -1244,11 +1432,36 @@ class CMAES(Algorithm):
         self.iteration += 1
         return samples
     
-    def update_distribution(self):
-        xold = self.xmean[:]
-        BDz = [0.0]*self.problem.nvars
-        artmp = [0.0]*self.problem.nvars
+    def _sample_numpy(self):
+        nvars = self.problem.nvars
+        lb = np.array([t.min_value for t in self.problem.types], dtype=float)
+        ub = np.array([t.max_value for t in self.problem.types], dtype=float)
+        x = np.empty((self.offspring_size, nvars))
+        pending = np.arange(self.offspring_size)
         
+        # resample any offspring outside the bounds
+        while len(pending) > 0:
+            z = self.rng.standard_normal((len(pending), nvars)) * self.diag_D
+            
+            if self.diagonal_iterations >= self.iteration:
+                x[pending] = self.xmean + self.sigma * z
+            else:
+                x[pending] = self.xmean + self.sigma * z.dot(self.B.T)
+                
+            infeasible = np.any((x[pending] < lb) | (x[pending] > ub), axis=1)
+            pending = pending[infeasible]
+            
+        samples = []
+        
+        for row in x.tolist():
+            solution = Solution(self.problem)
+            solution.variables = row
+            samples.append(solution)
+        
+        self.iteration += 1
+        return samples
+    
+    def _sort_population(self):
         if self.problem.nobjs == 1:
             self.population = sorted(self.population, key=lambda x : x.objectives[0])
         else:
@@ -1256,6 +1469,58 @@ class CMAES(Algorithm):
                 self.population = sorted(self.population, key=functools.cmp_to_key(nondominated_cmp)) 
             else:
                 self.population = sorted(self.population, key=functools.cmp_to_key(self.fitness_comparator.compare))
+    
+    def _update_distribution_numpy(self):
+        diagonal = self.diagonal_iterations >= self.iteration
+        xold = self.xmean
+        
+        self._sort_population()
+        
+        selected = np.array([s.variables[:] for s in self.population[:self.mu]], dtype=float)
+        self.xmean = self.weights.dot(selected)
+        BDz = math.sqrt(self.mueff) * (self.xmean - xold) / self.sigma
+        
+        if diagonal:
+            self.ps = (1.0 - self.cs) * self.ps + math.sqrt(self.cs * (2.0 - self.cs)) * BDz / self.diag_D
+        else:
+            artmp = self.B.T.dot(BDz) / self.diag_D
+            self.ps = (1.0 - self.cs) * self.ps + math.sqrt(self.cs * (2.0 - self.cs)) * self.B.dot(artmp)
+            
+        psxps = self.ps.dot(self.ps)
+        hsig = 0.0
+        
+        if math.sqrt(psxps) / math.sqrt(1.0 - math.pow(1.0 - self.cs, 2.0 * self.iteration)) / self.chi_N < 1.4 + 2.0 / (self.problem.nvars+1):
+            hsig = 1.0
+            
+        self.pc = (1.0 - self.cc) * self.pc + hsig * math.sqrt(self.cc * (2.0 - self.cc)) * BDz
+        
+        # rank-one and rank-mu updates
+        y = (selected - xold) / self.sigma
+        decay = 1.0 - (self.ccovsep if diagonal else self.ccov)
+        rank_one = self.ccov * (1.0 / self.mueff)
+        rank_mu = self.ccov * (1.0 - 1.0 / self.mueff)
+        
+        if diagonal:
+            c = np.diag(self.C)
+            c = decay * c + rank_one * (self.pc**2 + (1.0 - hsig) * self.cc * (2.0 - self.cc) * c) + \
+                    rank_mu * self.weights.dot(y**2)
+            np.fill_diagonal(self.C, c)
+        else:
+            self.C = decay * self.C + rank_one * (np.outer(self.pc, self.pc) + (1.0 - hsig) * self.cc * (2.0 - self.cc) * self.C) + \
+                    rank_mu * (y.T * self.weights).dot(y)
+            
+        self.sigma *= math.exp(((math.sqrt(psxps) / self.chi_N) - 1.0) * self.cs / self.damps)
+    
+    def update_distribution(self):
+        if self.backend == "numpy":
+            self._update_distribution_numpy()
+            return
+        
+        xold = self.xmean[:]
+        BDz = [0.0]*self.problem.nvars
+        artmp = [0.0]*self.problem.nvars
+        
+        self._sort_population()
             
         for i in range(self.problem.nvars):
             self.xmean[i] = 0.0
@@ -1306,6 +1571,189 @@ class CMAES(Algorithm):
         self.archive += self.population
         self.update_distribution()
         
+class LargeScaleCMAES(CMAES):
+    """CMA-ES with memory linear in the number of decision variables.
+    
+    Intended for problems with thousands of decision variables, where the
+    full covariance matrix used by :code:`CMAES` is too large to store and
+    decompose.  Two strategies are supported:
+    
+    * :code:`"sep"` - separable CMA-ES, which adapts only the diagonal of
+      the covariance matrix.
+    * :code:`"lm"` - limited-memory CMA-ES (LM-CMA), which represents the
+      Cholesky factor of the covariance matrix implicitly by the last
+      :code:`memory_size` evolution paths, stored every
+      :code:`update_period` iterations.
+      
+    Both strategies take O(nvars) memory per stored vector and sample and
+    update the distribution with NumPy.  The step size is adapted by
+    cumulative step-size adaptation as in :code:`CMAES`, which changes it by
+    roughly a factor of :code:`exp(1/nvars)` per iteration, so the number
+    of iterations, not evaluations, should grow with :code:`nvars` and a
+    small :code:`offspring_size` is usually preferable.  Offspring outside
+    the bounds are clipped, since rejection sampling rarely succeeds with
+    many variables.  The archive, :code:`epsilons` and :code:`indicator`
+    options are the same as :code:`CMAES`, but only the :code:`"numpy"`
+    backend is supported.  Requires NumPy.
+    
+    Parameters
+    ----------
+    strategy : str (default "lm")
+        Either :code:`"lm"` or :code:`"sep"`.
+    memory_size : int (default None)
+        The number of evolution paths stored by LM-CMA.  Defaults to
+        :code:`4 + floor(3 ln(nvars))`.
+    update_period : int (default None)
+        The number of iterations between storing evolution paths.  Defaults
+        to :code:`max(1, floor(ln(nvars)))`.
+    """
+    
+    def __init__(self, problem,
+                 strategy = "lm",
+                 memory_size = None,
+                 update_period = None,
+                 **kwargs):
+        if np is None:
+            raise PlatypusError("LargeScaleCMAES requires NumPy")
+        
+        if strategy not in ("lm", "sep"):
+            raise PlatypusError("strategy must be 'lm' or 'sep'")
+        
+        backend = kwargs.pop("backend", "numpy")
+        
+        if backend != "numpy":
+            raise PlatypusError("LargeScaleCMAES only supports the numpy backend")
+        
+        super(LargeScaleCMAES, self).__init__(problem, backend=backend, **kwargs)
+        self.strategy = strategy
+        self.memory_size = memory_size
+        self.update_period = update_period
+        
+    def initialize(self):
+        nvars = self.problem.nvars
+        
+        if self.strategy == "lm":
+            # the LM-CMA defaults, which are set before the CMA-ES defaults
+            if self.cc is None:
+                self.cc = 0.5 / math.sqrt(nvars)
+                
+            if self.ccov is None:
+                self.ccov = 0.1 / math.log(nvars + 1.0)
+                
+        self._initialize_parameters()
+        
+        if self.memory_size is None:
+            self.memory_size = 4 + int(math.floor(3.0 * math.log(nvars)))
+            
+        if self.update_period is None:
+            self.update_period = max(1, int(math.floor(math.log(nvars))))
+        
+        self.rng = np.random.default_rng(random.getrandbits(64))
+        self.xmean = np.array(self.xmean)
+        self.weights = np.array(self.weights)
+        self.pc = np.zeros(nvars)
+        self.ps = np.zeros(nvars)
+        
+        if self.strategy == "sep":
+            self.diag_C = np.ones(nvars)
+        else:
+            self.paths = np.zeros((0, nvars))
+            self.directions = np.zeros((0, nvars))
+            self.b = np.zeros(0)
+            self.d = np.zeros(0)
+            
+        self.iterate()
+        
+    def _transform(self, z):
+        """Multiplies each row of z by the Cholesky factor of C."""
+        if self.strategy == "sep":
+            return z * np.sqrt(self.diag_C)
+        
+        a = math.sqrt(1.0 - self.ccov)
+        x = z
+        
+        for j in range(len(self.paths)):
+            x = a * x + self.b[j] * np.outer(z.dot(self.directions[j]), self.paths[j])
+            
+        return x
+    
+    def _inverse_transform(self, z, count=None):
+        """Multiplies a vector by the inverse Cholesky factor of C.
+        
+        For LM-CMA, only the first :code:`count` stored paths are used.
+        """
+        if self.strategy == "sep":
+            return z / np.sqrt(self.diag_C)
+        
+        a = math.sqrt(1.0 - self.ccov)
+        
+        for j in range(len(self.paths) if count is None else count):
+            z = z / a - self.d[j] * self.directions[j].dot(z) * self.directions[j]
+            
+        return z
+    
+    def _store_path(self):
+        """Adds the evolution path to the memory and updates the factor."""
+        self.paths = np.vstack([self.paths, self.pc])[-self.memory_size:]
+        self.directions = np.zeros(self.paths.shape)
+        self.b = np.zeros(len(self.paths))
+        self.d = np.zeros(len(self.paths))
+        c = self.ccov
+        
+        for j in range(len(self.paths)):
+            self.directions[j] = self._inverse_transform(self.paths[j], j)
+            norm = self.directions[j].dot(self.directions[j])
+            
+            if norm == 0.0:
+                continue
+            
+            root = math.sqrt(1.0 + c / (1.0 - c) * norm)
+            self.b[j] = math.sqrt(1.0 - c) / norm * (root - 1.0)
+            self.d[j] = 1.0 / (math.sqrt(1.0 - c) * norm) * (1.0 - 1.0 / root)
+        
+    def sample(self):
+        lb = np.array([t.min_value for t in self.problem.types], dtype=float)
+        ub = np.array([t.max_value for t in self.problem.types], dtype=float)
+        z = self.rng.standard_normal((self.offspring_size, self.problem.nvars))
+        x = np.clip(self.xmean + self.sigma * self._transform(z), lb, ub)
+        samples = []
+        
+        for row in x.tolist():
+            solution = Solution(self.problem)
+            solution.variables = row
+            samples.append(solution)
+            
+        self.iteration += 1
+        return samples
+    
+    def update_distribution(self):
+        xold = self.xmean
+        
+        self._sort_population()
+        
+        selected = np.array([s.variables[:] for s in self.population[:self.mu]], dtype=float)
+        self.xmean = self.weights.dot(selected)
+        BDz = math.sqrt(self.mueff) * (self.xmean - xold) / self.sigma
+        
+        self.ps = (1.0 - self.cs) * self.ps + math.sqrt(self.cs * (2.0 - self.cs)) * self._inverse_transform(BDz)
+        psxps = self.ps.dot(self.ps)
+        hsig = 0.0
+        
+        if math.sqrt(psxps) / math.sqrt(1.0 - math.pow(1.0 - self.cs, 2.0 * self.iteration)) / self.chi_N < 1.4 + 2.0 / (self.problem.nvars+1):
+            hsig = 1.0
+            
+        self.pc = (1.0 - self.cc) * self.pc + hsig * math.sqrt(self.cc * (2.0 - self.cc)) * BDz
+        
+        if self.strategy == "sep":
+            y = (selected - xold) / self.sigma
+            self.diag_C = (1.0 - self.ccovsep) * self.diag_C + \
+                    self.ccovsep * (1.0 / self.mueff) * (self.pc**2 + (1.0 - hsig) * self.cc * (2.0 - self.cc) * self.diag_C) + \
+                    self.ccovsep * (1.0 - 1.0 / self.mueff) * self.weights.dot(y**2)
+        elif self.iteration % self.update_period == 0:
+            self._store_path()
+            
+        self.sigma *= math.exp(((math.sqrt(psxps) / self.chi_N) - 1.0) * self.cs / self.damps)
+        
 class IBEA(AbstractGeneticAlgorithm):
     
     def __init__(self, problem,
@@ -1329,11 +1777,7 @@ class IBEA(AbstractGeneticAlgorithm):
             self.variator = default_variator(self.problem)
         
     def iterate(self):
-        offspring = []
-        
-        while len(offspring) < self.population_size:
-            parents = self.selector.select(self.variator.arity, self.population)
-            offspring.extend(self.variator.evolve(parents))
+        offspring = self._create_offspring(self.selector)
             
         self.evaluate_all(offspring)
         
@@ -1415,10 +1859,11 @@ class RegionBasedSelector(Selector):
         super(RegionBasedSelector, self).__init__()
         self.archive = archive
         self.grid = grid
+        self.keys = list(grid.keys())
         
     def draw(self):
-        index = random.randrange(len(self.grid.keys()))
-        key = self.grid.keys()[index]
+        index = random.randrange(len(self.keys))
+        key = self.keys[index]
         return (key, self.grid[key])
         
     def select_one(self, population):
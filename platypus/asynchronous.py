@@ -0,0 +1,154 @@
+# Copyright 2015-2018 David Hadka
+#
+# This file is part of Platypus, a Python module for designing and using
+# evolutionary algorithms (EAs) and multiobjective evolutionary algorithms
+# (MOEAs).
+#
+# Platypus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Platypus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Platypus.  If not, see <http://www.gnu.org/licenses/>.
+"""Evaluation of problems defined by asyncio coroutines.
+
+This module requires Python 3.7 or later.
+"""
+from __future__ import absolute_import, division, print_function
+
+import time
+import asyncio
+import inspect
+import logging
+import datetime
+import threading
+from .core import Problem, _EvaluateJob
+from .evaluator import Evaluator, _as_completed
+
+LOGGER = logging.getLogger("Platypus")
+
+async def evaluate_async(solution):
+    """Evaluates a solution whose problem may be defined by a coroutine.
+    
+    Awaits either the problem's function, when the problem is created from
+    an :code:`async def` function, or the problem's :code:`evaluate` method,
+    when a subclass defines it with :code:`async def`.  Regular problems are
+    evaluated as usual.
+    """
+    problem = solution.problem
+    problem._decode(solution)
+    
+    if problem.function is not None and type(problem).evaluate is Problem.evaluate:
+        result = problem.function(solution.variables)
+        
+        if inspect.isawaitable(result):
+            result = await result
+            
+        problem._assign(solution, result)
+    else:
+        result = problem.evaluate(solution)
+        
+        if inspect.isawaitable(result):
+            await result
+            
+    problem._encode(solution)
+
+class AsyncEvaluator(Evaluator):
+    """Evaluates jobs concurrently on an asyncio event loop.
+    
+    Intended for I/O-bound objective functions, such as requests to remote
+    simulators, defined with :code:`async def`.  Either pass a coroutine
+    function to :code:`Problem`, or define the problem's :code:`evaluate`
+    method as a coroutine.  Up to :code:`concurrency` evaluations are in
+    flight at once.  Other jobs are awaited if they define a :code:`run_async`
+    coroutine, and otherwise run in the event loop's default executor.
+    
+    The event loop runs in a background thread, so this evaluator can be
+    used from code that is itself running inside an event loop (e.g., a
+    notebook).  Call :code:`close` (or use a :code:`with` block) to stop it.
+    """
+    
+    def __init__(self, concurrency=100):
+        super(AsyncEvaluator, self).__init__()
+        self.concurrency = concurrency
+        self.semaphore = None
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="AsyncEvaluator")
+        self.thread.daemon = True
+        self.thread.start()
+        LOGGER.log(logging.INFO, "Started async evaluator with concurrency %d", concurrency)
+        
+    async def _run(self, job):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+            
+        async with self.semaphore:
+            if isinstance(job, _EvaluateJob):
+                await evaluate_async(job.solution)
+            elif hasattr(job, "run_async"):
+                await job.run_async()
+            else:
+                await self.loop.run_in_executor(None, job.run)
+                
+        return job
+    
+    async def _cancel_all(self):
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        
+        for task in tasks:
+            task.cancel()
+            
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        # let the cancellations propagate to the futures returned by _submit
+        await asyncio.sleep(0)
+    
+    def _submit(self, job):
+        return asyncio.run_coroutine_threadsafe(self._run(job), self.loop)
+        
+    def evaluate_all(self, jobs, **kwargs):
+        futures = [self._submit(job) for job in jobs]
+        log_frequency = kwargs.get("log_frequency", None)
+        
+        if log_frequency is None:
+            return [f.result() for f in futures]
+        else:
+            result = []
+            job_name = kwargs.get("job_name", "Batch Jobs")
+            start_time = time.time()
+            
+            for f in futures:
+                result.append(f.result())
+                
+                if len(result) % log_frequency == 0 or len(result) == len(futures):
+                    LOGGER.log(logging.INFO,
+                               "%s running; Jobs Complete: %d, Elapsed Time: %s",
+                               job_name,
+                               len(result),
+                               datetime.timedelta(seconds=time.time()-start_time))
+                
+            return result
+        
+    def evaluate_async(self, jobs, max_pending=None, **kwargs):
+        return _as_completed(self._submit,
+                             lambda f: f.done(),
+                             lambda f: f.result(),
+                             jobs,
+                             max_pending or self.concurrency)
+        
+    def close(self):
+        if self.loop.is_closed():
+            return
+        
+        LOGGER.log(logging.DEBUG, "Closing async evaluator")
+        asyncio.run_coroutine_threadsafe(self._cancel_all(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        LOGGER.log(logging.INFO, "Closed async evaluator")
@@ -0,0 +1,443 @@
+# Copyright 2015-2018 David Hadka
+#
+# This file is part of Platypus, a Python module for designing and using
+# evolutionary algorithms (EAs) and multiobjective evolutionary algorithms
+# (MOEAs).
+#
+# Platypus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Platypus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Platypus.  If not, see <http://www.gnu.org/licenses/>.
+from __future__ import absolute_import, division, print_function
+
+import os
+import json
+import time
+import hashlib
+import threading
+import contextlib
+import collections
+
+def _freeze(value):
+    """Converts a decoded variable into a hashable value."""
+    if isinstance(value, (list, tuple)):
+        return tuple([_freeze(v) for v in value])
+    elif isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    else:
+        return value
+
+class EvaluationCache(object):
+    """Memoizes evaluation results keyed on the decoded decision variables.
+    
+    Useful for problems with discrete variables (e.g., permutations, subsets,
+    binary strings and integers), where the variation operators often
+    regenerate solutions that were already evaluated.  Pass an instance to an
+    algorithm with the :code:`cache` argument.  Solutions with the same
+    decoded variables as a cached solution receive a copy of its objectives
+    and constraints instead of being evaluated.  A cache should only be used
+    with a single problem.
+    
+    Parameters
+    ----------
+    maxsize: int (default 10000)
+        The maximum number of cached results.  The least recently used result
+        is discarded when the cache is full.  If None, the cache is unbounded.
+    count_hits: bool (default True)
+        If True, cache hits count towards the algorithm's NFE, as if the
+        solution was evaluated; otherwise, only actual evaluations count.
+        
+    Attributes
+    ----------
+    hits: int
+        The number of solutions whose results were read from the cache.
+    misses: int
+        The number of solutions that were evaluated.
+    """
+    
+    def __init__(self, maxsize=10000, count_hits=True):
+        super(EvaluationCache, self).__init__()
+        self.maxsize = maxsize
+        self.count_hits = count_hits
+        self.hits = 0
+        self.misses = 0
+        self.results = collections.OrderedDict()
+        
+    def __len__(self):
+        return len(self.results)
+    
+    def clear(self):
+        self.results.clear()
+        self.hits = 0
+        self.misses = 0
+        
+    def key(self, solution):
+        """Returns the cache key for the solution."""
+        problem = solution.problem
+        return tuple([_freeze(problem.types[i].decode(v)) for i, v in enumerate(solution.variables)])
+    
+    def load(self, solution, key=None):
+        """Copies the cached results into the solution, if any.
+        
+        Returns True on a cache hit; False otherwise.
+        """
+        if key is None:
+            key = self.key(solution)
+            
+        result = self._get(key)
+        
+        if result is None:
+            return False
+        
+        solution.objectives[:] = result[0]
+        solution.constraints[:] = result[1]
+        solution.constraint_violation = result[2]
+        solution.feasible = result[2] == 0.0
+        solution.evaluated = True
+        self.hits += 1
+        return True
+    
+    def store(self, solution, key=None):
+        """Stores the results of an evaluated solution."""
+        if key is None:
+            key = self.key(solution)
+            
+        self._put(key, (list(solution.objectives),
+                        list(solution.constraints),
+                        solution.constraint_violation))
+        self.misses += 1
+        
+    def _get(self, key):
+        result = self.results.pop(key, None)
+        
+        if result is not None:
+            # reinsert to mark as the most recently used
+            self.results[key] = result
+            
+        return result
+    
+    def _put(self, key, result):
+        self.results.pop(key, None)
+        self.results[key] = result
+        
+        if self.maxsize is not None:
+            while len(self.results) > self.maxsize:
+                self.results.popitem(last=False)
+                
+    def evaluate_all(self, solutions, evaluate):
+        """Evaluates the solutions not found in the cache.
+        
+        Solutions with the same variables as another solution in the list
+        are only evaluated once.  Returns the number of cache hits.
+        
+        Parameters
+        ----------
+        solutions: list of Solution
+            The unevaluated solutions.
+        evaluate: callable
+            Function evaluating a list of solutions.
+        """
+        hits = self.hits
+        misses = collections.OrderedDict()
+        duplicates = []
+        
+        for solution in solutions:
+            key = self.key(solution)
+            
+            if key in misses:
+                duplicates.append((key, solution))
+            elif not self.load(solution, key):
+                misses[key] = solution
+                
+        evaluate(list(misses.values()))
+        
+        for key, solution in misses.items():
+            self.store(solution, key)
+            
+        for key, solution in duplicates:
+            self.load(solution, key)
+            
+        return self.hits - hits
+
+def _stable_repr(value):
+    """Returns a repr of a cache key that is the same in every process."""
+    if isinstance(value, tuple):
+        return "(" + ", ".join([_stable_repr(v) for v in value]) + ",)"
+    elif isinstance(value, frozenset):
+        # the iteration order of sets of strings depends on the hash seed
+        return "{" + ", ".join(sorted([_stable_repr(v) for v in value])) + "}"
+    else:
+        return repr(value)
+    
+# connections inherited from a parent process when forking, which must not be
+# closed by the child (see https://www.sqlite.org/howtocorrupt.html)
+_INHERITED_CONNECTIONS = []
+
+class PersistentEvaluationCache(EvaluationCache):
+    """Evaluation cache stored in a SQLite database.
+    
+    Results are written to disk, so they are shared by every run, seed and
+    process using the same file, including restarts.  Before evaluating a
+    solution, the cache claims its variables in the database.  Other processes
+    reaching the same variables wait for the result instead of evaluating them
+    again, so each solution is only evaluated once.  A failing evaluation
+    releases its claims, but a process that dies outright (e.g., is killed)
+    leaves them behind.  Processes waiting on such a claim keep polling the
+    database until it is older than :code:`lease` seconds, at which point one
+    of them takes it over and evaluates the solution.  A shorter lease
+    recovers sooner from dead workers, but it should exceed the longest
+    evaluation time, or a slow evaluation is repeated by a second process.
+    
+    Instances can be pickled and sent to other processes, for example when
+    running algorithms with :code:`experiment` and a
+    :code:`ProcessPoolEvaluator`; each process opens its own connection.
+    The database file should be on a local file system.
+    
+    Parameters
+    ----------
+    path: str
+        The database file.  It is created if it does not exist.
+    namespace: str (default None)
+        Keeps the results of different problems apart.  If None, the name and
+        size of the problem are used.  Set it to tell apart problems of the
+        same type with different parameters.
+    maxsize: int (default 10000)
+        The maximum number of results also kept in memory.
+    count_hits: bool (default True)
+        If True, cache hits count towards the algorithm's NFE, as if the
+        solution was evaluated; otherwise, only actual evaluations count.
+    timeout: float (default 60.0)
+        The number of seconds to wait for the database when it is locked by
+        another process.
+    lease: float (default 3600.0)
+        The number of seconds after which a claim by another process is
+        considered abandoned.  If None, claims never expire, so a dead
+        worker blocks the other processes indefinitely.
+    """
+    
+    def __init__(self, path, namespace=None, maxsize=10000, count_hits=True,
+                 timeout=60.0, lease=3600.0):
+        super(PersistentEvaluationCache, self).__init__(maxsize, count_hits)
+        self.path = os.path.abspath(path)
+        self.namespace = namespace
+        self.timeout = timeout
+        self.lease = lease
+        self._lock = threading.RLock()
+        self._connection = None
+        self._pid = None
+        self._connect()
+        
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["results"] = collections.OrderedDict()
+        del state["_lock"]
+        del state["_connection"]
+        del state["_pid"]
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+        self._connection = None
+        self._pid = None
+    
+    def __len__(self):
+        with self._lock:
+            cursor = self._connect().execute(
+                "SELECT COUNT(*) FROM evaluations WHERE result IS NOT NULL")
+            return cursor.fetchone()[0]
+        
+    def clear(self):
+        """Deletes all results stored in the database."""
+        super(PersistentEvaluationCache, self).clear()
+        
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM evaluations")
+            
+    def close(self):
+        """Closes the connection to the database."""
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+                
+            self._connection = None
+            self._pid = None
+        
+    def key(self, solution):
+        problem = solution.problem
+        
+        if self.namespace is None:
+            namespace = "%s.%s(%d, %d, %d)" % (type(problem).__module__,
+                                               type(problem).__name__,
+                                               problem.nvars,
+                                               problem.nobjs,
+                                               problem.nconstrs)
+        else:
+            namespace = self.namespace
+        
+        return (namespace, super(PersistentEvaluationCache, self).key(solution))
+    
+    def evaluate_all(self, solutions, evaluate):
+        hits = self.hits
+        pending = collections.OrderedDict()
+        duplicates = []
+        delay = 0.01
+        
+        for solution in solutions:
+            key = self.key(solution)
+            
+            if key in pending:
+                duplicates.append((key, solution))
+            elif not self.load(solution, key):
+                pending[key] = solution
+                
+        while len(pending) > 0:
+            claimed = self._claim(list(pending.keys()))
+            misses = [(key, pending.pop(key)) for key in claimed]
+            
+            if len(misses) > 0:
+                try:
+                    evaluate([solution for _, solution in misses])
+                except BaseException:
+                    self._release(claimed)
+                    raise
+                
+                self._store_all(misses)
+                
+            # the remaining solutions are being evaluated by other processes
+            if len(pending) > 0:
+                time.sleep(delay)
+                delay = min(2*delay, 1.0)
+                
+                for key in list(pending.keys()):
+                    if self.load(pending[key], key):
+                        del pending[key]
+            
+        for key, solution in duplicates:
+            self.load(solution, key)
+            
+        return self.hits - hits
+    
+    def _connect(self):
+        if self._connection is None or self._pid != os.getpid():
+            import sqlite3
+            
+            if self._connection is not None:
+                _INHERITED_CONNECTIONS.append(self._connection)
+            
+            connection = sqlite3.connect(self.path,
+                                         timeout=self.timeout,
+                                         isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("""CREATE TABLE IF NOT EXISTS evaluations (
+                                      namespace TEXT NOT NULL,
+                                      key TEXT NOT NULL,
+                                      result TEXT,
+                                      claimed REAL,
+                                      PRIMARY KEY (namespace, key))""")
+            self._connection = connection
+            self._pid = os.getpid()
+            
+        return self._connection
+    
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            
+            connection.execute("COMMIT")
+    
+    def _row(self, key):
+        digest = hashlib.sha1(_stable_repr(key[1]).encode("utf-8")).hexdigest()
+        return (key[0], digest)
+    
+    def _get(self, key):
+        result = super(PersistentEvaluationCache, self)._get(key)
+        
+        if result is None:
+            with self._lock:
+                cursor = self._connect().execute(
+                    "SELECT result FROM evaluations WHERE namespace = ? AND key = ? AND result IS NOT NULL",
+                    self._row(key))
+                row = cursor.fetchone()
+                
+            if row is not None:
+                result = tuple(json.loads(row[0]))
+                super(PersistentEvaluationCache, self)._put(key, result)
+                
+        return result
+    
+    def _put(self, key, result):
+        super(PersistentEvaluationCache, self)._put(key, result)
+        self._write([(key, result)])
+        
+    def _store_all(self, misses):
+        results = []
+        
+        for key, solution in misses:
+            result = (list(solution.objectives),
+                      list(solution.constraints),
+                      solution.constraint_violation)
+            super(PersistentEvaluationCache, self)._put(key, result)
+            results.append((key, result))
+            
+        self._write(results)
+        self.misses += len(misses)
+        
+    def _write(self, results):
+        rows = []
+        
+        for key, result in results:
+            value = json.dumps([[float(v) for v in result[0]],
+                                [float(v) for v in result[1]],
+                                float(result[2])])
+            rows.append(self._row(key) + (value,))
+        
+        with self._transaction() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO evaluations (namespace, key, result, claimed) VALUES (?, ?, ?, NULL)",
+                rows)
+            
+    def _claim(self, keys):
+        now = time.time()
+        claimed = []
+        
+        with self._transaction() as connection:
+            for key in keys:
+                row = self._row(key)
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO evaluations (namespace, key, claimed) VALUES (?, ?, ?)",
+                    row + (now,))
+                
+                if cursor.rowcount == 0 and self.lease is not None:
+                    cursor = connection.execute(
+                        "UPDATE evaluations SET claimed = ? WHERE namespace = ? AND key = ? AND result IS NULL AND claimed < ?",
+                        (now,) + row + (now - self.lease,))
+                    
+                if cursor.rowcount > 0:
+                    claimed.append(key)
+                    
+        return claimed
+    
+    def _release(self, keys):
+        with self._transaction() as connection:
+            connection.executemany(
+                "DELETE FROM evaluations WHERE namespace = ? AND key = ? AND result IS NULL",
+                [self._row(key) for key in keys])
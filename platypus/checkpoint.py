@@ -0,0 +1,152 @@
+# Copyright 2015-2018 David Hadka
+#
+# This file is part of Platypus, a Python module for designing and using
+# evolutionary algorithms (EAs) and multiobjective evolutionary algorithms
+# (MOEAs).
+#
+# Platypus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Platypus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Platypus.  If not, see <http://www.gnu.org/licenses/>.
+from __future__ import absolute_import, division, print_function
+
+import io
+import os
+import zlib
+import time
+import pickle
+import random
+import inspect
+from .core import PlatypusError
+from .evaluator import Evaluator
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+class Checkpoint(object):
+    """Periodically saves the state of an algorithm to a file.
+    
+    Pass an instance to :code:`Algorithm.run`.  The checkpoint contains the
+    algorithm (including its population, archive, operators and any internal
+    state), the termination condition and the state of the random number
+    generators, and is written once more when the run finishes.  Use
+    :code:`Algorithm.resume` to continue the run from the last checkpoint,
+    which produces the same results as an uninterrupted run.  The file is
+    replaced atomically, so a run killed while writing a checkpoint leaves
+    the previous one intact.
+    
+    Parameters
+    ----------
+    path : str
+        The checkpoint file.
+    frequency : int (default None)
+        The number of function evaluations between checkpoints.
+    interval : float (default None)
+        The number of seconds between checkpoints.
+    """
+    
+    def __init__(self, path, frequency=None, interval=None):
+        super(Checkpoint, self).__init__()
+        self.path = path
+        self.frequency = frequency
+        self.interval = interval
+        self.last_nfe = 0
+        self.last_time = time.time()
+        
+    def __call__(self, algorithm, condition=None):
+        if self.frequency is not None and algorithm.nfe >= self.last_nfe + self.frequency:
+            self.save(algorithm, condition)
+        elif self.interval is not None and time.time() >= self.last_time + self.interval:
+            self.save(algorithm, condition)
+        
+    def initialize(self, algorithm):
+        self.last_nfe = algorithm.nfe
+        self.last_time = time.time()
+        
+    def save(self, algorithm, condition=None):
+        """Writes the checkpoint."""
+        self.last_nfe = algorithm.nfe
+        self.last_time = time.time()
+        
+        state = {"version" : 1,
+                 "algorithm" : algorithm,
+                 "condition" : condition,
+                 "checkpoint" : self,
+                 "random" : random.getstate(),
+                 "numpy" : np.random.get_state() if np is not None else None}
+        
+        buffer = io.BytesIO()
+        _CheckpointPickler(buffer, pickle.HIGHEST_PROTOCOL).dump(state)
+        
+        temp_path = self.path + ".tmp"
+        
+        with open(temp_path, "wb") as f:
+            f.write(zlib.compress(buffer.getvalue()))
+            f.flush()
+            os.fsync(f.fileno())
+            
+        getattr(os, "replace", os.rename)(temp_path, self.path)
+        
+    @staticmethod
+    def load(path, evaluator=None):
+        """Reads a checkpoint, restoring the state of the random generators.
+        
+        Returns the tuple :code:`(algorithm, condition, checkpoint)`.  The
+        evaluator is not saved in the checkpoint; the algorithm uses the given
+        evaluator, or the default evaluator if None.
+        """
+        if evaluator is None:
+            from .config import PlatypusConfig
+            evaluator = PlatypusConfig.default_evaluator
+            
+        with open(path, "rb") as f:
+            data = zlib.decompress(f.read())
+            
+        state = _CheckpointUnpickler(io.BytesIO(data), evaluator).load()
+        
+        if state.get("version") != 1:
+            raise PlatypusError("unsupported checkpoint version %s" % state.get("version"))
+        
+        random.setstate(state["random"])
+        
+        if np is not None and state["numpy"] is not None:
+            np.random.set_state(state["numpy"])
+        
+        return state["algorithm"], state["condition"], state["checkpoint"]
+    
+class _CheckpointPickler(pickle.Pickler):
+    """Pickler replacing evaluators and generators, which hold resources like
+    worker pools and pending evaluations that can not be saved.
+    """
+    
+    def persistent_id(self, obj):
+        if isinstance(obj, Evaluator):
+            return "evaluator"
+        elif inspect.isgenerator(obj):
+            return "generator"
+        else:
+            return None
+        
+class _CheckpointUnpickler(pickle.Unpickler):
+    
+    def __init__(self, file, evaluator):
+        pickle.Unpickler.__init__(self, file)
+        self.evaluator = evaluator
+        
+    def persistent_load(self, pid):
+        if pid == "evaluator":
+            return self.evaluator
+        elif pid == "generator":
+            return None
+        else:
+            raise pickle.UnpicklingError("unsupported persistent id %s" % pid)
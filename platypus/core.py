@@ -20,15 +20,25 @@ from __future__ import absolute_import, division, print_function
 
 import sys
 import copy
+import numbers
+import random
+import inspect
 import math
 import time
 import logging
 import datetime
+import bisect
 import operator
 import functools
 import itertools
+import weakref
 from abc import ABCMeta, abstractmethod
-from .evaluator import Job
+from .evaluator import Job, BatchJob, MapEvaluator, registered_key, lookup_problem
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 LOGGER = logging.getLogger("Platypus")
 EPSILON = sys.float_info.epsilon
@@ -87,6 +97,24 @@ def _convert_constraint(x):
     else:
         return Constraint(x)
 
+def _check_synchronous(result):
+    """Raises an error if an evaluation returned a coroutine or other awaitable.
+    
+    Problems defined with :code:`async def` must be evaluated by an
+    :code:`AsyncEvaluator`; otherwise the coroutine is never run and the
+    solution would be left holding stale objectives.
+    """
+    isawaitable = getattr(inspect, "isawaitable", None)
+    
+    if isawaitable is not None and isawaitable(result):
+        if hasattr(result, "close"):
+            result.close()
+            
+        raise PlatypusError("problem defined with async def must be evaluated "
+                            "with an AsyncEvaluator")
+        
+    return result
+
 class Problem(object):
     """Class representing a problem.
     
@@ -156,11 +184,18 @@ class Problem(object):
         solution: Solution
             The solution to evaluate.
         """
+        self._decode(solution)
+        _check_synchronous(self.evaluate(solution))
+        self._encode(solution)
+        
+    def _decode(self, solution):
+        """Decodes the variables before evaluation."""
         problem = solution.problem
         solution.variables[:] = [problem.types[i].decode(solution.variables[i]) for i in range(problem.nvars)]
         
-        self.evaluate(solution)
-        
+    def _encode(self, solution):
+        """Encodes the variables and computes the constraint violation."""
+        problem = solution.problem
         solution.variables[:] = [problem.types[i].encode(solution.variables[i]) for i in range(problem.nvars)]
         solution.constraint_violation = sum([abs(f(x)) for (f, x) in zip(solution.problem.constraints, solution.constraints)])
         solution.feasible = solution.constraint_violation == 0.0
@@ -182,10 +217,14 @@ class Problem(object):
         if self.function is None:
             raise PlatypusError("function not defined")
         
+        self._assign(solution, _check_synchronous(self.function(solution.variables)))
+        
+    def _assign(self, solution, result):
+        """Stores the value returned by the function in the solution."""
         if self.nconstrs > 0:
-            (objs, constrs) = self.function(solution.variables)
+            (objs, constrs) = result
         else:
-            objs = self.function(solution.variables)
+            objs = result
             constrs = []
             
         if not hasattr(objs, "__getitem__"):
@@ -202,6 +241,29 @@ class Problem(object):
         
         solution.objectives[:] = objs
         solution.constraints[:] = constrs
+        
+    def evaluate_batch(self, X):
+        """Evaluates a batch of solutions at once (optional).
+        
+        Problems that can be expressed over a matrix of decision variables
+        may override this method.  When NumPy is available,
+        :code:`Algorithm.evaluate_all` then evaluates all unevaluated
+        solutions with a single call instead of calling :code:`evaluate` for
+        each solution.  Solutions whose decoded variables are not numeric
+        are still evaluated individually.
+        
+        Parameters
+        ----------
+        X: ndarray
+            The (N x nvars) matrix of decoded decision variables.
+            
+        Returns
+        -------
+        A tuple (F, G) with the (N x nobjs) matrix of objectives and the
+        (N x nconstrs) matrix of constraints.  G may be None if the problem
+        has no constraints.
+        """
+        raise NotImplementedError("method not implemented")
 
 class Generator(object):
     """Abstract class for generating initial populations."""
@@ -228,6 +290,17 @@ class Variator(object):
     def evolve(self, parents):
         raise NotImplementedError("method not implemented")
     
+    def evolve_batch(self, parents):
+        """Evolves many groups of parents, returning all of the offspring.
+        
+        Each entry in :code:`parents` is a list of :code:`arity` parents.  By
+        default, :code:`evolve` is called on each group.  Variators can
+        override this method to create the offspring for an entire
+        generation at once, e.g., with vectorized array operations, in which
+        case algorithms select all parents up front.
+        """
+        return [child for group in parents for child in self.evolve(group)]
+    
 class Mutation(Variator):
     """Variator for mutation, which requires only one parent."""
     
@@ -335,6 +408,93 @@ class MaxTime(TerminationCondition):
     def shouldTerminate(self, algorithm):
         return time.time() - self.start_time >= self.max_time
     
+    def __getstate__(self):
+        """Stores the elapsed time instead of the start time, so a condition
+        restored from a checkpoint only counts the time spent running.
+        """
+        state = self.__dict__.copy()
+        state["elapsed_time"] = time.time() - state.pop("start_time")
+        return state
+    
+    def __setstate__(self, state):
+        state = dict(state)
+        elapsed_time = state.pop("elapsed_time")
+        self.__dict__.update(state)
+        self.start_time = time.time() - elapsed_time
+    
+def _supports_batch(problem):
+    """Returns True if the problem overrides :code:`Problem.evaluate_batch`.
+    
+    A subclass overriding :code:`evaluate` without also overriding
+    :code:`evaluate_batch` does not support batch evaluation, since the
+    inherited batch method would bypass its :code:`evaluate`.
+    """
+    if np is None:
+        return False
+    
+    mro = type(problem).__mro__
+    evaluate = [c for c in mro if "evaluate" in c.__dict__]
+    evaluate_batch = [c for c in mro if "evaluate_batch" in c.__dict__]
+    
+    if len(evaluate_batch) == 0 or evaluate_batch[0] is Problem:
+        return False
+    
+    return mro.index(evaluate_batch[0]) <= mro.index(evaluate[0])
+
+def _evaluate_batch(problem, solutions):
+    """Evaluates solutions to the same problem with one evaluate_batch call.
+    
+    Returns False, without evaluating any solutions, if the decoded
+    variables can not be converted into a numeric matrix.
+    """
+    from .types import Real
+    real = [isinstance(t, Real) for t in problem.types]
+    rows = [[v if real[i] else problem.types[i].decode(v) for i, v in enumerate(s.variables)] for s in solutions]
+    
+    try:
+        X = np.asarray(rows, dtype=float).reshape(len(solutions), problem.nvars)
+    except (TypeError, ValueError):
+        return False
+    
+    F, G = problem.evaluate_batch(X)
+    F = np.asarray(F, dtype=float)
+    
+    if F.shape != (len(solutions), problem.nobjs):
+        raise PlatypusError("incorrect shape of objectives: expected %s, received %s" % ((len(solutions), problem.nobjs), F.shape))
+    
+    if problem.nconstrs > 0:
+        G = np.asarray(G, dtype=float)
+        
+        if G.shape != (len(solutions), problem.nconstrs):
+            raise PlatypusError("incorrect shape of constraints: expected %s, received %s" % ((len(solutions), problem.nconstrs), G.shape))
+        
+        G = G.tolist()
+    else:
+        G = [[]]*len(solutions)
+        
+    for solution, objectives, constraints in zip(solutions, F.tolist(), G):
+        solution.objectives[:] = objectives
+        solution.constraints[:] = constraints
+        solution.constraint_violation = sum([abs(f(x)) for (f, x) in zip(problem.constraints, constraints)])
+        solution.feasible = solution.constraint_violation == 0.0
+        solution.evaluated = True
+        
+    return True
+
+def _copy_evaluation(solution, result):
+    """Copies the results of evaluating a (possibly remote) copy of a solution."""
+    if solution != result:
+        solution.variables[:] = result.variables[:]
+        solution.objectives[:] = result.objectives[:]
+        solution.constraints[:] = result.constraints[:]
+        solution.constraint_violation = result.constraint_violation
+        solution.feasible = result.feasible
+        solution.evaluated = result.evaluated
+    
+# Unevaluated solutions sent to workers by reference, keyed by a job token.
+_PENDING_SOLUTIONS = weakref.WeakValueDictionary()
+_PENDING_TOKENS = itertools.count()
+
 class _EvaluateJob(Job):
 
     def __init__(self, solution):
@@ -343,6 +503,137 @@ class _EvaluateJob(Job):
         
     def run(self):
         self.solution.evaluate()
+        self.finished = True
+        
+    def __getstate__(self):
+        """Sends only the variables or results when the problem is registered.
+        
+        The problem is referenced by its registry key.  Outgoing jobs send the
+        variables, while completed jobs return the objectives and
+        constraints, which are written directly into the original solution
+        when received by the process that submitted the job.
+        """
+        key = registered_key(self.solution.problem)
+        
+        if key is None:
+            return self.__dict__
+        
+        state = dict(self.__dict__)
+        solution = state.pop("solution")
+        state["problem_key"] = key
+        
+        if state.get("finished", False):
+            state["objectives"] = list(solution.objectives)
+            state["constraints"] = list(solution.constraints)
+            state["constraint_violation"] = solution.constraint_violation
+        else:
+            state["token"] = next(_PENDING_TOKENS)
+            state["variables"] = list(solution.variables)
+            _PENDING_SOLUTIONS[state["token"]] = solution
+            
+        return state
+    
+    def __setstate__(self, state):
+        if "problem_key" not in state:
+            self.__dict__.update(state)
+            return
+        
+        state = dict(state)
+        problem = lookup_problem(state.pop("problem_key"))
+        
+        if "variables" in state:
+            solution = Solution(problem)
+            solution.variables[:] = state.pop("variables")
+        else:
+            solution = _PENDING_SOLUTIONS.pop(state.get("token"), None)
+            
+            if solution is None:
+                solution = Solution(problem)
+                
+            solution.objectives[:] = state.pop("objectives")
+            solution.constraints[:] = state.pop("constraints")
+            solution.constraint_violation = state.pop("constraint_violation")
+            solution.feasible = solution.constraint_violation == 0.0
+            solution.evaluated = True
+            
+        self.__dict__.update(state)
+        self.solution = solution
+        
+    @classmethod
+    def create_batch(cls, jobs):
+        problem = jobs[0].solution.problem
+        
+        if all([job.solution.problem is problem for job in jobs]):
+            return _EvaluateBatchJob(jobs)
+        else:
+            return super(_EvaluateJob, cls).create_batch(jobs)
+        
+class _EvaluateBatchJob(BatchJob):
+    """Evaluates a batch of solutions to the same problem.
+    
+    Only the problem and the variables are sent to the worker, and only the
+    objectives, constraints, and constraint violations are sent back, which
+    :code:`unpack` writes into the original solutions.
+    """
+    
+    def __init__(self, jobs):
+        super(_EvaluateBatchJob, self).__init__([])
+        self.problem = jobs[0].solution.problem
+        self.variables = [list(job.solution.variables) for job in jobs]
+        self.results = None
+        self.size = len(jobs)
+        
+    def run(self):
+        start_time = time.time()
+        solutions = []
+        
+        for variables in self.variables:
+            solution = Solution(self.problem)
+            solution.variables[:] = variables
+            solutions.append(solution)
+            
+        if not _supports_batch(self.problem) or not _evaluate_batch(self.problem, solutions):
+            for solution in solutions:
+                solution.evaluate()
+                
+        self.results = [(list(solution.objectives),
+                         list(solution.constraints),
+                         solution.constraint_violation) for solution in solutions]
+            
+        self.variables = None
+        self.elapsed = time.time() - start_time
+        
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        
+        if self.results is not None:
+            # the results are written into the original solutions
+            state["problem"] = None
+        else:
+            key = registered_key(self.problem)
+            
+            if key is not None:
+                state["problem"] = key
+                state["registered"] = True
+            
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        
+        if self.__dict__.pop("registered", False):
+            self.problem = lookup_problem(self.problem)
+        
+    def unpack(self, jobs):
+        for job, (objectives, constraints, constraint_violation) in zip(jobs, self.results):
+            solution = job.solution
+            solution.objectives[:] = objectives
+            solution.constraints[:] = constraints
+            solution.constraint_violation = constraint_violation
+            solution.feasible = constraint_violation == 0.0
+            solution.evaluated = True
+            
+        return jobs
     
 class Algorithm(object):
     
@@ -352,11 +643,13 @@ class Algorithm(object):
                  problem,
                  evaluator=None,
                  log_frequency=None,
+                 cache=None,
                  **kwargs):
         super(Algorithm, self).__init__()
         self.problem = problem
         self.evaluator = evaluator
         self.log_frequency = log_frequency
+        self.cache = cache
         self.nfe = 0
         
         if self.evaluator is None:
@@ -374,28 +667,129 @@ class Algorithm(object):
     def evaluate_all(self, solutions):
         unevaluated = [s for s in solutions if not s.evaluated]
         
+        if self.cache is None:
+            self._evaluate(unevaluated)
+            self.nfe += len(unevaluated)
+        else:
+            hits = self.cache.evaluate_all(unevaluated, self._evaluate)
+            self.nfe += len(unevaluated) - (0 if self.cache.count_hits else hits)
+        
+    def _evaluate(self, unevaluated):
+        if self._evaluate_batch(unevaluated):
+            return
+        
         jobs = [_EvaluateJob(s) for s in unevaluated]
         results = self.evaluator.evaluate_all(jobs)
             
         # if needed, update the original solution with the results
         for i, result in enumerate(results):
-            if unevaluated[i] != result.solution:
-                unevaluated[i].variables[:] = result.solution.variables[:]
-                unevaluated[i].objectives[:] = result.solution.objectives[:]
-                unevaluated[i].constraints[:] = result.solution.constraints[:]
-                unevaluated[i].constraint_violation = result.solution.constraint_violation
-                unevaluated[i].feasible = result.solution.feasible
-                unevaluated[i].evaluated = result.solution.evaluated
+            _copy_evaluation(unevaluated[i], result.solution)
+        
+    def _evaluate_batch(self, solutions):
+        """Evaluates the solutions with a single call to evaluate_batch.
+        
+        Only used with the default serial evaluator, since parallel
+        evaluators distribute the solutions to workers instead (in batched
+        mode, each batch is evaluated with evaluate_batch on the worker).
+        """
+        if len(solutions) == 0:
+            return False
+        
+        if type(self.evaluator) is not MapEvaluator or self.evaluator.map_func is not map:
+            return False
+        
+        problem = solutions[0].problem
+        
+        if not _supports_batch(problem) or not all([s.problem is problem for s in solutions]):
+            return False
+        
+        return _evaluate_batch(problem, solutions)
         
-        self.nfe += len(unevaluated)
+    def evaluate_async(self, solutions):
+        """Evaluates solutions asynchronously, yielding each once evaluated.
+        
+        Solutions are pulled lazily from :code:`solutions` and submitted using
+        the evaluator's :code:`evaluate_async`, so new solutions are submitted
+        as soon as any earlier one completes.  This allows steady-state
+        algorithms to keep all workers busy, generating each offspring from
+        the latest population.  The NFE is incremented as each solution is
+        yielded; solutions still pending when iteration stops are not counted.
+        Solutions that are already evaluated, or found in the cache, are
+        yielded without evaluation.
+        """
+        originals = {}
+        evaluated = []
+        
+        def jobs():
+            for i, solution in enumerate(solutions):
+                if solution.evaluated:
+                    evaluated.append(solution)
+                    continue
+                
+                if self.cache is not None and self.cache.load(solution):
+                    self.nfe += 1 if self.cache.count_hits else 0
+                    evaluated.append(solution)
+                    continue
+                
+                job = _EvaluateJob(solution)
+                job.key = i
+                originals[i] = solution
+                yield job
+        
+        for result in self.evaluator.evaluate_async(jobs()):
+            while len(evaluated) > 0:
+                yield evaluated.pop(0)
+                
+            solution = originals.pop(result.key)
+            _copy_evaluation(solution, result.solution)
+            self.nfe += 1
+            
+            if self.cache is not None:
+                self.cache.store(solution)
+                
+            yield solution
+            
+        while len(evaluated) > 0:
+            yield evaluated.pop(0)
     
-    def run(self, condition, callback=None):
+    def run(self, condition, callback=None, checkpoint=None):
         if isinstance(condition, int):
             condition = MaxEvaluations(condition)
             
         if isinstance(condition, TerminationCondition):
             condition.initialize(self)
             
+        if checkpoint is not None:
+            checkpoint.initialize(self)
+            
+        self._run(condition, callback, checkpoint)
+        
+    @staticmethod
+    def resume(path, callback=None, evaluator=None):
+        """Continues a run from a checkpoint, returning the algorithm.
+        
+        The run continues with the termination condition and checkpoint
+        settings passed to :code:`run`.  Algorithms evaluating solutions
+        asynchronously discard the evaluations that were pending when the
+        checkpoint was written, so their results are not reproducible.
+        
+        Parameters
+        ----------
+        path : str
+            The file written by :code:`Checkpoint`.
+        callback : callable (default None)
+            Function called after each step, as in :code:`run`.
+        evaluator : Evaluator (default None)
+            The evaluator used by the resumed algorithm.  If None, the default
+            evaluator is used.
+        """
+        from .checkpoint import Checkpoint
+        algorithm, condition, checkpoint = Checkpoint.load(path, evaluator)
+        checkpoint.initialize(algorithm)
+        algorithm._run(condition, callback, checkpoint)
+        return algorithm
+            
+    def _run(self, condition, callback, checkpoint):
         last_log = self.nfe
         start_time = time.time()
         
@@ -414,6 +808,12 @@ class Algorithm(object):
             if callback is not None:
                 callback(self)
                 
+            if checkpoint is not None:
+                checkpoint(self, condition)
+                
+        if checkpoint is not None:
+            checkpoint.save(self, condition)
+                
         LOGGER.log(logging.INFO,
                    "%s finished; Total NFE: %d, Elapsed Time: %s",
                    type(self).__name__,
@@ -533,7 +933,375 @@ class Solution(object):
                 setattr(result, k, copy.deepcopy(v, memo))
                 
         return result
+    
+    def copy_for_offspring(self):
+        """Returns a copy of this solution for use as an offspring.
+        
+        Faster than :code:`copy.deepcopy`, this copies only the variables and
+        the evaluation results, which variators keep when the offspring is
+        left unchanged.  Attributes assigned by algorithms, such as
+        :code:`rank` or :code:`crowding_distance`, are not copied.  Variables
+        stored as lists (e.g., binary strings, permutations and subsets) are
+        copied, but not their elements.
+        """
+        result = Solution.__new__(Solution)
+        result.problem = self.problem
+        result.variables = _copy_values(self.variables, _copy_variable)
+        result.objectives = _copy_values(self.objectives)
+        result.constraints = _copy_values(self.constraints)
+        result.constraint_violation = self.constraint_violation
+        result.evaluated = self.evaluated
+        
+        feasible = getattr(self, "feasible", None)
+        
+        if feasible is not None:
+            result.feasible = feasible
+        
+        return result
+    
+def _copy_variable(value):
+    if type(value) is list:
+        return list(value)
+    elif value is None or isinstance(value, (numbers.Number, str)):
+        return value
+    else:
+        return copy.deepcopy(value)
+    
+def _copy_values(array, copy_value=None):
+    """Copies a list, FixedLengthArray or population row, preserving its type.
+    
+    A population row is copied into a FixedLengthArray.
+    """
+    if isinstance(array, FixedLengthArray):
+        data = array._data[:]
+    else:
+        data = list(array[:])
+        
+    if copy_value is not None:
+        data = [copy_value(value) for value in data]
+        
+    if isinstance(array, list):
+        return data
+    
+    result = FixedLengthArray.__new__(FixedLengthArray)
+    result._size = len(data)
+    result._data = data
+    result.convert = getattr(array, "convert", None)
+    return result
+        
+class _ArrayRow(object):
+    """A row of one of the matrices stored by a :class:`Population`.
+    
+    Mimics the interface of :class:`FixedLengthArray`, but reads and writes
+    directly to the underlying matrix.  The matrix is looked up on each access
+    since the population may reallocate its storage when it grows.
+    """
+    
+    def __init__(self, population, name, index):
+        super(_ArrayRow, self).__init__()
+        self._population = population
+        self._name = name
+        self._index = index
+        
+    def _row(self):
+        return getattr(self._population, self._name)[self._index]
+        
+    def __len__(self):
+        return getattr(self._population, self._name).shape[1]
+    
+    def __setitem__(self, index, value):
+        row = self._row()
+        
+        if type(index) == slice and row.dtype == object:
+            indices = range(*index.indices(len(row)))
+            
+            if hasattr(value, "__len__") and len(value) == len(indices):
+                for i, entry in enumerate(indices):
+                    row[entry] = value[i]
+            else:
+                for entry in indices:
+                    row[entry] = value
+        else:
+            row[index] = value
+            
+    def __getitem__(self, index):
+        if type(index) == slice:
+            return self._row()[index].tolist()
+        else:
+            return self._row()[index]
+        
+    def __iter__(self):
+        return iter(self._row().tolist())
+    
+    def __str__(self):
+        return "[" + ", ".join(list(map(str, self._row()))) + "]"
+    
+class SolutionView(Solution):
+    """A solution whose values are stored in a row of a :class:`Population`.
+    
+    Behaves like a regular :class:`Solution`, except the variables,
+    objectives, constraints, constraint violation, feasibility, and evaluated
+    flag are read from and written to the population's matrices.  Copying or
+    pickling a view produces a regular, detached :class:`Solution`.
+    """
+    
+    def __init__(self, population, index):
+        super(Solution, self).__init__()
+        self.problem = population.problem
+        self._population = population
+        self._index = index
+        
+    def _get_variables(self):
+        return _ArrayRow(self._population, "_variables", self._index)
+    
+    def _set_variables(self, value):
+        self._get_variables()[:] = value[:]
+        
+    def _get_objectives(self):
+        return _ArrayRow(self._population, "_objectives", self._index)
+    
+    def _set_objectives(self, value):
+        self._get_objectives()[:] = value[:]
+        
+    def _get_constraints(self):
+        return _ArrayRow(self._population, "_constraints", self._index)
+    
+    def _set_constraints(self, value):
+        self._get_constraints()[:] = value[:]
+        
+    def _get_constraint_violation(self):
+        return self._population._constraint_violation[self._index]
+    
+    def _set_constraint_violation(self, value):
+        self._population._constraint_violation[self._index] = value
+        
+    def _get_feasible(self):
+        return bool(self._population._feasible[self._index])
+    
+    def _set_feasible(self, value):
+        self._population._feasible[self._index] = value
+        
+    def _get_evaluated(self):
+        return bool(self._population._evaluated[self._index])
+    
+    def _set_evaluated(self, value):
+        self._population._evaluated[self._index] = value
+        
+    variables = property(_get_variables, _set_variables)
+    objectives = property(_get_objectives, _set_objectives)
+    constraints = property(_get_constraints, _set_constraints)
+    constraint_violation = property(_get_constraint_violation, _set_constraint_violation)
+    feasible = property(_get_feasible, _set_feasible)
+    evaluated = property(_get_evaluated, _set_evaluated)
+        
+    def detach(self):
+        """Returns a regular :class:`Solution` holding a copy of this row."""
+        result = Solution(self.problem)
+        result.variables[:] = self.variables[:]
+        result.objectives[:] = self.objectives[:]
+        result.constraints[:] = self.constraints[:]
+        result.constraint_violation = float(self.constraint_violation)
+        result.feasible = self.feasible
+        result.evaluated = self.evaluated
+        
+        for k, v in self.__dict__.items():
+            if k not in ("problem", "_population", "_index"):
+                setattr(result, k, v)
+                
+        return result
+    
+    def __deepcopy__(self, memo):
+        """Overridden to return a detached copy of this row."""
+        result = copy.deepcopy(self.detach(), memo)
+        memo[id(self)] = result
+        return result
+    
+    def __reduce__(self):
+        """Overridden to pickle a detached copy instead of the population."""
+        return (Solution.__new__, (Solution,), self.detach().__dict__)
+    
+class Population(object):
+    """A collection of solutions stored in contiguous NumPy matrices.
+    
+    The variables, objectives, constraints, constraint violation, feasibility
+    and evaluated flags of every member are stored as rows in matrices, which
+    are exposed as the attributes :code:`variables`, :code:`objectives`,
+    :code:`constraints`, :code:`constraint_violation`, :code:`feasible` and
+    :code:`evaluated`.  The members themselves are :class:`SolutionView`
+    objects, so a population can be used wherever a list of solutions is
+    expected while functions like :code:`nondominated_sort`,
+    :code:`crowding_distance` and :code:`normalize` operate on whole columns.
+    
+    Solutions added to the population are copied into the matrices; the
+    returned view should be used afterwards.  Variables are stored as floats
+    if every decision variable is :class:`Real`; otherwise an object matrix
+    is used.  Unassigned objectives and constraints are NaN.
+    """
+    
+    def __init__(self, problem, solutions=None, capacity=16):
+        """Creates a new population for the given problem.
+        
+        Parameters
+        ----------
+        problem: Problem
+            The problem.
+        solutions: iterable of Solution (default None)
+            The initial members, which are copied into the population.
+        capacity: int (default 16)
+            The initial number of rows to allocate.  The matrices grow as
+            needed.
+        """
+        super(Population, self).__init__()
+        
+        if np is None:
+            raise PlatypusError("Population requires NumPy")
+        
+        from .types import Real
+        
+        self.problem = problem
+        self._size = 0
+        self._members = []
+        
+        if all([isinstance(t, Real) for t in problem.types]):
+            variable_dtype, self._variable_fill = float, np.nan
+        else:
+            variable_dtype, self._variable_fill = object, None
+        
+        capacity = max(capacity, 1)
+        self._variables = np.full((capacity, problem.nvars), self._variable_fill, dtype=variable_dtype)
+        self._objectives = np.full((capacity, problem.nobjs), np.nan)
+        self._constraints = np.full((capacity, problem.nconstrs), np.nan)
+        self._constraint_violation = np.zeros(capacity)
+        self._feasible = np.ones(capacity, dtype=bool)
+        self._evaluated = np.zeros(capacity, dtype=bool)
+        
+        if solutions is not None:
+            self.extend(solutions)
+        
+    def _reserve(self, capacity):
+        if capacity <= len(self._constraint_violation):
+            return
+        
+        capacity = max(capacity, 2*len(self._constraint_violation))
+        
+        for name, fill in [("_variables", self._variable_fill),
+                           ("_objectives", np.nan),
+                           ("_constraints", np.nan),
+                           ("_constraint_violation", 0.0),
+                           ("_feasible", True),
+                           ("_evaluated", False)]:
+            old = getattr(self, name)
+            new = np.full((capacity,) + old.shape[1:], fill, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+            
+    def add(self, solution=None):
+        """Adds a solution to the population.
+        
+        Parameters
+        ----------
+        solution: Solution (default None)
+            The solution whose values are copied into the population.  If
+            None, an empty row is added.
+            
+        Returns
+        -------
+        The :class:`SolutionView` for the new row.
+        """
+        self._reserve(self._size + 1)
+        view = SolutionView(self, self._size)
+        self._size += 1
+        self._members.append(view)
+        
+        if solution is not None:
+            view.variables = solution.variables
+            view.objectives = solution.objectives
+            view.constraints = solution.constraints
+            view.constraint_violation = solution.constraint_violation
+            view.feasible = getattr(solution, "feasible", solution.constraint_violation == 0.0)
+            view.evaluated = solution.evaluated
+            
+            for k, v in solution.__dict__.items():
+                if k not in ("problem", "variables", "objectives", "constraints",
+                             "constraint_violation", "feasible", "evaluated",
+                             "_population", "_index"):
+                    setattr(view, k, v)
+                
+        return view
         
+    def append(self, solution):
+        self.add(solution)
+        
+    def extend(self, solutions):
+        solutions = list(solutions)
+        self._reserve(self._size + len(solutions))
+        
+        for solution in solutions:
+            self.add(solution)
+    
+    @property
+    def variables(self):
+        return self._variables[:self._size]
+    
+    @property
+    def objectives(self):
+        return self._objectives[:self._size]
+    
+    @property
+    def constraints(self):
+        return self._constraints[:self._size]
+    
+    @property
+    def constraint_violation(self):
+        return self._constraint_violation[:self._size]
+    
+    @property
+    def feasible(self):
+        return self._feasible[:self._size]
+    
+    @property
+    def evaluated(self):
+        return self._evaluated[:self._size]
+    
+    def __len__(self):
+        return self._size
+    
+    def __getitem__(self, key):
+        return self._members[key]
+            
+    def __iadd__(self, other):
+        if hasattr(other, "__iter__"):
+            self.extend(other)
+        else:
+            self.add(other)
+            
+        return self
+    
+    def __iter__(self):
+        return iter(self._members)
+    
+# Minimum number of comparisons before the dominance relations switch to
+# their vectorized NumPy implementations.
+_VECTORIZE_THRESHOLD = 16
+
+# Maximum number of elements compared at once when building a dominance matrix.
+_MATRIX_BLOCK_SIZE = 2**22
+
+def _objective_matrix(solutions, nobjs):
+    if isinstance(solutions, Population):
+        return solutions.objectives
+    else:
+        return np.array([s.objectives[:] for s in solutions], dtype=float).reshape(-1, nobjs)
+    
+def _direction_signs(problem):
+    return np.array([-1.0 if d == Problem.MAXIMIZE else 1.0 for d in problem.directions])
+
+def _constraint_flags(solutions1, solutions2, flags):
+    """Overrides dominance flags where the constraint violations differ."""
+    violations1 = np.array([s.constraint_violation for s in solutions1], dtype=float)[:, np.newaxis]
+    violations2 = np.array([s.constraint_violation for s in solutions2], dtype=float)
+    return np.where(violations1 < violations2, -1, np.where(violations1 > violations2, 1, flags))
+
 class Dominance(object):
     """Compares two solutions for dominance."""
     
@@ -561,6 +1329,35 @@ class Dominance(object):
         """
         raise NotImplementedError("method not implemented")
     
+    def compare_many(self, solution, others):
+        """Compare one solution against many.
+        
+        Returns a list containing :code:`compare(solution, other)` for each
+        solution in :code:`others`.  Subclasses can override this method with
+        a vectorized implementation.
+        
+        Parameters
+        ----------
+        solution : Solution
+            The solution being compared.
+        others : iterable of Solution
+            The solutions it is compared against.
+        """
+        return [self.compare(solution, other) for other in others]
+    
+    def all_pairs(self, solutions):
+        """Compare all pairs of solutions.
+        
+        Returns a matrix, stored as a list of lists, where entry :code:`[i][j]`
+        is :code:`compare(solutions[i], solutions[j])`.
+        
+        Parameters
+        ----------
+        solutions : iterable of Solution
+            The solutions being compared.
+        """
+        return [self.compare_many(solution, solutions) for solution in solutions]
+    
 class ParetoDominance(Dominance):
     """Pareto dominance with constraints.
     
@@ -616,8 +1413,40 @@ class ParetoDominance(Dominance):
         else:
             return 1
         
-class EpsilonDominance(Dominance):
-    """Epsilon dominance.
+    def compare_many(self, solution, others):
+        if np is None or len(others) < _VECTORIZE_THRESHOLD:
+            return super(ParetoDominance, self).compare_many(solution, others)
+        
+        return self._flags([solution], others)[0].tolist()
+    
+    def all_pairs(self, solutions):
+        if np is None or len(solutions) < _VECTORIZE_THRESHOLD:
+            return super(ParetoDominance, self).all_pairs(solutions)
+        
+        return self._flags(solutions, solutions).tolist()
+    
+    def _flags(self, solutions1, solutions2):
+        problem = solutions1[0].problem
+        signs = _direction_signs(problem)
+        objectives1 = _objective_matrix(solutions1, problem.nobjs) * signs
+        objectives2 = _objective_matrix(solutions2, problem.nobjs) * signs
+        flags = np.empty((len(objectives1), len(objectives2)), dtype=int)
+        block = max(1, _MATRIX_BLOCK_SIZE // max(1, objectives2.size))
+        
+        for start in range(0, len(objectives1), block):
+            a = objectives1[start:start+block, np.newaxis, :]
+            dominate1 = np.any(a < objectives2, axis=2)
+            dominate2 = np.any(a > objectives2, axis=2)
+            flags[start:start+block] = np.where(dominate1 & ~dominate2, -1,
+                                                np.where(dominate2 & ~dominate1, 1, 0))
+            
+        if problem.nconstrs > 0:
+            flags = _constraint_flags(solutions1, solutions2, flags)
+            
+        return flags
+        
+class EpsilonDominance(Dominance):
+    """Epsilon dominance.
     
     Similar to Pareto dominance except if the two solutions are contained
     within the same epsilon-box, the solution closer to the optimal corner
@@ -747,6 +1576,51 @@ class EpsilonDominance(Dominance):
         else:
             return 1
         
+    def compare_many(self, solution, others):
+        if np is None or len(others) < _VECTORIZE_THRESHOLD:
+            return super(EpsilonDominance, self).compare_many(solution, others)
+        
+        return self._flags([solution], others)[0].tolist()
+    
+    def all_pairs(self, solutions):
+        if np is None or len(solutions) < _VECTORIZE_THRESHOLD:
+            return super(EpsilonDominance, self).all_pairs(solutions)
+        
+        return self._flags(solutions, solutions).tolist()
+    
+    def _boxes(self, solutions, problem):
+        epsilons = np.array([float(self.epsilons[i % len(self.epsilons)]) for i in range(problem.nobjs)])
+        objectives = _objective_matrix(solutions, problem.nobjs) * _direction_signs(problem)
+        boxes = np.floor(objectives / epsilons)
+        distances = np.zeros(len(objectives))
+        
+        for i in range(problem.nobjs):
+            distances += (objectives[:, i] - boxes[:, i]*epsilons[i])**2
+            
+        return boxes, distances
+    
+    def _flags(self, solutions1, solutions2):
+        problem = solutions1[0].problem
+        boxes1, distances1 = self._boxes(solutions1, problem)
+        boxes2, distances2 = self._boxes(solutions2, problem)
+        flags = np.empty((len(boxes1), len(boxes2)), dtype=int)
+        block = max(1, _MATRIX_BLOCK_SIZE // max(1, boxes2.size))
+        
+        for start in range(0, len(boxes1), block):
+            a = boxes1[start:start+block, np.newaxis, :]
+            dominate1 = np.any(a < boxes2, axis=2)
+            dominate2 = np.any(a > boxes2, axis=2)
+            closer = distances1[start:start+block, np.newaxis] < distances2
+            flags[start:start+block] = np.where(dominate1 & ~dominate2, -1,
+                                                np.where(dominate2 & ~dominate1, 1,
+                                                         np.where(dominate1 | dominate2, 0,
+                                                                  np.where(closer, -1, 1))))
+            
+        if problem.nconstrs > 0:
+            flags = _constraint_flags(solutions1, solutions2, flags)
+            
+        return flags
+        
 class AttributeDominance(Dominance):
     
     def __init__(self, getter, larger_preferred=True):
@@ -773,16 +1647,497 @@ class AttributeDominance(Dominance):
         else:
             return 0
 
+class _SortedFront(object):
+    """Index of mutually non-dominated 2-objective keys.
+    
+    The keys are kept in lexicographic order, so the second objective is
+    non-increasing.  A key is dominated exactly when its predecessor in this
+    order is no worse in the second objective, and the keys a new key
+    dominates form a contiguous run after it.
+    """
+    
+    def __init__(self):
+        super(_SortedFront, self).__init__()
+        self.keys = []
+        self.solutions = []
+        
+    def __len__(self):
+        return len(self.keys)
+        
+    def dominated(self, key):
+        index = bisect.bisect_left(self.keys, key) - 1
+        return index >= 0 and self.keys[index][1] <= key[1]
+    
+    def remove_dominated(self, key):
+        start = bisect.bisect_right(self.keys, key)
+        end = start
+        
+        while end < len(self.keys) and self.keys[end][1] >= key[1]:
+            end += 1
+            
+        removed = self.solutions[start:end]
+        del self.keys[start:end]
+        del self.solutions[start:end]
+        return removed
+    
+    def insert(self, key, solution):
+        index = bisect.bisect_right(self.keys, key)
+        self.keys.insert(index, key)
+        self.solutions.insert(index, solution)
+        
+    def remove(self, key, solution):
+        index = bisect.bisect_left(self.keys, key)
+        
+        while index < len(self.keys) and self.keys[index] == key:
+            if self.solutions[index] is solution:
+                del self.keys[index]
+                del self.solutions[index]
+                return True
+            
+            index += 1
+            
+        return False
+    
+class _NDTreeNode(object):
+    
+    def __init__(self, keys=None, solutions=None):
+        super(_NDTreeNode, self).__init__()
+        self.keys = keys if keys is not None else []
+        self.solutions = solutions if solutions is not None else []
+        self.children = None
+        self.count = len(self.keys)
+        self.ideal = None
+        self.nadir = None
+        
+        for key in self.keys:
+            self.extend(key)
+        
+    def extend(self, key):
+        if self.ideal is None:
+            self.ideal = list(key)
+            self.nadir = list(key)
+        else:
+            self.ideal = [min(x, y) for x, y in zip(self.ideal, key)]
+            self.nadir = [max(x, y) for x, y in zip(self.nadir, key)]
+            
+    def enlargement(self, key):
+        if self.ideal is None:
+            return (0.0, 0.0)
+        
+        grow = sum([max(0.0, i - k) + max(0.0, k - n) for i, n, k in zip(self.ideal, self.nadir, key)])
+        distance = sum([(k - (i + n) / 2.0)**2 for i, n, k in zip(self.ideal, self.nadir, key)])
+        return (grow, distance)
+    
+    def is_empty(self):
+        return self.count == 0
+    
+    def adopt(self, other):
+        self.keys = other.keys
+        self.solutions = other.solutions
+        self.children = other.children
+        self.count = other.count
+        self.ideal = other.ideal
+        self.nadir = other.nadir
+        
+    def items(self):
+        if self.children is None:
+            return list(zip(self.keys, self.solutions))
+        else:
+            return [item for child in self.children for item in child.items()]
+    
+class _NDTree(object):
+    """Index of mutually non-dominated keys with three or more objectives.
+    
+    A simplified ND-tree: every node stores the ideal and nadir points
+    bounding its keys.  Dominance queries skip any node whose ideal point is
+    worse than the candidate, and removals skip any node whose nadir point is
+    better than the candidate.  Leaves are split at the median of their widest
+    objective once they exceed :code:`leaf_size` keys, and any subtree where
+    one child holds more than :code:`balance` of the keys is rebuilt, which
+    keeps the depth logarithmic regardless of the insertion order.
+    """
+    
+    def __init__(self, leaf_size=16, balance=0.75):
+        super(_NDTree, self).__init__()
+        self.root = _NDTreeNode()
+        self.leaf_size = leaf_size
+        self.balance = balance
+        
+    def __len__(self):
+        return self.root.count
+    
+    def dominated(self, key):
+        stack = [self.root]
+        
+        while len(stack) > 0:
+            node = stack.pop()
+            
+            if node.ideal is None or any([i > k for i, k in zip(node.ideal, key)]):
+                continue
+            
+            if node.children is None:
+                for other in node.keys:
+                    if other != key and all([o <= k for o, k in zip(other, key)]):
+                        return True
+            else:
+                stack.extend(node.children)
+                
+        return False
+    
+    def remove_dominated(self, key):
+        removed = []
+        self._remove_dominated(self.root, key, removed)
+        return removed
+    
+    def _remove_dominated(self, node, key, removed):
+        if node.nadir is None or any([k > n for k, n in zip(key, node.nadir)]):
+            return
+        
+        if node.children is None:
+            keys = []
+            solutions = []
+            
+            for other, solution in zip(node.keys, node.solutions):
+                if other != key and all([k <= o for k, o in zip(key, other)]):
+                    removed.append(solution)
+                else:
+                    keys.append(other)
+                    solutions.append(solution)
+                    
+            if len(keys) < len(node.keys):
+                node.adopt(_NDTreeNode(keys, solutions))
+        else:
+            for child in node.children:
+                self._remove_dominated(child, key, removed)
+                
+            self._collapse(node)
+            
+    def _collapse(self, node):
+        node.children = [child for child in node.children if not child.is_empty()]
+        node.count = sum([child.count for child in node.children])
+        
+        if len(node.children) == 0:
+            node.adopt(_NDTreeNode())
+        elif len(node.children) == 1:
+            node.adopt(node.children[0])
+    
+    def insert(self, key, solution):
+        node = self.root
+        path = []
+        
+        while node.children is not None:
+            path.append(node)
+            node.extend(key)
+            node.count += 1
+            node = min(node.children, key=lambda child: child.enlargement(key))
+            
+        node.extend(key)
+        node.keys.append(key)
+        node.solutions.append(solution)
+        node.count += 1
+        
+        if len(node.keys) > self.leaf_size:
+            node.adopt(self._build(node.keys, node.solutions))
+            
+        for parent in path:
+            if parent.count > 2*self.leaf_size and max([child.count for child in parent.children]) > self.balance*parent.count:
+                items = parent.items()
+                parent.adopt(self._build([k for k, _ in items], [s for _, s in items]))
+                break
+            
+    def _build(self, keys, solutions):
+        node = _NDTreeNode(keys, solutions)
+        
+        if len(keys) > self.leaf_size:
+            spread = [n - i for i, n in zip(node.ideal, node.nadir)]
+            dimension = spread.index(max(spread))
+            order = sorted(range(len(keys)), key=lambda j: keys[j][dimension])
+            half = len(order) // 2
+            
+            node.children = [self._build([keys[j] for j in order[:half]], [solutions[j] for j in order[:half]]),
+                             self._build([keys[j] for j in order[half:]], [solutions[j] for j in order[half:]])]
+            node.keys = None
+            node.solutions = None
+            
+        return node
+        
+    def remove(self, key, solution):
+        return self._remove(self.root, key, solution)
+        
+    def _remove(self, node, key, solution):
+        if node.ideal is None or any([k < i or k > n for i, n, k in zip(node.ideal, node.nadir, key)]):
+            return False
+        
+        if node.children is None:
+            for i, other in enumerate(node.solutions):
+                if other is solution:
+                    del node.keys[i]
+                    del node.solutions[i]
+                    node.count -= 1
+                    return True
+                
+            return False
+        
+        for child in node.children:
+            if self._remove(child, key, solution):
+                self._collapse(node)
+                return True
+            
+        return False
+    
+class _ParetoIndex(object):
+    """Spatial index answering Pareto dominance queries for an :class:`Archive`.
+    
+    Reproduces :class:`ParetoDominance`.  All members of an archive share the
+    same constraint violation, since a smaller violation dominates a larger
+    one, so only that shared value needs to be compared before querying the
+    index on the objectives.
+    """
+    
+    def __init__(self, problem):
+        super(_ParetoIndex, self).__init__()
+        self.problem = problem
+        self.maximize = [d == Problem.MAXIMIZE for d in problem.directions]
+        self.violation = None
+        
+        if problem.nobjs == 2:
+            self.index = _SortedFront()
+        else:
+            self.index = _NDTree()
+        
+    def key(self, solution):
+        return tuple([-o if flip else o for o, flip in zip(solution.objectives[:], self.maximize)])
+        
+    def add(self, solution):
+        """Adds the solution to the index.
+        
+        Returns a tuple :code:`(added, removed)`, where :code:`removed` lists
+        the members dominated by the new solution.
+        """
+        removed = []
+        
+        if self.problem.nconstrs > 0 and len(self.index) > 0 and solution.constraint_violation != self.violation:
+            if solution.constraint_violation > self.violation:
+                return False, []
+            
+            removed = self.clear()
+        
+        key = self.key(solution)
+        
+        if self.index.dominated(key):
+            return False, []
+        
+        removed.extend(self.index.remove_dominated(key))
+        self.index.insert(key, solution)
+        self.violation = solution.constraint_violation
+        return True, removed
+    
+    def remove(self, solution):
+        return self.index.remove(self.key(solution), solution)
+    
+    def clear(self):
+        if isinstance(self.index, _SortedFront):
+            removed = self.index.solutions
+            self.index = _SortedFront()
+        else:
+            removed = [solution for _, solution in self.index.root.items()]
+            self.index = _NDTree(self.index.leaf_size, self.index.balance)
+            
+        return removed
+    
+    @staticmethod
+    def create(dominance, solutions, problem):
+        """Creates the index for the members of an archive.
+        
+        Returns None if the archive can not be indexed, either because it does
+        not use Pareto dominance or its members have different constraint
+        violations.
+        """
+        if type(dominance) is not ParetoDominance:
+            return None
+        
+        if problem.nconstrs > 0 and len(set([s.constraint_violation for s in solutions])) > 1:
+            return None
+        
+        result = _ParetoIndex(problem)
+        
+        for solution in solutions:
+            result.index.insert(result.key(solution), solution)
+            result.violation = solution.constraint_violation
+            
+        return result
+    
+class _EpsilonBoxIndex(object):
+    """Hash index of the epsilon boxes occupied by an :class:`EpsilonBoxArchive`.
+    
+    Reproduces :class:`EpsilonDominance`.  Each member occupies a distinct box,
+    so a dict from box index to occupant answers same-box checks directly.
+    The occupied boxes are also stored in a spatial index, since dominance
+    between distinct boxes is Pareto dominance on their indices.
+    """
+    
+    def __init__(self, dominance, problem):
+        super(_EpsilonBoxIndex, self).__init__()
+        self.problem = problem
+        self.maximize = [d == Problem.MAXIMIZE for d in problem.directions]
+        self.epsilons = [float(dominance.epsilons[i % len(dominance.epsilons)]) for i in range(problem.nobjs)]
+        self.violation = None
+        self.occupants = {}
+        self.boxes = {}
+        
+        if problem.nobjs == 2:
+            self.index = _SortedFront()
+        else:
+            self.index = _NDTree()
+            
+    def box(self, solution):
+        return tuple([math.floor((-o if flip else o) / epsilon) for o, flip, epsilon in zip(solution.objectives[:], self.maximize, self.epsilons)])
+    
+    def distance(self, solution, box):
+        result = 0.0
+        
+        for o, flip, epsilon, i in zip(solution.objectives[:], self.maximize, self.epsilons, box):
+            result += math.pow((-o if flip else o) - i*epsilon, 2.0)
+            
+        return result
+    
+    def add(self, solution):
+        """Adds the solution to the index.
+        
+        Returns a tuple :code:`(added, removed)`, where :code:`removed` lists
+        the members dominated by the new solution.
+        """
+        removed = []
+        
+        if self.problem.nconstrs > 0 and len(self.occupants) > 0 and solution.constraint_violation != self.violation:
+            if solution.constraint_violation > self.violation:
+                return False, []
+            
+            removed = list(self.occupants.values())
+            
+            for occupant in removed:
+                self.remove(occupant)
+        
+        box = self.box(solution)
+        occupant = self.occupants.get(box)
+        
+        if occupant is not None:
+            if self.distance(solution, box) < self.distance(occupant, box):
+                self.remove(occupant)
+                removed.append(occupant)
+            else:
+                return False, []
+        elif self.index.dominated(box):
+            return False, []
+        else:
+            for occupant in self.index.remove_dominated(box):
+                del self.occupants[self.boxes.pop(occupant)]
+                removed.append(occupant)
+                
+        self.index.insert(box, solution)
+        self.occupants[box] = solution
+        self.boxes[solution] = box
+        self.violation = solution.constraint_violation
+        return True, removed
+    
+    def remove(self, solution):
+        box = self.boxes.pop(solution, None)
+        
+        if box is None:
+            return False
+        
+        del self.occupants[box]
+        return self.index.remove(box, solution)
+    
+    @staticmethod
+    def create(dominance, solutions, problem):
+        """Creates the index for the members of an archive.
+        
+        Returns None if the archive can not be indexed, either because it does
+        not use epsilon dominance, its members have different constraint
+        violations, or multiple members occupy the same box.
+        """
+        if type(dominance) is not EpsilonDominance:
+            return None
+        
+        if problem.nconstrs > 0 and len(set([s.constraint_violation for s in solutions])) > 1:
+            return None
+        
+        result = _EpsilonBoxIndex(dominance, problem)
+        
+        for solution in solutions:
+            box = result.box(solution)
+            
+            if box in result.occupants:
+                return None
+            
+            result.index.insert(box, solution)
+            result.occupants[box] = solution
+            result.boxes[solution] = box
+            result.violation = solution.constraint_violation
+            
+        return result
+
 class Archive(object):
-    """An archive only containing non-dominated solutions."""
+    """An archive only containing non-dominated solutions.
+    
+    When using :class:`ParetoDominance` or :class:`EpsilonDominance`, the
+    members are also stored in a spatial index (a sorted list for two
+    objectives, an ND-tree otherwise) so that adding a solution does not
+    require comparing it against every member.  The index is rebuilt whenever
+    :code:`_contents` is reassigned.
+    """
     
     def __init__(self, dominance = ParetoDominance()):
         super(Archive, self).__init__()
         self._dominance = dominance
         self._contents = []
         
+    @property
+    def _contents(self):
+        return self._members
+    
+    @_contents.setter
+    def _contents(self, value):
+        self._members = value
+        self._index = None
+        self._indexed = False
+        
+    def _create_index(self, problem):
+        if type(self._dominance) is EpsilonDominance:
+            return _EpsilonBoxIndex.create(self._dominance, self._members, problem)
+        else:
+            return _ParetoIndex.create(self._dominance, self._members, problem)
+        
+    def _get_index(self, problem):
+        if not self._indexed:
+            self._index = self._create_index(problem)
+            self._indexed = True
+            
+        return self._index
+    
+    def _add_indexed(self, index, solution):
+        added, removed = index.add(solution)
+        
+        if not added:
+            return False
+        
+        if len(removed) == 1:
+            self._members.remove(removed[0])
+        elif len(removed) > 1:
+            removed = set([id(s) for s in removed])
+            self._members = [s for s in self._members if id(s) not in removed]
+            
+        self._members.append(solution)
+        return True
+        
     def add(self, solution):
-        flags = [self._dominance.compare(solution, s) for s in self._contents]
+        index = self._get_index(solution.problem)
+        
+        if index is not None:
+            return self._add_indexed(index, solution)
+        
+        flags = self._dominance.compare_many(solution, self._contents)
         dominates = [x > 0 for x in flags]
         nondominated = [x == 0 for x in flags]
         
@@ -801,10 +2156,14 @@ class Archive(object):
             
     def remove(self, solution):
         try:
-            self._contents.remove(solution)
-            return True
+            self._members.remove(solution)
         except ValueError:
             return False
+        
+        if self._index is not None:
+            self._index.remove(solution)
+            
+        return True
     
     def __len__(self):
         return len(self._contents)
@@ -824,47 +2183,72 @@ class Archive(object):
     def __iter__(self):
         return iter(self._contents)
     
+class _GridDensity(dict):
+    """Sparse map from grid cell to the number of archive members in the cell."""
+    
+    def __missing__(self, key):
+        return 0
+
 class AdaptiveGridArchive(Archive):
+    """An archive that bounds its size using an adaptive grid.
+    
+    Only occupied grid cells are stored.  Each member's cell is cached and
+    cells are grouped into buckets by density, so the densest cell is found
+    without recomputing the cell of every member.  Cached cells are only
+    recomputed when :code:`adapt_grid` changes the bounds of the grid.
+    """
     
     def __init__(self, capacity, nobjs, divisions, dominance = ParetoDominance()):
         super(AdaptiveGridArchive, self).__init__(dominance)
         self.capacity = capacity
         self.nobjs = nobjs
         self.divisions = divisions
+        self.minimum = None
+        self.maximum = None
         
         self.adapt_grid()
         
     def add(self, solution):
         # check if the candidate solution dominates or is dominated
-        flags = [self._dominance.compare(solution, s) for s in self._contents]
-        dominates = [x > 0 for x in flags]
-        nondominated = [x == 0 for x in flags]
+        index = self._get_index(solution.problem)
         
-        if any(dominates):
-            return False
-
-        self._contents = list(itertools.compress(self._contents, nondominated))
+        if index is not None:
+            added, removed = index.add(solution)
+            
+            if not added:
+                return False
+        else:
+            flags = self._dominance.compare_many(solution, self._members)
+            
+            if any([x > 0 for x in flags]):
+                return False
+            
+            removed = [s for s, x in zip(self._members, flags) if x < 0]
+            
+        for s in removed:
+            self._members.remove(s)
+            self._remove_cell(s)
 
         # archive is empty, add the candidate
         if len(self) == 0:
-            self._contents.append(solution)
+            self._members.append(solution)
             self.adapt_grid()
             return True
         
         # temporarily add the candidate solution
-        self._contents.append(solution)
-        index = self.find_index(solution)
+        self._members.append(solution)
+        cell = self._compute_index(solution)
         
-        if index < 0:
+        if cell < 0:
             self.adapt_grid()
-            index = self.find_index(solution)
+            cell = self.find_index(solution)
         else:
-            self.density[index] += 1
+            self._insert_cell(solution, cell)
             
         if len(self) <= self.capacity:
             # keep the candidate if size is less than capacity
             return True
-        elif self.density[index] == self.density[self.find_densest()]:
+        elif self.density[cell] == self._max_density:
             # reject candidate if in most dense cell
             self.remove(solution)
             return False
@@ -877,29 +2261,78 @@ class AdaptiveGridArchive(Archive):
         removed = super(AdaptiveGridArchive, self).remove(solution)
         
         if removed:
-            index = self.find_index(solution)
-            
-            if self.density[index] > 1:
-                self.density[index] -= 1
-            else:
-                self.adapt_grid()
+            self._remove_cell(solution)
                 
         return removed
+    
+    def _insert_cell(self, solution, cell):
+        count = self.density[cell]
+        
+        if count > 0:
+            self._buckets[count].discard(cell)
+            self._cell_members[cell].append(solution)
+        else:
+            self._cell_members[cell] = [solution]
+            
+        self.density[cell] = count + 1
+        self._buckets.setdefault(count + 1, set()).add(cell)
+        self._max_density = max(self._max_density, count + 1)
+        self._cells[solution] = cell
+        self._order[solution] = self._counter
+        self._counter += 1
+        
+    def _remove_cell(self, solution):
+        cell = self._cells.pop(solution)
+        del self._order[solution]
+        count = self.density[cell]
+        self._buckets[count].discard(cell)
+        
+        if count == self._max_density and len(self._buckets[count]) == 0:
+            self._max_density -= 1
+        
+        if count > 1:
+            self.density[cell] = count - 1
+            self._buckets.setdefault(count - 1, set()).add(cell)
+            self._cell_members[cell].remove(solution)
+        else:
+            del self.density[cell]
+            del self._cell_members[cell]
+            self.adapt_grid()
         
     def adapt_grid(self):
-        self.minimum = [POSITIVE_INFINITY]*self.nobjs
-        self.maximum = [-POSITIVE_INFINITY]*self.nobjs
-        self.density = [0.0]*(self.divisions**self.nobjs)
+        minimum = [POSITIVE_INFINITY]*self.nobjs
+        maximum = [-POSITIVE_INFINITY]*self.nobjs
         
         for solution in self:
             for i in range(self.nobjs):
-                self.minimum[i] = min(self.minimum[i], solution.objectives[i])
-                self.maximum[i] = max(self.maximum[i], solution.objectives[i])
+                minimum[i] = min(minimum[i], solution.objectives[i])
+                maximum[i] = max(maximum[i], solution.objectives[i])
+                
+        if minimum == self.minimum and maximum == self.maximum and len(self._cells) == len(self):
+            return
+        
+        self.minimum = minimum
+        self.maximum = maximum
+        self.density = _GridDensity()
+        self._cells = {}
+        self._cell_members = {}
+        self._buckets = {}
+        self._max_density = 0
+        self._order = {}
+        self._counter = 0
                 
         for solution in self:
-            self.density[self.find_index(solution)] += 1
+            self._insert_cell(solution, self._compute_index(solution))
             
     def find_index(self, solution):
+        cell = self._cells.get(solution)
+        
+        if cell is None:
+            cell = self._compute_index(solution)
+            
+        return cell
+            
+    def _compute_index(self, solution):
         index = 0
         
         for i in range(self.nobjs):
@@ -923,31 +2356,20 @@ class AdaptiveGridArchive(Archive):
         return index
     
     def find_densest(self):
-        index = -1
-        value = -1
+        solution = self.pick_from_densest()
         
-        for i in range(len(self)):
-            temp_index = self.find_index(self[i])
-            temp_value = self.density[temp_index]
-            
-            if temp_value > value:
-                value = temp_value
-                index = temp_index
-                
-        return index
+        if solution is None:
+            return -1
+        else:
+            return self._cells[solution]
     
     def pick_from_densest(self):
-        solution = None
-        value = -1
+        """Returns the first member, in archive order, of a densest cell."""
+        if self._max_density == 0:
+            return None
         
-        for i in range(len(self)):
-            temp_value = self.density[self.find_index(self[i])]
-            
-            if temp_value > value:
-                solution = self[i]
-                value = temp_value
-                
-        return solution
+        members = [self._cell_members[cell][0] for cell in self._buckets[self._max_density]]
+        return min(members, key=self._order.__getitem__)
     
 class FitnessArchive(Archive):
     
@@ -965,13 +2387,32 @@ class FitnessArchive(Archive):
                                           getter=self.getter)
         
 class EpsilonBoxArchive(Archive):
+    """An archive storing at most one solution per epsilon box.
+    
+    Members are indexed by their epsilon box, so checking whether a candidate
+    shares a box with a member is a dict lookup, and dominance checks only
+    visit boxes that can dominate the candidate.
+    """
     
     def __init__(self, epsilons):
         super(EpsilonBoxArchive, self).__init__(EpsilonDominance(epsilons))
         self.improvements = 0
 
     def add(self, solution):
-        flags = [self._dominance.compare(solution, s) for s in self._contents]
+        index = self._get_index(solution.problem)
+        
+        if index is not None:
+            improvement = len(self._members) > 0
+            
+            if not self._add_indexed(index, solution):
+                return False
+            
+            if improvement:
+                self.improvements += 1
+                
+            return True
+        
+        flags = self._dominance.compare_many(solution, self._contents)
         dominates = [x > 0 for x in flags]
         nondominated = [x == 0 for x in flags]
         dominated = [x < 0 for x in flags]
@@ -1035,6 +2476,178 @@ def nondominated_cmp(x, y):
         else:
             return 0
     
+# Number of solutions at which nondominated_sort switches from pairwise
+# archive insertion to the dominance matrix for four or more objectives.
+_MATRIX_SORT_THRESHOLD = 64
+
+def _sweep_ranks_2d(points, order):
+    """Ranks distinct 2-objective points sorted lexicographically.
+    
+    Each front is summarized by its smallest second objective.  Since earlier
+    points are never worse in the first objective, a front dominates a point
+    exactly when this value is no larger than the point's second objective.
+    """
+    ranks = [0]*len(points)
+    fronts = []
+    
+    for i in order:
+        value = points[i][1]
+        rank = bisect.bisect_right(fronts, value)
+        ranks[i] = rank
+        
+        if rank == len(fronts):
+            fronts.append(value)
+        else:
+            fronts[rank] = value
+            
+    return ranks
+
+def _sweep_ranks_3d(points, order):
+    """Ranks distinct 3-objective points sorted lexicographically.
+    
+    Each front keeps the staircase of its members projected onto the second
+    and third objectives (sorted by the second objective, so the third is
+    strictly decreasing).  A front dominates a point if any staircase entry
+    is no worse in both projected objectives.
+    """
+    ranks = [0]*len(points)
+    fronts = []
+    
+    def dominates(front, p2, p3):
+        index = bisect.bisect_right(front[0], p2)
+        return index > 0 and front[1][index-1] <= p3
+    
+    for i in order:
+        _, p2, p3 = points[i]
+        lo = 0
+        hi = len(fronts)
+        
+        while lo < hi:
+            mid = (lo + hi) // 2
+            
+            if dominates(fronts[mid], p2, p3):
+                lo = mid + 1
+            else:
+                hi = mid
+                
+        ranks[i] = lo
+        
+        if lo == len(fronts):
+            fronts.append(([p2], [p3]))
+        else:
+            values2, values3 = fronts[lo]
+            start = bisect.bisect_left(values2, p2)
+            end = start
+            
+            while end < len(values2) and values3[end] >= p3:
+                end += 1
+                
+            values2[start:end] = [p2]
+            values3[start:end] = [p3]
+            
+    return ranks
+
+def _matrix_ranks(points):
+    """Ranks distinct points by peeling fronts from a dominance matrix."""
+    points = np.asarray(points, dtype=float)
+    n, m = points.shape
+    dominates = np.empty((n, n), dtype=bool)
+    block = max(1, _MATRIX_BLOCK_SIZE // max(1, n*m))
+    
+    for start in range(0, n, block):
+        a = points[start:start+block, np.newaxis, :]
+        b = points[np.newaxis, :, :]
+        dominates[start:start+block] = np.any(a < b, axis=2) & ~np.any(a > b, axis=2)
+        
+    counts = dominates.sum(axis=0)
+    ranks = np.full(n, -1, dtype=int)
+    current = np.flatnonzero(counts == 0)
+    rank = 0
+    
+    while current.size > 0:
+        ranks[current] = rank
+        counts -= dominates[current].sum(axis=0)
+        current = np.flatnonzero((counts == 0) & (ranks < 0))
+        rank += 1
+        
+    return ranks.tolist()
+
+def _pareto_ranks(points):
+    """Computes the non-dominated rank of each point (minimized objectives).
+    
+    Identical points are ranked together.  Uses a sweep for up to three
+    objectives and a dominance matrix otherwise.
+    """
+    unique_points = []
+    index = {}
+    mapping = []
+    
+    for point in points:
+        if point not in index:
+            index[point] = len(unique_points)
+            unique_points.append(point)
+            
+        mapping.append(index[point])
+        
+    nobjs = len(unique_points[0])
+    
+    if nobjs <= 3:
+        order = sorted(range(len(unique_points)), key=unique_points.__getitem__)
+        
+        if nobjs == 1:
+            ranks = [0]*len(unique_points)
+            
+            for rank, i in enumerate(order):
+                ranks[i] = rank
+        elif nobjs == 2:
+            ranks = _sweep_ranks_2d(unique_points, order)
+        else:
+            ranks = _sweep_ranks_3d(unique_points, order)
+    else:
+        ranks = _matrix_ranks(unique_points)
+        
+    return [ranks[i] for i in mapping]
+
+def _nondominated_ranks(solutions):
+    """Computes the rank assigned by :code:`nondominated_sort`.
+    
+    Matches :class:`ParetoDominance`: when the problem has constraints, any
+    solution with a smaller constraint violation dominates one with a larger
+    violation, so each distinct violation forms its own block of fronts.
+    """
+    problem = solutions[0].problem
+    maximize = [d == Problem.MAXIMIZE for d in problem.directions]
+    
+    if isinstance(solutions, Population):
+        objectives = solutions.objectives.tolist()
+    else:
+        objectives = [s.objectives[:] for s in solutions]
+        
+    points = [tuple([-o if flip else o for o, flip in zip(x, maximize)]) for x in objectives]
+    
+    if problem.nconstrs > 0:
+        groups = {}
+        
+        for i, solution in enumerate(solutions):
+            groups.setdefault(solution.constraint_violation, []).append(i)
+            
+        groups = [groups[key] for key in sorted(groups.keys())]
+    else:
+        groups = [list(range(len(points)))]
+        
+    ranks = [0]*len(points)
+    offset = 0
+    
+    for group in groups:
+        group_ranks = _pareto_ranks([points[i] for i in group])
+        
+        for i, rank in zip(group, group_ranks):
+            ranks[i] = offset + rank
+            
+        offset += max(group_ranks) + 1
+        
+    return ranks
+
 def nondominated_sort(solutions):
     """Fast non-dominated sorting.
     
@@ -1047,24 +2660,57 @@ def nondominated_sort(solutions):
     2. :code:`crowding_distance` - The crowding distance of the given solution.
        Larger values indicate less crowding near the solution.
        
+    Problems with up to three objectives are sorted with an O(N log N) sweep.
+    Larger problems are sorted using a dominance matrix if NumPy is available
+    and there are enough solutions to benefit; otherwise, each front is found
+    by inserting the remaining solutions into an :class:`Archive`.
+       
     Parameters
     ----------
     solutions : iterable
         The collection of solutions
     """
-    rank = 0
+    if len(solutions) == 0:
+        return
     
-    while len(solutions) > 0:
-        archive = Archive()
-        archive += solutions
+    nobjs = solutions[0].problem.nobjs
+    
+    if nobjs > 3 and (np is None or len(solutions) < _MATRIX_SORT_THRESHOLD):
+        rank = 0
         
-        for solution in archive:
-            solution.rank = rank
+        while len(solutions) > 0:
+            archive = Archive()
+            archive += solutions
             
-        crowding_distance(archive)
+            for solution in archive:
+                solution.rank = rank
+                
+            crowding_distance(archive)
+                
+            solutions = [x for x in solutions if x not in archive]
+            rank += 1
             
-        solutions = [x for x in solutions if x not in archive]
-        rank += 1
+        return
+    
+    ranks = _nondominated_ranks(solutions)
+    fronts = [[] for _ in range(max(ranks) + 1)]
+    
+    for i, rank in enumerate(ranks):
+        fronts[rank].append(i)
+        
+    for rank, front in enumerate(fronts):
+        members = [solutions[i] for i in front]
+        
+        for solution in members:
+            solution.rank = rank
+        
+        if isinstance(solutions, Population):
+            distances = _crowding_distance_matrix(solutions.objectives[front])
+            
+            for solution, distance in zip(members, distances.tolist()):
+                solution.crowding_distance = distance
+        else:
+            crowding_distance(members)
         
 def crowding_distance(solutions):
     """Calculates crowding distance for a non-dominated front.
@@ -1078,6 +2724,14 @@ def crowding_distance(solutions):
     solutions : iterable
         The collection of solutions
     """
+    if isinstance(solutions, Population):
+        distances = _crowding_distance_matrix(solutions.objectives)
+        
+        for solution, distance in zip(solutions, distances.tolist()):
+            solution.crowding_distance = distance
+            
+        return
+    
     for solution in solutions:
         solution.crowding_distance = 0.0
         
@@ -1104,6 +2758,47 @@ def crowding_distance(solutions):
                     diff = sorted_solutions[j+1].objectives[i] - sorted_solutions[j-1].objectives[i]
                     sorted_solutions[j].crowding_distance += diff / (max_value - min_value)
 
+def _crowding_distance_matrix(objectives):
+    """Calculates crowding distance for each row of an objective matrix.
+    
+    Produces the same values as :code:`crowding_distance`, including assigning
+    a distance of 0 to duplicate rows, but operates on whole columns.
+    
+    Parameters
+    ----------
+    objectives : ndarray
+        The (N x M) matrix of objective values for a non-dominated front
+    """
+    distances = np.zeros(objectives.shape[0])
+    
+    if objectives.shape[0] == 0:
+        return distances
+    
+    _, first = np.unique(objectives, axis=0, return_index=True)
+    first.sort()
+    values = objectives[first]
+    result = np.zeros(len(first))
+    
+    if len(first) < 3:
+        result[:] = POSITIVE_INFINITY
+    else:
+        for i in range(objectives.shape[1]):
+            order = np.argsort(values[:, i], kind="stable")
+            column = values[order, i]
+            min_value = column[0]
+            max_value = column[-1]
+            
+            result[order[0]] += POSITIVE_INFINITY
+            result[order[-1]] += POSITIVE_INFINITY
+            
+            if max_value - min_value < EPSILON:
+                result[order[1:-1]] = POSITIVE_INFINITY
+            else:
+                result[order[1:-1]] += (column[2:] - column[:-2]) / (max_value - min_value)
+                
+    distances[first] = result
+    return distances
+
 def nondominated_split(solutions, size):
     """Identify the front that must be truncated.
     
@@ -1223,6 +2918,9 @@ def normalize(solutions, minimum=None, maximum=None):
     if len(solutions) == 0:
         return
     
+    if isinstance(solutions, Population):
+        return _normalize_population(solutions, minimum, maximum)
+    
     problem = solutions[0].problem
     feasible = [s for s in solutions if s.constraint_violation == 0.0]
     
@@ -1241,6 +2939,26 @@ def normalize(solutions, minimum=None, maximum=None):
         
     return minimum, maximum
 
+def _normalize_population(population, minimum=None, maximum=None):
+    feasible = population.constraint_violation == 0.0
+    objectives = population.objectives[feasible]
+    
+    if minimum is None:
+        minimum = objectives.min(axis=0).tolist()
+        
+    if maximum is None:
+        maximum = objectives.max(axis=0).tolist()
+        
+    if np.any(np.asarray(maximum) - np.asarray(minimum) < EPSILON):
+        raise PlatypusError("objective with empty range")
+    
+    normalized = (objectives - np.asarray(minimum)) / (np.asarray(maximum) - np.asarray(minimum))
+    
+    for s, row in zip(itertools.compress(population, feasible), normalized.tolist()):
+        s.normalized_objectives = row
+        
+    return minimum, maximum
+
 class FitnessEvaluator(object):
     
     __metaclass__ = ABCMeta
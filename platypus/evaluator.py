@@ -18,7 +18,9 @@
 # along with Platypus.  If not, see <http://www.gnu.org/licenses/>.
 from __future__ import absolute_import, division, print_function
 
+import math
 import time
+import uuid
 import logging
 import datetime
 from abc import ABCMeta, abstractmethod
@@ -40,6 +42,118 @@ def _chunks(items, n):
         if len(result) > 0:
             yield result
 
+# Problems registered in this process, keyed by the problem's registry key.
+_PROBLEMS = {}
+
+def register_problem(problem):
+    """Registers a problem so that jobs can reference it by key.
+    
+    Solution evaluation jobs for a registered problem send only the
+    problem's key and the decision variables to the workers, and receive
+    only the objectives and constraints back.  Each worker must therefore
+    have the problem installed, either through a pool initializer (see
+    :code:`install_problems`) or an MPI broadcast (see
+    :code:`broadcast_problems`).  :code:`MultiprocessingEvaluator` and
+    :code:`ProcessPoolEvaluator` do this automatically for the problems given
+    in their :code:`problems` argument.  An :code:`MPIPool` is created
+    outside of the evaluator, so :code:`broadcast_problems` must instead be
+    called explicitly on every rank before the workers start waiting.
+    
+    The problem must be registered before it is sent to the workers, since
+    the key is stored in the problem itself.
+    
+    Parameters
+    ----------
+    problem: Problem
+        The problem to register.
+        
+    Returns
+    -------
+    The registry key.
+    """
+    key = getattr(problem, "_registry_key", None)
+    
+    if key is None:
+        key = uuid.uuid4().hex
+        problem._registry_key = key
+        
+    _PROBLEMS[key] = problem
+    return key
+
+def unregister_problem(problem):
+    """Removes a problem from the registry in this process."""
+    key = getattr(problem, "_registry_key", None)
+    
+    if key is not None and _PROBLEMS.get(key) is problem:
+        del _PROBLEMS[key]
+
+def install_problems(problems):
+    """Installs registered problems in a worker.
+    
+    Intended as the initializer of a process pool, for example
+    :code:`Pool(initializer=install_problems, initargs=(problems,))`, after
+    calling :code:`register_problem` on each problem.
+    """
+    for problem in problems:
+        register_problem(problem)
+        
+def broadcast_problems(problems=None, comm=None, root=0):
+    """Broadcasts registered problems to all MPI ranks.
+    
+    Must be called by every rank, before the workers start waiting for jobs.
+    The problems given on the root rank are registered and installed on all
+    other ranks.  Requires :code:`mpi4py`.  For example, with an
+    :code:`MPIPool`::
+    
+        pool = MPIPool()
+        broadcast_problems([problem], comm=pool.comm)
+        
+        if not pool.is_master():
+            pool.wait()
+            sys.exit(0)
+    
+    Returns
+    -------
+    The problems, as installed on this rank.
+    """
+    if comm is None:
+        from mpi4py import MPI
+        comm = MPI.COMM_WORLD
+        
+    if comm.Get_rank() == root:
+        for problem in problems:
+            register_problem(problem)
+            
+    problems = comm.bcast(problems, root=root)
+    install_problems(problems)
+    return problems
+
+def registered_key(problem):
+    """Returns the key of a problem registered in this process, or None."""
+    key = getattr(problem, "_registry_key", None)
+    
+    if key is not None and _PROBLEMS.get(key) is problem:
+        return key
+    else:
+        return None
+    
+def lookup_problem(key):
+    """Returns the problem registered in this process with the given key."""
+    try:
+        return _PROBLEMS[key]
+    except KeyError:
+        from .core import PlatypusError
+        raise PlatypusError("problem %s is not installed in this process; "
+                            "pass the problem to the evaluator or install it "
+                            "with install_problems" % key)
+
+def _cpu_count():
+    try:
+        import multiprocessing
+        return multiprocessing.cpu_count()
+    except (ImportError, NotImplementedError):
+        return 1
+
 class Job(object):
     
     __metaclass__ = ABCMeta
@@ -51,10 +165,101 @@ class Job(object):
     def run(self):
         raise NotImplementedError("method not implemented")
     
+    @classmethod
+    def create_batch(cls, jobs):
+        """Combines jobs into a single :code:`BatchJob` for dispatching.
+        
+        Subclasses can override this method to send a more compact
+        representation of the jobs to the workers.
+        """
+        return BatchJob(jobs)
+    
+class BatchJob(Job):
+    """Runs a batch of jobs as a single job.
+    
+    Used by evaluators in batched dispatch mode to reduce the per-job
+    communication overhead.  Records the time spent running the batch in
+    :code:`elapsed`, which evaluators use to adapt the batch size.
+    """
+    
+    def __init__(self, jobs):
+        super(BatchJob, self).__init__()
+        self.jobs = jobs
+        self.size = len(jobs)
+        self.elapsed = 0.0
+        
+    def run(self):
+        start_time = time.time()
+        
+        for job in self.jobs:
+            job.run()
+            
+        self.elapsed = time.time() - start_time
+        
+    def unpack(self, jobs):
+        """Returns the completed jobs, given the original jobs in the batch."""
+        return self.jobs
+    
 def run_job(job):
     job.run()
     return job
 
+def _wait_any(futures, ready):
+    """Blocks until at least one future is ready, returning the ready ones.
+    
+    Futures from :code:`concurrent.futures` are waited on directly; any other
+    kind of future is polled using the :code:`ready` function.
+    """
+    try:
+        from concurrent.futures import Future, wait, FIRST_COMPLETED
+    except ImportError:
+        Future = None
+        
+    if Future is not None and all([isinstance(f, Future) for f in futures]):
+        done = wait(futures, return_when=FIRST_COMPLETED).done
+        return [f for f in futures if f in done]
+    
+    delay = 0.0001
+    
+    while True:
+        finished = [f for f in futures if ready(f)]
+        
+        if len(finished) > 0:
+            return finished
+        
+        time.sleep(delay)
+        delay = min(2*delay, 0.01)
+
+def _as_completed(submit, ready, result, jobs, max_pending):
+    """Evaluates jobs asynchronously, yielding each job as it completes.
+    
+    Jobs are pulled lazily from :code:`jobs`, keeping up to
+    :code:`max_pending` jobs in flight.  When iteration stops early, any
+    pending jobs that have not started are cancelled.
+    """
+    iterator = iter(jobs)
+    pending = []
+    exhausted = False
+    
+    try:
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                try:
+                    pending.append(submit(next(iterator)))
+                except StopIteration:
+                    exhausted = True
+                    
+            if len(pending) == 0:
+                return
+            
+            for future in _wait_any(pending, ready):
+                pending.remove(future)
+                yield result(future)
+    finally:
+        for future in pending:
+            if hasattr(future, "cancel"):
+                future.cancel()
+
 class Evaluator(object):
     
     __metaclass__ = ABCMeta
@@ -66,6 +271,23 @@ class Evaluator(object):
     def evaluate_all(self, jobs, **kwargs):
         raise NotImplementedError("method not implemented")
     
+    def evaluate_async(self, jobs, max_pending=None, **kwargs):
+        """Evaluates jobs asynchronously, yielding each job as it completes.
+        
+        Unlike :code:`evaluate_all`, there is no barrier between jobs.  Jobs
+        are pulled lazily from :code:`jobs` and a new job is submitted as soon
+        as a pending job completes, keeping up to :code:`max_pending` jobs in
+        flight (by default, the number of workers).  Since the next job is
+        only requested after earlier results are yielded, :code:`jobs` can be
+        a generator whose jobs depend on the results received so far.
+        
+        Jobs are yielded in the order they complete, which can differ from the
+        order they were submitted.  This default implementation evaluates each
+        job serially when it is requested.
+        """
+        for job in jobs:
+            yield run_job(job)
+            
     def close(self):
         pass
     
@@ -76,23 +298,41 @@ class Evaluator(object):
         self.close()
     
 class MapEvaluator(Evaluator):
+    """Evaluates jobs using a map function.
     
-    def __init__(self, map_func=map):
+    By default, each job is passed to the map function individually.  In
+    batched mode, consecutive jobs are instead grouped into batches that are
+    each dispatched as a single job (see :code:`Job.create_batch`), reducing
+    the communication overhead for inexpensive jobs.  Batched mode is enabled
+    by setting :code:`batch_size` to either a fixed number of jobs per batch
+    or :code:`"adaptive"`.  The adaptive batch size is derived from the
+    measured time per job, targeting batches that take :code:`target_time`
+    seconds while keeping at least one batch per worker.
+    """
+    
+    def __init__(self, map_func=map, batch_size=None, target_time=0.1):
         super(MapEvaluator, self).__init__()
         self.map_func = map_func
+        self.batch_size = batch_size
+        self.target_time = target_time
+        self.job_time = None
+        
+    def workers(self):
+        """Returns the number of workers used by the map function."""
+        return 1
     
     def evaluate_all(self, jobs, **kwargs):
         log_frequency = kwargs.get("log_frequency", None)
         
         if log_frequency is None:
-            return list(self.map_func(run_job, jobs))
+            return self._map(jobs)
         else:
             result = []
             job_name = kwargs.get("job_name", "Batch Jobs")
             start_time = time.time()
             
             for chunk in _chunks(jobs, log_frequency):
-                result.extend(self.map_func(run_job, chunk))
+                result.extend(self._map(chunk))
                 LOGGER.log(logging.INFO,
                            "%s running; Jobs Complete: %d, Elapsed Time: %s",
                            job_name,
@@ -100,12 +340,73 @@ class MapEvaluator(Evaluator):
                            datetime.timedelta(seconds=time.time()-start_time))
                 
             return result
+        
+    def _map(self, jobs):
+        if self.batch_size is None:
+            return list(self.map_func(run_job, jobs))
+        
+        jobs = list(jobs)
+        size = self._get_batch_size(len(jobs))
+        groups = [jobs[i:i+size] for i in range(0, len(jobs), size)]
+        batches = list(self.map_func(run_job, [_create_batch(group) for group in groups]))
+        self._update_job_time(batches)
+        
+        result = []
+        
+        for group, batch in zip(groups, batches):
+            result.extend(batch.unpack(group))
+            
+        return result
+    
+    def _get_batch_size(self, njobs):
+        if self.batch_size != "adaptive":
+            return max(1, int(self.batch_size))
+        
+        workers = max(1, self.workers())
+        limit = max(1, int(math.ceil(njobs / workers)))
+        
+        if self.job_time is None:
+            return max(1, int(math.ceil(njobs / (4*workers))))
+        elif self.job_time <= 0.0:
+            return limit
+        else:
+            return max(1, min(limit, int(self.target_time / self.job_time)))
+        
+    def _update_job_time(self, batches):
+        size = sum([batch.size for batch in batches])
+        
+        if size > 0:
+            job_time = sum([batch.elapsed for batch in batches]) / size
+            
+            if self.job_time is None:
+                self.job_time = job_time
+            else:
+                self.job_time = 0.5*self.job_time + 0.5*job_time
+                
+def _create_batch(jobs):
+    job_type = type(jobs[0])
+    
+    if all([type(job) is job_type for job in jobs]):
+        return job_type.create_batch(jobs)
+    else:
+        return BatchJob(jobs)
     
 class SubmitEvaluator(Evaluator):
     
-    def __init__(self, submit_func):
+    def __init__(self, submit_func, max_pending=None):
         super(SubmitEvaluator, self).__init__()
         self.submit_func = submit_func
+        self.max_pending = max_pending
+        
+    def evaluate_async(self, jobs, max_pending=None, **kwargs):
+        if max_pending is None:
+            max_pending = self.max_pending or _cpu_count()
+            
+        return _as_completed(lambda job: self.submit_func(run_job, job),
+                             lambda f: f.done(),
+                             lambda f: f.result(),
+                             jobs,
+                             max_pending)
         
     def evaluate_all(self, jobs, **kwargs):
         futures = [self.submit_func(run_job, job) for job in jobs]
@@ -130,9 +431,20 @@ class SubmitEvaluator(Evaluator):
 
 class ApplyEvaluator(Evaluator):
     
-    def __init__(self, apply_func):
+    def __init__(self, apply_func, max_pending=None):
         super(ApplyEvaluator, self).__init__()
         self.apply_func = apply_func
+        self.max_pending = max_pending
+        
+    def evaluate_async(self, jobs, max_pending=None, **kwargs):
+        if max_pending is None:
+            max_pending = self.max_pending or _cpu_count()
+            
+        return _as_completed(lambda job: self.apply_func(run_job, [job]),
+                             lambda f: f.ready(),
+                             lambda f: f.get(),
+                             jobs,
+                             max_pending)
         
     def evaluate_all(self, jobs, **kwargs):
         futures = [self.apply_func(run_job, [job]) for job in jobs]
@@ -158,14 +470,30 @@ class ApplyEvaluator(Evaluator):
 # Note: this is compatible with MPIPool and Schwimmbad 
 class PoolEvaluator(MapEvaluator):
     
-    def __init__(self, pool):
-        super(PoolEvaluator, self).__init__(pool.map)
+    def __init__(self, pool, batch_size=None, target_time=0.1):
+        super(PoolEvaluator, self).__init__(pool.map, batch_size, target_time)
         self.pool = pool
 
         if hasattr(pool, "_processes"):
             LOGGER.log(logging.INFO, "Started pool evaluator with %d processes", pool._processes)
         else:
             LOGGER.log(logging.INFO, "Started pool evaluator")
+            
+    def evaluate_async(self, jobs, max_pending=None, **kwargs):
+        if not hasattr(self.pool, "apply_async"):
+            return super(PoolEvaluator, self).evaluate_async(jobs, max_pending, **kwargs)
+        
+        if max_pending is None:
+            max_pending = self.workers()
+            
+        return _as_completed(lambda job: self.pool.apply_async(run_job, [job]),
+                             lambda f: f.ready(),
+                             lambda f: f.get(),
+                             jobs,
+                             max_pending)
+        
+    def workers(self):
+        return getattr(self.pool, "_processes", None) or getattr(self.pool, "size", None) or _cpu_count()
         
     def close(self):
         LOGGER.log(logging.DEBUG, "Closing pool evaluator")
@@ -179,21 +507,47 @@ class PoolEvaluator(MapEvaluator):
 
 class MultiprocessingEvaluator(PoolEvaluator):
     
-    def __init__(self, processes=None):
+    def __init__(self, processes=None, batch_size=None, target_time=0.1, problems=None):
         try:
             from multiprocessing import Pool
-            super(MultiprocessingEvaluator, self).__init__(Pool(processes))
+            self.problems = list(problems or [])
+            
+            for problem in self.problems:
+                register_problem(problem)
+                
+            if self.problems:
+                pool = Pool(processes, initializer=install_problems, initargs=(self.problems,))
+            else:
+                pool = Pool(processes)
+                
+            super(MultiprocessingEvaluator, self).__init__(pool, batch_size, target_time)
         except ImportError:
             # prevent error from showing in Eclipse if multiprocessing not available
             raise
+        
+    def close(self):
+        super(MultiprocessingEvaluator, self).close()
+        
+        for problem in self.problems:
+            unregister_problem(problem)
 
 class ProcessPoolEvaluator(SubmitEvaluator):
     
-    def __init__(self, processes=None):
+    def __init__(self, processes=None, problems=None):
         try:
             from concurrent.futures import ProcessPoolExecutor
-            self.executor = ProcessPoolExecutor(processes)
-            super(ProcessPoolEvaluator, self).__init__(self.executor.submit)
+            self.problems = list(problems or [])
+            self.processes = processes or _cpu_count()
+            
+            for problem in self.problems:
+                register_problem(problem)
+                
+            if self.problems:
+                self.executor = ProcessPoolExecutor(self.processes, initializer=install_problems, initargs=(self.problems,))
+            else:
+                self.executor = ProcessPoolExecutor(self.processes)
+                
+            super(ProcessPoolEvaluator, self).__init__(self.executor.submit, self.processes)
             LOGGER.log(logging.INFO, "Started process pool evaluator")
             
             if processes:
@@ -205,5 +559,48 @@ class ProcessPoolEvaluator(SubmitEvaluator):
     def close(self):
         LOGGER.log(logging.DEBUG, "Closing process pool evaluator")
         self.executor.shutdown()
+        
+        for problem in self.problems:
+            unregister_problem(problem)
+            
         LOGGER.log(logging.INFO, "Closed process pool evaluator")
-   
+
+class ThreadPoolEvaluator(MapEvaluator):
+    """Evaluates jobs in a pool of threads.
+    
+    Threads share memory with the algorithm, so no jobs or results are
+    pickled.  This is well suited for objective functions that spend most of
+    their time in code that releases the GIL, such as NumPy or compiled
+    extensions, while pure Python functions are better served by a process
+    pool.  Supports the same logging and batched dispatch (see
+    :code:`batch_size`) as :code:`MapEvaluator`.
+    """
+    
+    def __init__(self, threads=None, batch_size=None, target_time=0.1):
+        try:
+            from concurrent.futures import ThreadPoolExecutor
+            self.threads = threads or _cpu_count()
+            self.executor = ThreadPoolExecutor(self.threads)
+            super(ThreadPoolEvaluator, self).__init__(self.executor.map, batch_size, target_time)
+            LOGGER.log(logging.INFO, "Started thread pool evaluator with %d threads", self.threads)
+        except ImportError:
+            # prevent error from showing in Eclipse if concurrent.futures not available
+            raise
+        
+    def workers(self):
+        return self.threads
+    
+    def evaluate_async(self, jobs, max_pending=None, **kwargs):
+        if max_pending is None:
+            max_pending = self.workers()
+            
+        return _as_completed(lambda job: self.executor.submit(run_job, job),
+                             lambda f: f.done(),
+                             lambda f: f.result(),
+                             jobs,
+                             max_pending)
+        
+    def close(self):
+        LOGGER.log(logging.DEBUG, "Closing thread pool evaluator")
+        self.executor.shutdown()
+        LOGGER.log(logging.INFO, "Closed thread pool evaluator")
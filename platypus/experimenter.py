@@ -18,12 +18,15 @@
 # along with Platypus.  If not, see <http://www.gnu.org/licenses/>.
 from __future__ import absolute_import, division, print_function
 
+import os
 import six
+import json
 import time
 import datetime
 import functools
 from collections import OrderedDict
-from .core import PlatypusError
+from six.moves.urllib.parse import quote
+from .core import PlatypusError, Problem, Solution
 from .evaluator import Job, MapEvaluator
 
 try:
@@ -33,7 +36,7 @@ except NameError:
         
 class ExperimentJob(Job):
 
-    def __init__(self, instance, nfe, algorithm_name, problem_name, seed, display_stats):
+    def __init__(self, instance, nfe, algorithm_name, problem_name, seed, display_stats, output=None):
         super(ExperimentJob, self).__init__()
         self.instance = instance
         self.nfe = nfe
@@ -41,6 +44,8 @@ class ExperimentJob(Job):
         self.problem_name = problem_name
         self.seed = seed
         self.display_stats = display_stats
+        self.output = output
+        self.result_file = None
         
     def run(self):
         if self.display_stats:
@@ -55,6 +60,82 @@ class ExperimentJob(Job):
             print("Finished seed", self.seed, "of", self.algorithm_name, "on",
                     self.problem_name, ":",
                     datetime.timedelta(seconds=round(end_time-start_time)))
+            
+        if self.output is not None:
+            # write the result set and release the algorithm, so the job
+            # returned by the evaluator holds only the file name
+            self.result_file = ResultFile.write(self.output,
+                                                self.algorithm_name,
+                                                self.problem_name,
+                                                self.seed,
+                                                self.instance.result)
+            self.instance = None
+            
+class ResultFile(object):
+    """A result set stored on disk by :code:`experiment`.
+    
+    The file is in the JSON Lines format.  The first line records the
+    algorithm, problem, seed and the problem's objective directions, and each
+    following line records the objectives and constraint violation of one
+    solution.  Variables are not stored.  The solutions are only read when
+    :code:`load` is called, creating solutions to a placeholder problem with
+    the same number of objectives and directions.
+    """
+    
+    def __init__(self, path):
+        super(ResultFile, self).__init__()
+        self.path = path
+        
+    @staticmethod
+    def filename(algorithm_name, problem_name, seed):
+        return "%s_%s_%d.jsonl" % (quote(algorithm_name, safe=""),
+                                   quote(problem_name, safe=""),
+                                   seed)
+        
+    @classmethod
+    def write(cls, directory, algorithm_name, problem_name, seed, result):
+        path = os.path.join(directory, cls.filename(algorithm_name, problem_name, seed))
+        problem = result[0].problem if len(result) > 0 else None
+        header = {"algorithm" : algorithm_name,
+                  "problem" : problem_name,
+                  "seed" : seed,
+                  "nobjs" : problem.nobjs if problem is not None else 0,
+                  "directions" : list(problem.directions) if problem is not None else []}
+        
+        with open(path, "w") as f:
+            f.write(json.dumps(header) + "\n")
+            
+            for solution in result:
+                f.write(json.dumps({"objectives" : [float(o) for o in solution.objectives],
+                                    "constraint_violation" : float(solution.constraint_violation)}) + "\n")
+                
+        return cls(path)
+    
+    def header(self):
+        with open(self.path, "r") as f:
+            return json.loads(f.readline())
+    
+    def load(self):
+        """Reads the result set, returning a list of solutions."""
+        with open(self.path, "r") as f:
+            header = json.loads(f.readline())
+            problem = Problem(0, header["nobjs"])
+            problem.directions[:] = header["directions"]
+            result = []
+            
+            for line in f:
+                record = json.loads(line)
+                solution = Solution(problem)
+                solution.objectives[:] = record["objectives"]
+                solution.constraint_violation = record["constraint_violation"]
+                solution.feasible = solution.constraint_violation == 0.0
+                solution.evaluated = True
+                result.append(solution)
+                
+        return result
+    
+    def __repr__(self):
+        return "ResultFile(%r)" % self.path
                     
 class IndicatorJob(Job):
     
@@ -66,9 +147,14 @@ class IndicatorJob(Job):
         self.indicators = indicators
         
     def run(self):
-        self.results = [indicator(self.result_set) for indicator in self.indicators]
+        result_set = self.result_set
+        
+        if isinstance(result_set, ResultFile):
+            result_set = result_set.load()
+            
+        self.results = [indicator(result_set) for indicator in self.indicators]
 
-def evaluate_job_generator(algorithms, problems, seeds, nfe, display_stats):
+def evaluate_job_generator(algorithms, problems, seeds, nfe, display_stats, cache=None, output=None):
     existing_algorithms = set()
     existing_problems = set()
     
@@ -95,6 +181,9 @@ def evaluate_job_generator(algorithms, problems, seeds, nfe, display_stats):
             raise PlatypusError("only one algorithm with name " + algorithm_name + " can be run")
         else:
             existing_algorithms.add(algorithm_name)
+            
+        if cache is not None and not "cache" in kwargs:
+            kwargs = dict(kwargs, cache=cache)
 
         for j in range(len(problems)):
             if isinstance(problems[j], tuple):
@@ -127,14 +216,17 @@ def evaluate_job_generator(algorithms, problems, seeds, nfe, display_stats):
                                   algorithm_name,
                                   problem_name,
                                   k,
-                                  display_stats)
+                                  display_stats,
+                                  output)
                 
 def experiment(algorithms = [],
                problems = [],
                seeds = 10,
                nfe=10000,
                evaluator = None,
-               display_stats = False):
+               display_stats = False,
+               cache = None,
+               output = None):
     """Run experiments.
     
     Used to run experiments where one or more algorithms are tested on one or
@@ -163,6 +255,19 @@ def experiment(algorithms = [],
         The number of function evaluations allotted to each experiment
     display_stats : bool
         If True, the progress of the experiments is output to the screen
+    cache : PersistentEvaluationCache
+        Cache shared by all algorithms, unless an algorithm's kwargs define
+        its own.  Results are reused across seeds, worker processes and runs
+        of the experiment, and are kept apart for each problem.
+    output : str
+        If set, each result set is written to a :code:`ResultFile` in this
+        directory as soon as its run finishes, and the returned dict contains
+        the :code:`ResultFile` objects instead of the solutions.  The results
+        are read back by :code:`calculate` one at a time, or can be loaded
+        later with :code:`load_results`.  When running on multiple machines,
+        the directory must be on a shared file system.  To avoid overwriting
+        or mixing results, the directory must not contain results from a
+        previous experiment.
     """
     if not isinstance(algorithms, list):
         algorithms = [algorithms]
@@ -170,8 +275,14 @@ def experiment(algorithms = [],
     if not isinstance(problems, list):
         problems = [problems]
     
+    if output is not None:
+        if not os.path.isdir(output):
+            os.makedirs(output)
+        elif any([filename.endswith(".jsonl") for filename in os.listdir(output)]):
+            raise PlatypusError("output directory %s already contains results" % output)
+    
     # construct the jobs to run
-    generator = evaluate_job_generator(algorithms, problems, seeds, nfe, display_stats)
+    generator = evaluate_job_generator(algorithms, problems, seeds, nfe, display_stats, cache, output)
          
     # process the jobs
     if evaluator is None:
@@ -191,11 +302,43 @@ def experiment(algorithms = [],
         if not job.problem_name in results[job.algorithm_name]:
             results[job.algorithm_name][job.problem_name] = []
             
-        results[job.algorithm_name][job.problem_name].append(job.instance.result)
+        if job.result_file is not None:
+            results[job.algorithm_name][job.problem_name].append(job.result_file)
+        else:
+            results[job.algorithm_name][job.problem_name].append(job.instance.result)
+            
         count += 1
                 
     return results
 
+def load_results(directory):
+    """Loads the results written by :code:`experiment` to a directory.
+    
+    Returns a dict of the same form as :code:`experiment`, containing the
+    :code:`ResultFile` objects ordered by algorithm, problem and seed.  The
+    result sets are not read until needed, e.g., by :code:`calculate`.
+    """
+    files = []
+    
+    for filename in os.listdir(directory):
+        if filename.endswith(".jsonl"):
+            result_file = ResultFile(os.path.join(directory, filename))
+            header = result_file.header()
+            files.append((header["algorithm"], header["problem"], header["seed"], result_file))
+            
+    results = OrderedDict()
+    
+    for algorithm_name, problem_name, _, result_file in sorted(files, key=lambda x : x[:3]):
+        if not algorithm_name in results:
+            results[algorithm_name] = {}
+            
+        if not problem_name in results[algorithm_name]:
+            results[algorithm_name][problem_name] = []
+            
+        results[algorithm_name][problem_name].append(result_file)
+        
+    return results
+
 def calculate_job_generator(results, indicators):
     for algorithm in six.iterkeys(results):
         for problem in six.iterkeys(results[algorithm]):
@@ -19,10 +19,19 @@
 from __future__ import absolute_import, division, print_function
 
 import math
+import bisect
 import functools
-from .core import Solution, Problem, Indicator, normalize, POSITIVE_INFINITY
+from .core import Solution, Problem, Indicator, PlatypusError, normalize, POSITIVE_INFINITY
 from .tools import euclidean_dist
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Maximum number of elements compared at once in the vectorized computations.
+_BLOCK_SIZE = 2**22
+
 def normalized_euclidean_dist(x, y):
     return euclidean_dist(x.normalized_objectives, y.normalized_objectives)
 
@@ -40,6 +49,93 @@ def distance_to_nearest(solution, set):
     
     return min([normalized_euclidean_dist(solution, s) for s in set])
 
+class _NearestNeighborIndex(object):
+    """Nearest-neighbor distances to a fixed set of points.
+    
+    Built once over a reference set and reused for every query.  With NumPy,
+    distances are computed by blocked brute force, comparing each block of
+    query points against all indexed points at once while bounding memory
+    use by :code:`_BLOCK_SIZE`.  Without NumPy, each pair is compared in pure
+    Python.
+    
+    When :code:`signs` are given, the dominance-compliant IGD+ distance is
+    used, which only counts the objectives where the query point is worse
+    than the indexed point.  Each sign is the direction of the objective
+    (-1 for minimization and 1 for maximization).
+    """
+    
+    def __init__(self, points):
+        super(_NearestNeighborIndex, self).__init__()
+        
+        if np is None:
+            self.points = [list(p) for p in points]
+        else:
+            self.points = np.asarray([list(p) for p in points], dtype=float)
+            
+    def __len__(self):
+        return len(self.points)
+    
+    def nearest(self, queries, signs=None):
+        """Returns the distance from each query to its nearest indexed point."""
+        if len(self.points) == 0:
+            return [POSITIVE_INFINITY]*len(queries)
+        
+        if len(queries) == 0:
+            return []
+        
+        if np is None:
+            return [min([self._distance(q, p, signs) for p in self.points]) for q in queries]
+        
+        queries, block, signs = self._prepare(queries, signs)
+        result = np.empty(len(queries))
+        
+        for start in range(0, len(queries), block):
+            result[start:start+block] = np.min(self._squared_distances(queries[start:start+block], signs), axis=1)
+            
+        return np.sqrt(result).tolist()
+    
+    def nearest_from(self, queries, signs=None):
+        """Returns the distance from each indexed point to its nearest query."""
+        if len(queries) == 0:
+            return [POSITIVE_INFINITY]*len(self.points)
+        
+        if len(self.points) == 0:
+            return []
+        
+        if np is None:
+            return [min([self._distance(q, p, signs) for q in queries]) for p in self.points]
+        
+        queries, block, signs = self._prepare(queries, signs)
+        result = np.full(len(self.points), np.inf)
+        
+        for start in range(0, len(queries), block):
+            np.minimum(result, np.min(self._squared_distances(queries[start:start+block], signs), axis=0), out=result)
+            
+        return np.sqrt(result).tolist()
+    
+    def _prepare(self, queries, signs):
+        queries = np.asarray([list(q) for q in queries], dtype=float)
+        block = max(1, _BLOCK_SIZE // self.points.size)
+        
+        if signs is not None:
+            signs = np.asarray(signs, dtype=float)
+            
+        return queries, block, signs
+    
+    def _squared_distances(self, queries, signs):
+        difference = queries[:, np.newaxis, :] - self.points[np.newaxis, :, :]
+        
+        if signs is not None:
+            difference = np.maximum(difference * -signs, 0.0)
+            
+        return np.einsum("ijk,ijk->ij", difference, difference)
+    
+    def _distance(self, query, point, signs):
+        if signs is None:
+            return euclidean_dist(query, point)
+        
+        return math.sqrt(sum([math.pow(max(0.0, -d*(q - p)), 2.0) for q, p, d in zip(query, point, signs)]))
+
 class GenerationalDistance(Indicator):
     
     def __init__(self, reference_set, d = 2.0):
@@ -47,6 +143,7 @@ class GenerationalDistance(Indicator):
         self.reference_set = [s for s in reference_set if s.constraint_violation==0.0]
         self.d = d
         self.minimum, self.maximum = normalize(reference_set)
+        self.index = _NearestNeighborIndex([s.normalized_objectives for s in self.reference_set])
 
     def calculate(self, set):
         feasible = [s for s in set if s.constraint_violation==0.0]
@@ -55,7 +152,8 @@ class GenerationalDistance(Indicator):
             return POSITIVE_INFINITY
         
         normalize(feasible, self.minimum, self.maximum)
-        return math.pow(sum([math.pow(distance_to_nearest(s, self.reference_set), self.d) for s in feasible]), 1.0 / self.d) / len(feasible)
+        distances = self.index.nearest([s.normalized_objectives for s in feasible])
+        return math.pow(sum([math.pow(distance, self.d) for distance in distances]), 1.0 / self.d) / len(feasible)
 
 class InvertedGenerationalDistance(Indicator):
     
@@ -64,18 +162,59 @@ class InvertedGenerationalDistance(Indicator):
         self.reference_set = [s for s in reference_set if s.constraint_violation==0.0]
         self.d = d
         self.minimum, self.maximum = normalize(reference_set)
+        self.index = _NearestNeighborIndex([s.normalized_objectives for s in self.reference_set])
+
+    def calculate(self, set):
+        feasible = [s for s in set if s.constraint_violation==0.0]
+        normalize(feasible, self.minimum, self.maximum)
+        distances = self.index.nearest_from([s.normalized_objectives for s in feasible])
+        return math.pow(sum([math.pow(distance, self.d) for distance in distances]), 1.0 / self.d) / len(self.reference_set)
+
+class InvertedGenerationalDistancePlus(Indicator):
+    """Inverted generational distance plus (IGD+).
+    
+    Like :code:`InvertedGenerationalDistance`, but the distance from a
+    reference point to a solution only accounts for the objectives in which
+    the solution is worse than the reference point, making the indicator
+    weakly Pareto compliant.
+    """
+    
+    def __init__(self, reference_set, d = 1.0):
+        super(InvertedGenerationalDistancePlus, self).__init__()
+        self.reference_set = [s for s in reference_set if s.constraint_violation==0.0]
+        self.d = d
+        self.minimum, self.maximum = normalize(reference_set)
+        self.index = _NearestNeighborIndex([s.normalized_objectives for s in self.reference_set])
 
     def calculate(self, set):
         feasible = [s for s in set if s.constraint_violation==0.0]
+        
+        if len(feasible) == 0:
+            return POSITIVE_INFINITY
+        
         normalize(feasible, self.minimum, self.maximum)
-        return math.pow(sum([math.pow(distance_to_nearest(s, feasible), self.d) for s in self.reference_set]), 1.0 / self.d) / len(self.reference_set)
+        signs = list(feasible[0].problem.directions)
+        distances = self.index.nearest_from([s.normalized_objectives for s in feasible], signs)
+        return math.pow(sum([math.pow(distance, self.d) for distance in distances]), 1.0 / self.d) / len(self.reference_set)
 
 class EpsilonIndicator(Indicator):
+    """Additive epsilon indicator.
+    
+    The smallest distance the feasible solutions must be translated so that
+    every point in the reference set is weakly dominated.  The reference
+    points are processed in blocks against the normalized objectives of the
+    set, and a reference point is dropped as soon as its distance to the set
+    can no longer exceed the running maximum.
+    """
     
     def __init__(self, reference_set):
         super(EpsilonIndicator, self).__init__()
         self.reference_set = [s for s in reference_set if s.constraint_violation==0.0]
         self.minimum, self.maximum = normalize(reference_set)
+        self.reference_points = [list(s.normalized_objectives) for s in self.reference_set]
+        
+        if np is not None:
+            self.reference_points = np.asarray(self.reference_points, dtype=float)
 
     def calculate(self, set):
         feasible = [s for s in set if s.constraint_violation==0.0]
@@ -84,7 +223,72 @@ class EpsilonIndicator(Indicator):
             return POSITIVE_INFINITY
         
         normalize(feasible, self.minimum, self.maximum)
-        return max([min([max([s2.normalized_objectives[k] - s1.normalized_objectives[k] for k in range(s2.problem.nobjs)]) for s2 in set]) for s1 in self.reference_set])
+        points = [s.normalized_objectives for s in feasible]
+        
+        if np is None:
+            return _epsilon_indicator(self.reference_points, points)
+        else:
+            return _epsilon_indicator_blocked(self.reference_points, np.asarray(points, dtype=float))
+    
+def _epsilon_indicator(reference_points, points):
+    """Computes the additive epsilon indicator in pure Python."""
+    result = -POSITIVE_INFINITY
+    
+    for r in reference_points:
+        distance = POSITIVE_INFINITY
+        
+        for p in points:
+            distance = min(distance, max([p[k] - r[k] for k in range(len(r))]))
+            
+            if distance <= result:
+                break
+            
+        result = max(result, distance)
+        
+    return result
+
+def _epsilon_indicator_blocked(reference_points, points):
+    """Computes the additive epsilon indicator with NumPy.
+    
+    Each block of reference points is compared against blocks of points,
+    keeping the smallest distance found so far for each reference point.
+    Reference points whose distance is already at most the running maximum
+    cannot change the result, so they are removed from the remaining blocks.
+    """
+    result = -POSITIVE_INFINITY
+    nobjs = points.shape[1]
+    
+    if len(reference_points) == 0:
+        return result
+    
+    rows = max(1, int(math.sqrt(_BLOCK_SIZE)))
+    columns = max(1, _BLOCK_SIZE // min(rows, len(reference_points)))
+    
+    for start in range(0, len(reference_points), rows):
+        active = reference_points[start:start+rows]
+        distances = np.full(len(active), np.inf)
+        
+        for offset in range(0, len(points), columns):
+            chunk = points[offset:offset+columns]
+            block = chunk[:, 0] - active[:, 0, np.newaxis]
+            
+            for k in range(1, nobjs):
+                np.maximum(block, chunk[:, k] - active[:, k, np.newaxis], out=block)
+                
+            np.minimum(distances, np.min(block, axis=1), out=distances)
+            keep = distances > result
+            
+            if not np.all(keep):
+                active = active[keep]
+                distances = distances[keep]
+                
+                if len(active) == 0:
+                    break
+        
+        if len(distances) > 0:
+            result = max(result, float(np.max(distances)))
+            
+    return result
     
 class Spacing(Indicator):
     
@@ -104,9 +308,167 @@ class Spacing(Indicator):
         avg_distance = sum(distances) / len(feasible)
         return math.sqrt(sum([math.pow(d - avg_distance, 2.0) for d in distances]) / (len(feasible)-1))
     
+def _hypervolume_2d(extents):
+    """Sweeps the points in decreasing order of the first extent."""
+    volume = 0.0
+    height = 0.0
+    
+    for x, y in sorted(extents, reverse=True):
+        if y > height:
+            volume += x * (y - height)
+            height = y
+            
+    return volume
+
+def _insert_staircase(xs, ys, x, y):
+    """Inserts a point into a 2D staircase and returns the area gained.
+    
+    The staircase stores mutually non-dominated points sorted by increasing
+    :code:`xs` (and therefore decreasing :code:`ys`).
+    """
+    successor = bisect.bisect_left(xs, x)
+    
+    if successor < len(xs) and ys[successor] >= y:
+        return 0.0
+    
+    end = bisect.bisect_right(xs, x)
+    start = end
+    
+    while start > 0 and ys[start-1] <= y:
+        start -= 1
+        
+    previous = xs[start-1] if start > 0 else 0.0
+    gain = 0.0
+    
+    for j in range(start, end):
+        gain += (xs[j] - previous) * (y - ys[j])
+        previous = xs[j]
+        
+    gain += (x - previous) * (y - (ys[end] if end < len(xs) else 0.0))
+    xs[start:end] = [x]
+    ys[start:end] = [y]
+    return gain
+
+def _hypervolume_3d(extents):
+    """Sweeps the points in decreasing order of the third extent.
+    
+    The area dominated in the plane of the first two extents is maintained
+    incrementally as points are added to a staircase.
+    """
+    xs = []
+    ys = []
+    area = 0.0
+    volume = 0.0
+    previous = None
+    
+    for x, y, z in sorted(extents, key=lambda p: p[2], reverse=True):
+        if previous is not None:
+            volume += area * (previous - z)
+            
+        previous = z
+        area += _insert_staircase(xs, ys, x, y)
+        
+    return volume + area * previous
+
+def _nondominated_extents(extents):
+    """Removes duplicate and dominated points, where larger extents are better."""
+    if len(extents) < 2:
+        return extents
+    
+    extents = extents[np.lexsort(extents.T[::-1])]
+    extents = extents[np.concatenate(([True], np.any(extents[1:] != extents[:-1], axis=1)))]
+    n = len(extents)
+    dominated = np.zeros(n, dtype=bool)
+    block = max(1, _BLOCK_SIZE // max(1, extents.size))
+    
+    for start in range(0, n, block):
+        better = np.all(extents[start:start+block, np.newaxis, :] >= extents[np.newaxis, :, :], axis=2)
+        better[np.arange(len(better)), np.arange(start, start+len(better))] = False
+        dominated |= np.any(better, axis=0)
+        
+    return extents[~dominated]
+
+def _hypervolume_wfg(extents):
+    """The WFG algorithm.
+    
+    The hypervolume is the sum of the exclusive contributions of each point
+    relative to the points after it.  Points are sorted by their last extent so
+    that each limit set has a constant last extent, reducing its hypervolume to
+    a problem with one fewer dimension.
+    """
+    extents = extents[np.argsort(extents[:, -1], kind="stable")]
+    volume = 0.0
+    
+    for k in range(len(extents)):
+        point = extents[k]
+        contribution = np.prod(point[:-1])
+        
+        if k + 1 < len(extents):
+            limit = np.minimum(extents[k+1:, :-1], point[:-1])
+            
+            if limit.shape[1] > 3:
+                limit = _nondominated_extents(limit)
+                
+            contribution -= _hypervolume(limit)
+            
+        volume += point[-1] * contribution
+        
+    return float(volume)
+
+def _hypervolume(extents):
+    extents = extents[np.all(extents > 0.0, axis=1)]
+    
+    if len(extents) == 0:
+        return 0.0
+    
+    nobjs = extents.shape[1]
+    
+    if nobjs == 1:
+        return float(extents.max())
+    elif nobjs == 2:
+        return _hypervolume_2d(extents.tolist())
+    elif nobjs == 3:
+        return _hypervolume_3d(extents.tolist())
+    else:
+        return _hypervolume_wfg(_nondominated_extents(extents))
+
+def hypervolume(points, reference_point):
+    """Computes the hypervolume dominated by a set of points.
+    
+    All objectives are minimized.  Uses an O(N log N) sweep for two
+    objectives, a dimension sweep for three objectives, and the WFG algorithm
+    otherwise.  Requires NumPy.
+    
+    Parameters
+    ----------
+    points : (N x M) matrix of float
+        The objective values of each point.
+    reference_point : list of float
+        The reference point bounding the hypervolume.  Points that are not
+        better than the reference point in every objective contribute nothing.
+    """
+    if np is None:
+        raise PlatypusError("hypervolume requires NumPy")
+    
+    reference_point = np.asarray(reference_point, dtype=float)
+    points = np.asarray(points, dtype=float).reshape(-1, len(reference_point))
+    return _hypervolume(reference_point - points)
+
 class Hypervolume(Indicator):
+    """Hypervolume indicator.
     
-    def __init__(self, reference_set=None, minimum=None, maximum=None):
+    Normalizes the feasible solutions using the bounds of the reference set (or
+    the given minimum and maximum), then computes the hypervolume dominated by
+    the solutions with respect to the reference point at the normalized
+    maximum.  By default, :code:`hypervolume` is used if NumPy is available;
+    otherwise the recursive HSO algorithm in :code:`calc_internal` is used.
+    A different engine can be supplied as any callable with the same
+    signature as :code:`hypervolume`.
+    """
+    
+    def __init__(self, reference_set=None, minimum=None, maximum=None, engine=None):
+        self.engine = engine
+        
         if reference_set is not None:
             if minimum is not None or maximum is not None:
                 raise ValueError("minimum and maximum must not be specified if reference_set is defined")
@@ -203,8 +565,170 @@ class Hypervolume(Indicator):
             
         if len(feasible) == 0:
             return 0.0
+        
+        engine = self.engine
+        
+        if engine is None and np is not None:
+            engine = hypervolume
+        
+        if engine is None:
+            for s in feasible:
+                self.invert(s)
+                    
+            return self.calc_internal(feasible, len(feasible), set[0].problem.nobjs)
+        
+        return engine(self.points(feasible), [1.0]*feasible[0].problem.nobjs)
+    
+    def points(self, feasible):
+        """Converts normalized solutions into points for minimization.
+        
+        Each point lies in the unit box, with the reference point at all ones.
+        """
+        problem = feasible[0].problem
+        maximize = [d == Problem.MAXIMIZE for d in problem.directions]
+        return [[1.0 - o if flip else max(0.0, min(1.0, o)) for o, flip in zip(s.normalized_objectives, maximize)] for s in feasible]
+
+class HypervolumeEstimate(float):
+    """A Monte Carlo hypervolume estimate.
+    
+    Behaves as a float holding the estimate, so it can be stored, rounded and
+    compared like any other indicator value.  The attributes
+    :code:`standard_error`, :code:`lower`, :code:`upper`, :code:`confidence`
+    and :code:`samples` describe the precision of the estimate.
+    """
+    
+    def __new__(cls, value, standard_error=0.0, lower=None, upper=None, confidence=0.95, samples=0):
+        estimate = super(HypervolumeEstimate, cls).__new__(cls, value)
+        estimate.standard_error = standard_error
+        estimate.lower = value if lower is None else lower
+        estimate.upper = value if upper is None else upper
+        estimate.confidence = confidence
+        estimate.samples = samples
+        return estimate
+    
+    @property
+    def interval(self):
+        return (self.lower, self.upper)
+    
+    def __reduce__(self):
+        return (HypervolumeEstimate, (float(self), self.standard_error, self.lower,
+                                      self.upper, self.confidence, self.samples))
+
+class ApproximateHypervolume(Hypervolume):
+    """Monte Carlo estimate of the hypervolume indicator.
+    
+    Solutions are normalized exactly as in :code:`Hypervolume`, then uniform
+    samples are drawn from the unit reference box in batches of
+    :code:`batch_size`.  The fraction of samples dominated by the set
+    estimates the hypervolume.  Sampling stops once :code:`samples` points have
+    been drawn or, if :code:`standard_error` is given, as soon as the standard
+    error of the estimate falls below this target.
+    
+    The result is a :code:`HypervolumeEstimate`, which carries the Wilson score
+    interval at the requested :code:`confidence` level; its standard error is
+    the interval's half-width divided by the normal quantile.  When :code:`seed` is
+    given, every call draws the same sample sequence, so results are
+    reproducible regardless of the order or process in which sets are
+    evaluated (e.g., in :code:`experimenter.calculate`).  Requires NumPy.
+    """
+    
+    def __init__(self, reference_set=None, minimum=None, maximum=None,
+                 samples=100000, standard_error=None, batch_size=10000,
+                 confidence=0.95, seed=None):
+        super(ApproximateHypervolume, self).__init__(reference_set, minimum, maximum)
+        
+        if samples < 1 or batch_size < 1:
+            raise ValueError("samples and batch_size must be positive")
+        
+        if not 0.0 < confidence < 1.0:
+            raise ValueError("confidence must be between 0 and 1")
+        
+        self.samples = samples
+        self.standard_error = standard_error
+        self.batch_size = batch_size
+        self.confidence = confidence
+        self.seed = seed
+        
+    def calculate(self, set):
+        if np is None:
+            raise PlatypusError("ApproximateHypervolume requires NumPy")
+        
+        feasible = [s for s in set if s.constraint_violation==0.0]
+        normalize(feasible, self.minimum, self.maximum)
+        feasible = [s for s in feasible if all([o <= 1.0 for o in s.normalized_objectives])]
+        
+        if len(feasible) == 0:
+            return HypervolumeEstimate(0.0, confidence=self.confidence)
+        
+        points = 1.0 - _nondominated_extents(1.0 - np.asarray(self.points(feasible), dtype=float))
+        random = np.random.RandomState(self.seed)
+        z = _normal_quantile(0.5 + self.confidence / 2.0)
+        hits = 0
+        count = 0
+        
+        while count < self.samples:
+            size = min(self.batch_size, self.samples - count)
+            hits += _count_dominated(points, random.random_sample((size, points.shape[1])))
+            count += size
             
-        for s in feasible:
-            self.invert(s)
-                
-        return self.calc_internal(feasible, len(feasible), set[0].problem.nobjs)
+            if self.standard_error is not None:
+                if _wilson_interval(hits, count, z)[2] <= self.standard_error:
+                    break
+        
+        lower, upper, error = _wilson_interval(hits, count, z)
+        return HypervolumeEstimate(hits / count,
+                                   standard_error=error,
+                                   lower=lower,
+                                   upper=upper,
+                                   confidence=self.confidence,
+                                   samples=count)
+
+def _wilson_interval(hits, count, z):
+    """Wilson score interval for a binomial proportion.
+    
+    Unlike the normal approximation, the interval does not collapse to a single
+    point when every sample (or none) is dominated, so a small first batch can
+    not end sampling with a zero standard error.  Returns the lower and upper
+    bounds along with the standard error implied by the interval's half-width.
+    """
+    p = hits / count
+    z2 = z * z
+    denominator = 1.0 + z2 / count
+    center = (p + z2 / (2.0 * count)) / denominator
+    half_width = z * math.sqrt(p * (1.0 - p) / count + z2 / (4.0 * count * count)) / denominator
+    return (max(0.0, center - half_width), min(1.0, center + half_width), half_width / z)
+
+def _count_dominated(points, samples):
+    """Counts the samples weakly dominated by at least one of the points."""
+    block = max(1, _BLOCK_SIZE // (points.shape[0] * points.shape[1]))
+    hits = 0
+    
+    for start in range(0, samples.shape[0], block):
+        chunk = samples[start:start+block]
+        dominated = np.all(points[np.newaxis, :, :] <= chunk[:, np.newaxis, :], axis=2)
+        hits += int(np.count_nonzero(np.any(dominated, axis=1)))
+        
+    return hits
+
+def _normal_quantile(p):
+    """Inverse CDF of the standard normal distribution (Acklam's algorithm)."""
+    a = [-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+         1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00]
+    b = [-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+         6.680131188771972e+01, -1.328068155288572e+01]
+    c = [-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+         -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00]
+    d = [7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+         3.754408661907416e+00]
+    
+    if p < 0.02425:
+        q = math.sqrt(-2.0 * math.log(p))
+        return (((((c[0]*q + c[1])*q + c[2])*q + c[3])*q + c[4])*q + c[5]) / \
+               ((((d[0]*q + d[1])*q + d[2])*q + d[3])*q + 1.0)
+    elif p > 1.0 - 0.02425:
+        return -_normal_quantile(1.0 - p)
+    else:
+        q = p - 0.5
+        r = q * q
+        return (((((a[0]*r + a[1])*r + a[2])*r + a[3])*r + a[4])*r + a[5])*q / \
+               (((((b[0]*r + b[1])*r + b[2])*r + b[3])*r + b[4])*r + 1.0)
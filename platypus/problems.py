@@ -26,10 +26,32 @@ from .core import Problem, Solution, EPSILON
 from .types import Real, Binary
 from abc import ABCMeta
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 ################################################################################
 # DTLZ Problems
 ################################################################################
 
+def _spherical_batch(X, g, nobjs, alpha=1.0):
+    """Evaluates the spherical DTLZ shape function for a batch of solutions."""
+    angles = 0.5 * np.pi * np.power(X[:, :nobjs-1], alpha)
+    F = np.repeat((1.0 + g)[:, np.newaxis], nobjs, axis=1)
+    
+    for i in range(nobjs):
+        F[:, i] *= np.prod(np.cos(angles[:, :nobjs-i-1]), axis=1)
+        
+        if i > 0:
+            F[:, i] *= np.sin(angles[:, nobjs-i-1])
+            
+    return F
+
+def _rastrigin_batch(X):
+    """Evaluates the multimodal g function of DTLZ1 and DTLZ3."""
+    return 100.0 * (X.shape[1] + np.sum(np.power(X - 0.5, 2.0) - np.cos(20.0 * np.pi * (X - 0.5)), axis=1))
+
 class DTLZ1(Problem):
     
     def __init__(self, nobjs = 2):
@@ -51,6 +73,19 @@ class DTLZ1(Problem):
                 
         solution.objectives[:] = f
         
+    def evaluate_batch(self, X):
+        k = self.nvars - self.nobjs + 1
+        g = _rastrigin_batch(X[:, self.nvars-k:])
+        F = np.repeat(0.5 * (1.0 + g)[:, np.newaxis], self.nobjs, axis=1)
+        
+        for i in range(self.nobjs):
+            F[:, i] *= np.prod(X[:, :self.nobjs-i-1], axis=1)
+            
+            if i > 0:
+                F[:, i] *= 1 - X[:, self.nobjs-i-1]
+                
+        return F, None
+        
     def random(self):
         solution = Solution(self)
         solution.variables[:self.nobjs-1] = [random.uniform(0.0, 1.0) for _ in range(self.nobjs-1)]
@@ -79,6 +114,11 @@ class DTLZ2(Problem):
         
         solution.objectives[:] = f
         
+    def evaluate_batch(self, X):
+        k = self.nvars - self.nobjs + 1
+        g = np.sum(np.power(X[:, self.nvars-k:] - 0.5, 2.0), axis=1)
+        return _spherical_batch(X, g, self.nobjs), None
+        
     def random(self):
         solution = Solution(self)
         solution.variables[:self.nobjs-1] = [random.uniform(0.0, 1.0) for _ in range(self.nobjs-1)]
@@ -106,6 +146,11 @@ class DTLZ3(Problem):
                 f[i] *= math.sin(0.5 * math.pi * solution.variables[self.nobjs-i-1])
         
         solution.objectives[:] = f
+        
+    def evaluate_batch(self, X):
+        k = self.nvars - self.nobjs + 1
+        g = _rastrigin_batch(X[:, self.nvars-k:])
+        return _spherical_batch(X, g, self.nobjs), None
     
     def random(self):
         solution = Solution(self)
@@ -136,6 +181,11 @@ class DTLZ4(Problem):
         
         solution.objectives[:] = f
         
+    def evaluate_batch(self, X):
+        k = self.nvars - self.nobjs + 1
+        g = np.sum(np.power(X[:, self.nvars-k:] - 0.5, 2.0), axis=1)
+        return _spherical_batch(X, g, self.nobjs, self.alpha), None
+        
     def random(self):
         solution = Solution(self)
         solution.variables[:self.nobjs-1] = [random.uniform(0.0, 1.0) for _ in range(self.nobjs-1)]
@@ -158,6 +208,13 @@ class DTLZ7(Problem):
         solution.objectives[:self.nobjs-1] = solution.variables[:self.nobjs-1]
         solution.objectives[-1] = (1.0 + g) * h
         
+    def evaluate_batch(self, X):
+        k = self.nvars - self.nobjs + 1
+        g = 1.0 + (9.0 * np.sum(X[:, self.nvars-k:], axis=1)) / k
+        x = X[:, :self.nobjs-1]
+        h = self.nobjs - np.sum(x / (1.0 + g)[:, np.newaxis] * (1.0 + np.sin(3.0 * np.pi * x)), axis=1)
+        return np.column_stack((x, (1.0 + g) * h)), None
+        
     def random(self):
         solution = Solution(self)
         solution.variables[:self.nobjs-1] = [random.uniform(0.0, 1.0) for _ in range(self.nobjs-1)]
@@ -1618,6 +1675,11 @@ class ZDT1(ZDT):
         g = (9.0 / (self.nvars - 1.0))*sum(x[1:]) + 1.0
         h = 1.0 - math.sqrt(x[0] / g)
         solution.objectives[:] = [x[0], g*h]
+        
+    def evaluate_batch(self, X):
+        g = (9.0 / (self.nvars - 1.0))*np.sum(X[:, 1:], axis=1) + 1.0
+        h = 1.0 - np.sqrt(X[:, 0] / g)
+        return np.column_stack((X[:, 0], g*h)), None
 
 class ZDT2(ZDT):
     
@@ -1629,6 +1691,11 @@ class ZDT2(ZDT):
         g = (9.0 / (self.nvars - 1.0))*sum(x[1:]) + 1.0
         h = 1.0 - math.pow(x[0] / g, 2.0)
         solution.objectives[:] = [x[0], g*h]
+        
+    def evaluate_batch(self, X):
+        g = (9.0 / (self.nvars - 1.0))*np.sum(X[:, 1:], axis=1) + 1.0
+        h = 1.0 - np.power(X[:, 0] / g, 2.0)
+        return np.column_stack((X[:, 0], g*h)), None
 
 class ZDT3(ZDT):
     
@@ -1640,6 +1707,11 @@ class ZDT3(ZDT):
         g = (9.0 / (self.nvars - 1.0))*sum(x[1:]) + 1.0
         h = 1.0 - math.sqrt(x[0]/g) - (x[0]/g)*math.sin(10.0*math.pi*x[0])
         solution.objectives[:] = [x[0], g*h]
+        
+    def evaluate_batch(self, X):
+        g = (9.0 / (self.nvars - 1.0))*np.sum(X[:, 1:], axis=1) + 1.0
+        h = 1.0 - np.sqrt(X[:, 0]/g) - (X[:, 0]/g)*np.sin(10.0*np.pi*X[:, 0])
+        return np.column_stack((X[:, 0], g*h)), None
                               
 class ZDT4(ZDT):
     
@@ -1652,6 +1724,11 @@ class ZDT4(ZDT):
         h = 1.0 - math.sqrt(x[0] / g)
         solution.objectives[:] = [x[0], g*h]
         
+    def evaluate_batch(self, X):
+        g = 1.0 + 10.0*(self.nvars-1) + np.sum(np.power(X[:, 1:], 2.0) - 10.0*np.cos(4.0*np.pi*X[:, 1:]), axis=1)
+        h = 1.0 - np.sqrt(X[:, 0] / g)
+        return np.column_stack((X[:, 0], g*h)), None
+        
 class ZDT5(ZDT):
     
     def __init__(self):
@@ -1676,4 +1753,10 @@ class ZDT6(ZDT):
         g = 1.0 + 9.0*math.pow(sum(x[1:]) / (self.nvars-1.0), 0.25)
         h = 1.0 - math.pow(x[0] / g, 2.0)
         solution.objectives[:] = [f, g*h]
+        
+    def evaluate_batch(self, X):
+        f = 1.0 - np.exp(-4.0*X[:, 0])*np.power(np.sin(6.0*np.pi*X[:, 0]), 6.0)
+        g = 1.0 + 9.0*np.power(np.sum(X[:, 1:], axis=1) / (self.nvars-1.0), 0.25)
+        h = 1.0 - np.power(X[:, 0] / g, 2.0)
+        return np.column_stack((f, g*h)), None
         
\ No newline at end of file
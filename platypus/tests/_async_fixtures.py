@@ -0,0 +1,66 @@
+# Copyright 2015-2018 David Hadka
+#
+# This file is part of Platypus, a Python module for designing and using
+# evolutionary algorithms (EAs) and multiobjective evolutionary algorithms
+# (MOEAs).
+#
+# Platypus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Platypus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Platypus.  If not, see <http://www.gnu.org/licenses/>.
+"""Coroutine fixtures for test_asynchronous, kept in a separate module since
+the :code:`async def` syntax requires Python 3.5 or later.
+"""
+import json
+import asyncio
+from ..core import Problem
+from ..types import Real
+
+class Simulator(object):
+    """Stand-in for a remote simulator, serving one evaluation per connection."""
+    
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.requests = 0
+    
+    async def handle(self, reader, writer):
+        self.active += 1
+        self.requests += 1
+        self.max_active = max(self.max_active, self.active)
+        x = json.loads((await reader.readline()).decode())
+        await asyncio.sleep(self.delay)
+        writer.write((json.dumps([x[0], 1.0 - x[0] + x[1]]) + "\n").encode())
+        await writer.drain()
+        writer.close()
+        self.active -= 1
+
+class SimulatorProblem(Problem):
+    
+    def __init__(self, port):
+        super(SimulatorProblem, self).__init__(2, 2)
+        self.types[:] = Real(0, 1)
+        self.port = port
+        
+    async def evaluate(self, solution):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write((json.dumps(list(solution.variables)) + "\n").encode())
+        await writer.drain()
+        solution.objectives[:] = json.loads((await reader.readline()).decode())
+        writer.close()
+        
+async def constrained_function(x):
+    await asyncio.sleep(0.001)
+    return [x[0], x[1]], [x[0] - 0.5]
+
+async def function(x):
+    return [x[0], x[1]]
@@ -16,12 +16,21 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with Platypus.  If not, see <http://www.gnu.org/licenses/>.
+import math
 import pickle
+import random
 import unittest
 import functools
+from mock import patch, Mock
 from ..problems import DTLZ2
 from ..algorithms import *
 from ..weights import *
+from ..types import Real
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 class TestPickling(unittest.TestCase):
     
@@ -37,9 +46,21 @@ class TestPickling(unittest.TestCase):
     def test_CMAES(self):
         pickle.dumps(CMAES(self.problem))
         
+    @unittest.skipIf(np is None, "requires NumPy")
+    def test_LargeScaleCMAES(self):
+        pickle.dumps(LargeScaleCMAES(self.problem))
+        
     def test_GDE3(self):
         pickle.dumps(GDE3(self.problem))
         
+    def test_asynchronous(self):
+        for algorithm in [EpsMOEA(self.problem, epsilons=[0.01], asynchronous=True),
+                          GDE3(self.problem, asynchronous=True)]:
+            algorithm.run(200)
+            restored = pickle.loads(pickle.dumps(algorithm))
+            restored.run(400)
+            self.assertGreaterEqual(restored.nfe, 400)
+        
     def test_IBEA(self):
         pickle.dumps(IBEA(self.problem))
 
@@ -78,6 +99,29 @@ class TestRunning(unittest.TestCase):
         
     def test_CMAES(self):
         self.algorithm = CMAES(self.problem)
+        self.post_checks = lambda : self.assertEqual("python", self.algorithm.backend)
+        self._run_test()
+        
+    def test_CMAES_python(self):
+        self.algorithm = CMAES(self.problem, backend="python")
+        self._run_test()
+        
+    @unittest.skipIf(np is None, "requires NumPy")
+    def test_CMAES_numpy(self):
+        self.algorithm = CMAES(self.problem, offspring_size=10, backend="numpy", diagonal_iterations=2)
+        self.post_checks = lambda : self.assertEqual((self.problem.nvars, self.problem.nvars), self.algorithm.C.shape)
+        self._run_test()
+        
+    @unittest.skipIf(np is None, "requires NumPy")
+    def test_LargeScaleCMAES_lm(self):
+        self.algorithm = LargeScaleCMAES(self.problem, offspring_size=10, memory_size=3, update_period=1)
+        self.post_checks = lambda : self.assertEqual((3, self.problem.nvars), self.algorithm.paths.shape)
+        self._run_test()
+        
+    @unittest.skipIf(np is None, "requires NumPy")
+    def test_LargeScaleCMAES_sep(self):
+        self.algorithm = LargeScaleCMAES(self.problem, offspring_size=10, strategy="sep", epsilons=0.01)
+        self.post_checks = lambda : self.assertEqual((self.problem.nvars,), self.algorithm.diag_C.shape)
         self._run_test()
         
     def test_GDE3(self):
@@ -122,10 +166,120 @@ class TestRunning(unittest.TestCase):
         self.algorithm = EpsMOEA(self.problem, epsilons=[0.01])
         self._run_test()
         
+    def test_EpsMOEA_async(self):
+        self.algorithm = EpsMOEA(self.problem, epsilons=[0.01], asynchronous=True)
+        self.post_checks = lambda : self.assertEqual(100, len(self.algorithm.population))
+        self._run_test()
+        
+    def test_GDE3_async(self):
+        self.algorithm = GDE3(self.problem, population_size=20, asynchronous=True)
+        self.post_checks = lambda : self.assertLessEqual(len(self.algorithm.population), 40)
+        self._run_test()
+        
+    def test_PAES(self):
+        self.algorithm = PAES(DTLZ2(6), capacity=20)
+        self.post_checks = lambda : self.assertLessEqual(len(self.algorithm.result), 20)
+        self._run_test()
+        
+    def test_PESA2(self):
+        self.algorithm = PESA2(DTLZ2(6), capacity=20)
+        self.post_checks = lambda : self.assertLessEqual(len(self.algorithm.result), 20)
+        self._run_test()
+        
     def _run_test(self):
         self.algorithm.run(100)
         self.post_checks()
 
+@unittest.skipIf(np is None, "requires NumPy")
+class TestCMAESBackends(unittest.TestCase):
+    
+    def minimize_sphere(self, backend):
+        random.seed(1)
+        problem = Problem(10, 1, function=lambda x: sum([v*v for v in x]))
+        problem.types[:] = Real(-5, 5)
+        
+        algorithm = CMAES(problem, backend=backend)
+        algorithm.run(6000)
+        return min([s.objectives[0] for s in algorithm.result])
+    
+    def test_sphere(self):
+        python_result = self.minimize_sphere("python")
+        numpy_result = self.minimize_sphere("numpy")
+        
+        self.assertLess(python_result, 1e-4)
+        self.assertLess(numpy_result, 1e-4)
+        self.assertAlmostEqual(math.log10(python_result), math.log10(numpy_result), delta=1.0)
+        
+    def test_old_numpy(self):
+        # NumPy versions before 1.17 lack np.random.default_rng
+        with patch("platypus.algorithms.np", Mock(random=Mock(spec=[]))):
+            with self.assertRaises(PlatypusError):
+                CMAES(DTLZ2(), backend="numpy")
+
+def _schwefel(x):
+    # Schwefel's problem 1.2, which is non-separable
+    total = 0.0
+    result = 0.0
+    
+    for v in x:
+        total += v
+        result += total*total
+    
+    return result
+
+@unittest.skipIf(np is None, "requires NumPy")
+class TestLargeScaleCMAES(unittest.TestCase):
+
+    def minimize(self, function, strategy):
+        random.seed(1)
+        problem = Problem(100, 1, function=function)
+        problem.types[:] = Real(-5, 5)
+        
+        algorithm = LargeScaleCMAES(problem, strategy=strategy, offspring_size=20)
+        algorithm.run(10000)
+        return min([s.objectives[0] for s in algorithm.result])
+    
+    def test_sphere(self):
+        self.assertLess(self.minimize(lambda x: sum([v*v for v in x]), "lm"), 1e-4)
+        self.assertLess(self.minimize(lambda x: sum([v*v for v in x]), "sep"), 1e-4)
+    
+    def test_schwefel(self):
+        # starts near 3.4e4 on average
+        self.assertLess(self.minimize(_schwefel, "lm"), 1000.0)
+        self.assertLess(self.minimize(_schwefel, "sep"), 1000.0)
+    
+    def test_covariance(self):
+        # the stored paths must reproduce C = (1 - ccov) C + ccov pc pc^T
+        algorithm = LargeScaleCMAES(DTLZ2(2, 6), memory_size=10, offspring_size=10)
+        algorithm.initialize()
+        algorithm.paths = np.zeros((0, 6))
+        C = np.identity(6)
+        rng = np.random.RandomState(0)
+        
+        for _ in range(4):
+            algorithm.pc = rng.randn(6)
+            algorithm._store_path()
+            C = (1.0 - algorithm.ccov) * C + algorithm.ccov * np.outer(algorithm.pc, algorithm.pc)
+        
+        A = algorithm._transform(np.identity(6)).T
+        self.assertTrue(np.allclose(C, A.dot(A.T)))
+
+    def test_inverse_transform(self):
+        algorithm = LargeScaleCMAES(DTLZ2(2, 20), offspring_size=10, update_period=1)
+        algorithm.run(200)
+        
+        z = np.random.RandomState(0).randn(20)
+        x = algorithm._transform(z[np.newaxis, :])[0]
+        
+        self.assertTrue(len(algorithm.paths) > 0)
+        self.assertTrue(np.allclose(z, algorithm._inverse_transform(x)))
+        
+    def test_backend(self):
+        self.assertEqual("numpy", LargeScaleCMAES(DTLZ2(), backend="numpy").backend)
+        
+        with self.assertRaises(PlatypusError):
+            LargeScaleCMAES(DTLZ2(), backend="python")
+
 class TestMaximizationGuard(unittest.TestCase):
     
     def setUp(self):
@@ -0,0 +1,116 @@
+# Copyright 2015-2018 David Hadka
+#
+# This file is part of Platypus, a Python module for designing and using
+# evolutionary algorithms (EAs) and multiobjective evolutionary algorithms
+# (MOEAs).
+#
+# Platypus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Platypus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Platypus.  If not, see <http://www.gnu.org/licenses/>.
+import sys
+import unittest
+from ..algorithms import NSGAII
+from ..core import Problem, Solution, PlatypusError, _EvaluateJob
+from ..evaluator import Job
+from ..types import Real
+
+if sys.version_info >= (3, 7):
+    import asyncio
+    from ..asynchronous import AsyncEvaluator
+    from . import _async_fixtures
+
+class _SyncJob(Job):
+    
+    def run(self):
+        self.done = True
+
+@unittest.skipIf(sys.version_info < (3, 7), "requires Python 3.7")
+class TestAsyncEvaluator(unittest.TestCase):
+    
+    def setUp(self):
+        self.evaluator = AsyncEvaluator(concurrency=8)
+        self.simulator = _async_fixtures.Simulator()
+        self.server = asyncio.run_coroutine_threadsafe(
+                asyncio.start_server(self.simulator.handle, "127.0.0.1", 0),
+                self.evaluator.loop).result()
+        self.port = self.server.sockets[0].getsockname()[1]
+        
+    def tearDown(self):
+        self.evaluator.loop.call_soon_threadsafe(self.server.close)
+        self.evaluator.close()
+        
+    def test_simulator(self):
+        algorithm = NSGAII(_async_fixtures.SimulatorProblem(self.port), population_size=20, evaluator=self.evaluator)
+        algorithm.run(100)
+        
+        self.assertEqual(algorithm.nfe, self.simulator.requests)
+        self.assertLessEqual(self.simulator.max_active, 8)
+        self.assertGreater(self.simulator.max_active, 1)
+        
+        for solution in algorithm.result:
+            self.assertTrue(solution.evaluated)
+            self.assertAlmostEqual(1.0 - solution.variables[0] + solution.variables[1], solution.objectives[1])
+        
+    def test_function(self):
+        problem = Problem(2, 2, 1, _async_fixtures.constrained_function)
+        problem.types[:] = Real(0, 1)
+        problem.constraints[:] = "<=0"
+        solutions = [Solution(problem) for _ in range(10)]
+        
+        for i, solution in enumerate(solutions):
+            solution.variables[:] = [i / 10.0, 0.5]
+            
+        self.evaluator.evaluate_all([_EvaluateJob(s) for s in solutions], log_frequency=4)
+        
+        self.assertEqual([0.9, 0.5], solutions[9].objectives[:])
+        self.assertEqual(0.0, solutions[5].constraint_violation)
+        self.assertAlmostEqual(0.4, solutions[9].constraint_violation)
+        
+    def test_evaluate_async(self):
+        problem = _async_fixtures.SimulatorProblem(self.port)
+        solutions = [Solution(problem) for _ in range(10)]
+        
+        for solution in solutions:
+            solution.variables[:] = [0.5, 0.5]
+            
+        results = list(self.evaluator.evaluate_async([_EvaluateJob(s) for s in solutions], max_pending=3))
+        
+        self.assertEqual(10, len(results))
+        self.assertLessEqual(self.simulator.max_active, 3)
+        self.assertTrue(all([s.evaluated for s in solutions]))
+        
+    def test_sync_job(self):
+        results = self.evaluator.evaluate_all([_SyncJob() for _ in range(3)])
+        self.assertTrue(all([job.done for job in results]))
+
+@unittest.skipIf(sys.version_info < (3, 7), "requires Python 3.7")
+class TestSynchronousEvaluation(unittest.TestCase):
+    
+    def test_evaluate(self):
+        solution = Solution(_async_fixtures.SimulatorProblem(0))
+        solution.variables[:] = [0.5, 0.5]
+        
+        with self.assertRaises(PlatypusError):
+            solution.evaluate()
+            
+        self.assertFalse(solution.evaluated)
+        
+    def test_function(self):
+        problem = Problem(2, 2, function=_async_fixtures.function)
+        problem.types[:] = Real(0, 1)
+        solution = Solution(problem)
+        solution.variables[:] = [0.5, 0.5]
+        
+        with self.assertRaises(PlatypusError):
+            solution.evaluate()
+            
+        self.assertFalse(solution.evaluated)
@@ -0,0 +1,211 @@
+# Copyright 2015-2018 David Hadka
+#
+# This file is part of Platypus, a Python module for designing and using
+# evolutionary algorithms (EAs) and multiobjective evolutionary algorithms
+# (MOEAs).
+#
+# Platypus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Platypus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Platypus.  If not, see <http://www.gnu.org/licenses/>.
+import pickle
+import shutil
+import os.path
+import tempfile
+import threading
+import unittest
+from ..core import Problem, Solution, Algorithm
+from ..cache import EvaluationCache, PersistentEvaluationCache
+from ..algorithms import GeneticAlgorithm
+from ..experimenter import experiment
+from ..types import Integer
+
+class _Evaluate(Algorithm):
+    
+    def step(self):
+        pass
+
+class _CountingProblem(Problem):
+    
+    def __init__(self):
+        super(_CountingProblem, self).__init__(2, 1)
+        self.types[:] = Integer(0, 3)
+        self.evaluations = 0
+        
+    def evaluate(self, solution):
+        self.evaluations += 1
+        solution.objectives[:] = [sum(solution.variables)]
+
+class TestEvaluationCache(unittest.TestCase):
+    
+    def setUp(self):
+        self.problem = _CountingProblem()
+        
+    def create(self, *values):
+        solution = Solution(self.problem)
+        solution.variables[:] = [t.encode(v) for t, v in zip(self.problem.types, values)]
+        return solution
+    
+    def test_hits(self):
+        cache = EvaluationCache()
+        algorithm = _Evaluate(self.problem, cache=cache)
+        
+        algorithm.evaluate_all([self.create(1, 2), self.create(1, 2), self.create(2, 1)])
+        self.assertEqual(2, self.problem.evaluations)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(2, cache.misses)
+        self.assertEqual(3, algorithm.nfe)
+        
+        solution = self.create(2, 1)
+        algorithm.evaluate_all([solution])
+        self.assertEqual(2, self.problem.evaluations)
+        self.assertEqual(2, cache.hits)
+        self.assertTrue(solution.evaluated)
+        self.assertEqual([3], solution.objectives[:])
+        
+    def test_count_hits(self):
+        cache = EvaluationCache(count_hits=False)
+        algorithm = _Evaluate(self.problem, cache=cache)
+        algorithm.evaluate_all([self.create(1, 2), self.create(1, 2), self.create(1, 2)])
+        
+        self.assertEqual(1, algorithm.nfe)
+        self.assertEqual(2, cache.hits)
+        
+    def test_eviction(self):
+        cache = EvaluationCache(maxsize=2)
+        algorithm = _Evaluate(self.problem, cache=cache)
+        algorithm.evaluate_all([self.create(0, 0), self.create(0, 1)])
+        algorithm.evaluate_all([self.create(0, 0)])
+        algorithm.evaluate_all([self.create(0, 2)])
+        self.assertEqual(2, len(cache))
+        
+        # (0, 1) was the least recently used result
+        algorithm.evaluate_all([self.create(0, 0), self.create(0, 1)])
+        self.assertEqual(4, self.problem.evaluations)
+
+class TestPersistentEvaluationCache(unittest.TestCase):
+    
+    def setUp(self):
+        self.problem = _CountingProblem()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "cache.db")
+        
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        
+    def create(self, *values):
+        solution = Solution(self.problem)
+        solution.variables[:] = [t.encode(v) for t, v in zip(self.problem.types, values)]
+        return solution
+        
+    def test_shared(self):
+        cache = PersistentEvaluationCache(self.path)
+        _Evaluate(self.problem, cache=cache).evaluate_all([self.create(1, 2), self.create(2, 1)])
+        cache.close()
+        
+        cache = PersistentEvaluationCache(self.path)
+        algorithm = _Evaluate(self.problem, cache=cache)
+        solution = self.create(1, 2)
+        algorithm.evaluate_all([solution, self.create(3, 3)])
+        cache.close()
+        
+        self.assertEqual(3, self.problem.evaluations)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(3, len(cache))
+        self.assertEqual([3], solution.objectives[:])
+        
+    def test_pickle(self):
+        cache = pickle.loads(pickle.dumps(PersistentEvaluationCache(self.path)))
+        _Evaluate(self.problem, cache=cache).evaluate_all([self.create(1, 2)])
+        
+        cache = pickle.loads(pickle.dumps(cache))
+        _Evaluate(self.problem, cache=cache).evaluate_all([self.create(1, 2)])
+        cache.close()
+        
+        self.assertEqual(1, self.problem.evaluations)
+        self.assertEqual(1, cache.hits)
+        
+    def test_namespace(self):
+        cache = PersistentEvaluationCache(self.path)
+        other = _CountingProblem()
+        other.nobjs = 2
+        
+        _Evaluate(self.problem, cache=cache).evaluate_all([self.create(1, 2)])
+        solution = Solution(other)
+        solution.variables[:] = self.create(1, 2).variables[:]
+        self.assertFalse(cache.load(solution))
+        
+        cache.namespace = "other"
+        self.assertFalse(cache.load(self.create(1, 2)))
+        cache.close()
+        
+    def test_claimed(self):
+        cache = PersistentEvaluationCache(self.path)
+        other = PersistentEvaluationCache(self.path)
+        claimed = self.create(1, 2)
+        other._claim([other.key(claimed)])
+        
+        def finish():
+            claimed.objectives[:] = [-1]
+            other.store(claimed)
+        
+        # waits for the result from the other cache instead of evaluating
+        timer = threading.Timer(0.1, finish)
+        timer.start()
+        solution = self.create(1, 2)
+        _Evaluate(self.problem, cache=cache).evaluate_all([solution, self.create(2, 2)])
+        timer.join()
+        cache.close()
+        other.close()
+        
+        self.assertEqual(1, self.problem.evaluations)
+        self.assertEqual([-1], solution.objectives[:])
+        
+    def test_lease(self):
+        cache = PersistentEvaluationCache(self.path, lease=0.0)
+        other = PersistentEvaluationCache(self.path)
+        other._claim([other.key(self.create(1, 2))])
+        
+        _Evaluate(self.problem, cache=cache).evaluate_all([self.create(1, 2)])
+        cache.close()
+        other.close()
+        
+        self.assertEqual(1, self.problem.evaluations)
+        
+    def test_release(self):
+        cache = PersistentEvaluationCache(self.path)
+        algorithm = _Evaluate(self.problem, cache=cache)
+        self.problem.evaluate = None
+        
+        with self.assertRaises(TypeError):
+            algorithm.evaluate_all([self.create(1, 2)])
+        
+        del self.problem.evaluate
+        algorithm.evaluate_all([self.create(1, 2)])
+        cache.close()
+        
+        self.assertEqual(1, self.problem.evaluations)
+        
+    def test_experiment(self):
+        cache = PersistentEvaluationCache(self.path)
+        experiment((GeneticAlgorithm, {"population_size" : 10}), self.problem, seeds=3, nfe=100, cache=cache)
+        
+        # the seeds sample far more than the problem's distinct solutions, but
+        # each distinct solution is evaluated only once across all seeds
+        distinct = 1
+        
+        for t in self.problem.types:
+            distinct *= t.max_value - t.min_value + 1
+            
+        self.assertLess(distinct, 3*100)
+        self.assertEqual(len(cache), self.problem.evaluations)
+        self.assertLessEqual(self.problem.evaluations, distinct)
+        cache.close()
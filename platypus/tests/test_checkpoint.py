@@ -0,0 +1,137 @@
+# Copyright 2015-2018 David Hadka
+#
+# This file is part of Platypus, a Python module for designing and using
+# evolutionary algorithms (EAs) and multiobjective evolutionary algorithms
+# (MOEAs).
+#
+# Platypus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Platypus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Platypus.  If not, see <http://www.gnu.org/licenses/>.
+import time
+import random
+import shutil
+import os.path
+import tempfile
+import unittest
+from ..core import Algorithm, MaxTime, MaxEvaluations
+from ..checkpoint import Checkpoint
+from ..algorithms import NSGAII, CMAES, GDE3
+from ..problems import DTLZ2
+from ..evaluator import MapEvaluator, ThreadPoolEvaluator
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None
+
+class _Interrupt(Exception):
+    pass
+
+class TestCheckpoint(unittest.TestCase):
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "run.ckpt")
+        
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        
+    def interrupt_at(self, nfe):
+        def callback(algorithm):
+            if algorithm.nfe >= nfe:
+                raise _Interrupt()
+            
+        return callback
+    
+    def check_resume(self, create):
+        random.seed(1)
+        expected = create()
+        expected.run(2000)
+        
+        random.seed(1)
+        algorithm = create()
+        
+        with self.assertRaises(_Interrupt):
+            algorithm.run(2000, callback=self.interrupt_at(1500),
+                          checkpoint=Checkpoint(self.path, frequency=500))
+            
+        random.seed(2)
+        resumed = Algorithm.resume(self.path)
+        
+        self.assertEqual(expected.nfe, resumed.nfe)
+        self.assertEqual([s.variables[:] for s in expected.result],
+                         [s.variables[:] for s in resumed.result])
+        self.assertEqual([s.objectives[:] for s in expected.result],
+                         [s.objectives[:] for s in resumed.result])
+        
+    def test_resume_NSGAII(self):
+        self.check_resume(lambda: NSGAII(DTLZ2()))
+        
+    def test_resume_CMAES(self):
+        self.check_resume(lambda: CMAES(DTLZ2()))
+        
+    def test_final_checkpoint(self):
+        algorithm = NSGAII(DTLZ2())
+        algorithm.run(500, checkpoint=Checkpoint(self.path, frequency=10000))
+        
+        restored, condition, checkpoint = Checkpoint.load(self.path)
+        self.assertEqual(algorithm.nfe, restored.nfe)
+        self.assertTrue(condition(restored))
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+        
+    def test_evaluator_not_saved(self):
+        evaluator = MapEvaluator()
+        algorithm = NSGAII(DTLZ2())
+        algorithm.run(200, checkpoint=Checkpoint(self.path))
+        
+        restored, _, _ = Checkpoint.load(self.path, evaluator)
+        self.assertIs(evaluator, restored.evaluator)
+        
+    def test_resume_MaxTime(self):
+        def callback(algorithm):
+            if time.time() - start_time >= 0.2:
+                raise _Interrupt()
+        
+        start_time = time.time()
+        
+        with self.assertRaises(_Interrupt):
+            NSGAII(DTLZ2()).run(MaxTime(1.0), callback=callback,
+                                checkpoint=Checkpoint(self.path, frequency=100))
+        
+        # the time between the interruption and the resume is not counted
+        time.sleep(1.0)
+        saved, condition, _ = Checkpoint.load(self.path)
+        self.assertFalse(condition(saved))
+        
+        resumed = Algorithm.resume(self.path)
+        self.assertGreater(resumed.nfe, saved.nfe)
+        
+    @unittest.skipIf(ThreadPoolExecutor is None, "requires concurrent.futures")
+    def test_resume_asynchronous(self):
+        def callback(algorithm):
+            if algorithm.nfe >= 1000 and len(algorithm.parents) > 0:
+                raise _Interrupt()
+        
+        with ThreadPoolEvaluator(4) as evaluator:
+            algorithm = GDE3(DTLZ2(), asynchronous=True, evaluator=evaluator)
+            condition = MaxEvaluations(2000)
+            
+            # stop while offspring are still being evaluated
+            with self.assertRaises(_Interrupt):
+                algorithm.run(condition, callback=callback)
+                
+            Checkpoint(self.path).save(algorithm, condition)
+            saved, _, _ = Checkpoint.load(self.path)
+            self.assertEqual({}, saved.parents)
+            
+            resumed = Algorithm.resume(self.path, evaluator=evaluator)
+            self.assertGreaterEqual(resumed.nfe, 2000)
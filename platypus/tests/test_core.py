@@ -17,12 +17,22 @@
 # You should have received a copy of the GNU General Public License
 # along with Platypus.  If not, see <http://www.gnu.org/licenses/>.
 import copy
+import pickle
 import random
 import unittest
 from ..core import Constraint, Problem, Solution, ParetoDominance, Archive, \
         nondominated_sort, nondominated_truncate, nondominated_prune, \
         POSITIVE_INFINITY, nondominated_split, truncate_fitness, normalize, \
-        EpsilonBoxArchive
+        EpsilonBoxArchive, Population, SolutionView, crowding_distance, \
+        EpsilonDominance, AdaptiveGridArchive, Algorithm, PlatypusError
+from ..problems import DTLZ2, DTLZ7, ZDT1
+from ..types import Real, Binary
+from ..evaluator import MapEvaluator
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 def createSolution(*args):
     problem = Problem(0, len(args))
@@ -45,6 +55,27 @@ class TestSolution(unittest.TestCase):
         self.assertEqual(2, clone.constraint_violation)
         self.assertEqual(True, clone.evaluated)
         
+    def test_copy_for_offspring(self):
+        problem = Problem(2, 2)
+        problem.types[:] = [Real(0, 1), Binary(3)]
+        orig = Solution(problem)
+        orig.variables[:] = [0.5, [True, False, True]]
+        orig.objectives[:] = [1.0, 2.0]
+        orig.evaluated = True
+        orig.rank = 1
+        
+        clone = orig.copy_for_offspring()
+        
+        self.assertIs(orig.problem, clone.problem)
+        self.assertEqual(orig.variables[:], clone.variables[:])
+        self.assertEqual([1.0, 2.0], clone.objectives[:])
+        self.assertEqual(True, clone.evaluated)
+        self.assertFalse(hasattr(clone, "rank"))
+        
+        clone.variables[1][0] = False
+        clone.objectives[0] = 3.0
+        self.assertEqual([True, False, True], orig.variables[1])
+        self.assertEqual(1.0, orig.objectives[0])
 
 class TestConstraint(unittest.TestCase):
     
@@ -89,6 +120,110 @@ class TestConstraint(unittest.TestCase):
         self.assertEqual(0.0, constraint(1.0))
         self.assertEqual(0.0, constraint(-1.0))
         
+class _BatchProblem(Problem):
+    
+    def __init__(self):
+        super(_BatchProblem, self).__init__(2, 2, 1)
+        self.types[:] = Real(0, 1)
+        self.constraints[:] = "<=0"
+        self.batches = 0
+        
+    def evaluate(self, solution):
+        x = solution.variables
+        solution.objectives[:] = [x[0], x[1]]
+        solution.constraints[:] = [x[0] + x[1] - 1.0]
+        
+    def evaluate_batch(self, X):
+        self.batches += 1
+        return X.copy(), X[:, :1] + X[:, 1:] - 1.0
+    
+class _IncorrectBatchProblem(_BatchProblem):
+    
+    def evaluate_batch(self, X):
+        return X[:, :1], X[:, :1]
+    
+class _Evaluate(Algorithm):
+    
+    def step(self):
+        pass
+
+class TestEvaluateBatch(unittest.TestCase):
+    
+    def test_problems(self):
+        random.seed(5)
+        
+        for problem in [DTLZ2(3), DTLZ7(3), ZDT1()]:
+            solutions = [Solution(problem) for _ in range(20)]
+            expected = [Solution(problem) for _ in range(20)]
+            
+            for s1, s2 in zip(solutions, expected):
+                s1.variables[:] = [random.random() for _ in range(problem.nvars)]
+                s2.variables[:] = s1.variables[:]
+                s2.evaluate()
+                
+            _Evaluate(problem).evaluate_all(solutions)
+            
+            for s1, s2 in zip(solutions, expected):
+                self.assertTrue(s1.evaluated)
+                
+                for o1, o2 in zip(s1.objectives, s2.objectives):
+                    self.assertAlmostEqual(o2, o1, delta=1e-12)
+                    
+    @unittest.skipIf(np is None, "requires NumPy")
+    def test_evaluate_all(self):
+        problem = _BatchProblem()
+        solutions = [Solution(problem) for _ in range(4)]
+        
+        for i, solution in enumerate(solutions):
+            solution.variables[:] = [i / 4.0, 0.5]
+            
+        algorithm = _Evaluate(problem)
+        algorithm.evaluate_all(solutions)
+        
+        self.assertEqual(1, problem.batches)
+        self.assertEqual(4, algorithm.nfe)
+        self.assertEqual([0.75, 0.5], solutions[3].objectives[:])
+        self.assertEqual([0.0, 0.0, 0.0, 0.25], [s.constraint_violation for s in solutions])
+        self.assertEqual([True, True, True, False], [s.feasible for s in solutions])
+        
+    @unittest.skipIf(np is None, "requires NumPy")
+    def test_batched_evaluator(self):
+        problem = _BatchProblem()
+        solutions = [Solution(problem) for _ in range(4)]
+        
+        for i, solution in enumerate(solutions):
+            solution.variables[:] = [i / 4.0, 0.5]
+            
+        # a custom map function stands in for a pool of workers
+        evaluator = MapEvaluator(lambda func, jobs: map(func, jobs), batch_size=2)
+        _Evaluate(problem, evaluator=evaluator).evaluate_all(solutions)
+        
+        self.assertEqual(2, problem.batches)
+        self.assertTrue(all([s.evaluated for s in solutions]))
+        
+    def test_overridden_evaluate(self):
+        class _Slow(DTLZ2):
+            
+            def evaluate(self, solution):
+                super(_Slow, self).evaluate(solution)
+                solution.slow = True
+        
+        problem = _Slow()
+        solution = Solution(problem)
+        solution.variables[:] = [0.5]*problem.nvars
+        _Evaluate(problem).evaluate_all([solution])
+        
+        self.assertTrue(solution.slow)
+        
+    @unittest.skipIf(np is None, "requires NumPy")
+    def test_incorrect_shape(self):
+        problem = _IncorrectBatchProblem()
+        solution = Solution(problem)
+        solution.variables[:] = [0.5, 0.5]
+        
+        with self.assertRaises(PlatypusError):
+            _Evaluate(problem).evaluate_all([solution])
+
 class TestParetoDominance(unittest.TestCase):
     
     def test_dominance(self):
@@ -115,6 +250,35 @@ class TestParetoDominance(unittest.TestCase):
         self.assertEqual(0, dominance.compare(s1, s3))
         self.assertEqual(0, dominance.compare(s3, s1))
         
+@unittest.skipIf(np is None, "requires NumPy")
+class TestCompareMany(unittest.TestCase):
+    
+    def setUp(self):
+        random.seed(5)
+        self.problem = Problem(0, 3, 1)
+        self.problem.directions[1] = Problem.MAXIMIZE
+        self.solutions = []
+        
+        for _ in range(40):
+            solution = Solution(self.problem)
+            solution.objectives[:] = [random.randint(0, 3) / 4.0 for _ in range(3)]
+            solution.constraint_violation = random.choice([0.0, 0.0, 0.5, 1.0])
+            self.solutions.append(solution)
+    
+    def check(self, dominance):
+        expected = [[dominance.compare(x, y) for y in self.solutions] for x in self.solutions]
+        
+        self.assertEqual(expected[0], dominance.compare_many(self.solutions[0], self.solutions))
+        self.assertEqual(expected, dominance.all_pairs(self.solutions))
+        self.assertEqual(expected, dominance.all_pairs(Population(self.problem, self.solutions)))
+        self.assertEqual([], dominance.compare_many(self.solutions[0], []))
+        
+    def test_pareto(self):
+        self.check(ParetoDominance())
+        
+    def test_epsilon(self):
+        self.check(EpsilonDominance([0.3, 0.2]))
+
 class TestArchive(unittest.TestCase):
     
     def test_dominance(self):
@@ -138,6 +302,55 @@ class TestArchive(unittest.TestCase):
         
         self.assertEqual(3, len(archive))
         
+class TestIndexedArchive(unittest.TestCase):
+    
+    class LinearDominance(ParetoDominance):
+        pass
+    
+    def check(self, nobjs, nconstrs):
+        random.seed(nobjs)
+        problem = Problem(0, nobjs, nconstrs)
+        problem.directions[0] = Problem.MAXIMIZE
+        indexed = Archive()
+        linear = Archive(self.LinearDominance())
+        
+        for _ in range(500):
+            solution = Solution(problem)
+            solution.objectives[:] = [float(random.randint(0, 10)) for _ in range(nobjs)]
+            solution.constraint_violation = random.choice([0.0, 0.0, 0.0, 1.0]) if nconstrs > 0 else 0.0
+            
+            self.assertEqual(linear.add(solution), indexed.add(solution))
+            
+            if random.random() < 0.05:
+                member = random.choice(indexed[:])
+                self.assertTrue(indexed.remove(member))
+                self.assertTrue(linear.remove(member))
+                
+            self.assertEqual(linear[:], indexed[:])
+            
+    def test_sorted_list(self):
+        self.check(2, 0)
+        
+    def test_ndtree(self):
+        self.check(3, 0)
+        self.check(5, 0)
+        
+    def test_constraints(self):
+        self.check(2, 1)
+        self.check(4, 1)
+        
+    def test_reassign_contents(self):
+        s1 = createSolution(0.0, 1.0)
+        s2 = createSolution(1.0, 0.0)
+        s3 = createSolution(0.5, 0.5)
+        
+        archive = Archive()
+        archive += [s1, s2]
+        archive._contents = [s1]
+        
+        self.assertTrue(archive.add(s3))
+        self.assertEqual([s1, s3], archive[:])
+
 class TestNondominatedSort(unittest.TestCase):
     
     def setUp(self):
@@ -263,6 +476,64 @@ class TestNondominatedSort(unittest.TestCase):
         self.assertIn(self.s5, result)
         self.assertIn(self.s3, result)
         
+class TestNondominatedSortEngine(unittest.TestCase):
+    
+    def archive_sort(self, solutions):
+        rank = 0
+        
+        while len(solutions) > 0:
+            archive = Archive()
+            archive += solutions
+            
+            for solution in archive:
+                solution.rank = rank
+                
+            crowding_distance(archive)
+            solutions = [x for x in solutions if x not in archive]
+            rank += 1
+    
+    def check(self, nobjs, nconstrs, size, population=False):
+        random.seed(nobjs*1000 + size)
+        problem = Problem(0, nobjs, nconstrs)
+        problem.directions[0] = Problem.MAXIMIZE
+        solutions = []
+        
+        for _ in range(size):
+            solution = Solution(problem)
+            solution.objectives[:] = [float(random.randint(0, 4)) for _ in range(nobjs)]
+            solution.constraint_violation = random.choice([0.0, 0.0, 0.5, 1.0]) if nconstrs > 0 else 0.0
+            solutions.append(solution)
+            
+        self.archive_sort(solutions)
+        expected = [(s.rank, s.crowding_distance) for s in solutions]
+        
+        if population:
+            solutions = Population(problem, solutions)
+            
+        nondominated_sort(solutions)
+        self.assertEqual(expected, [(s.rank, s.crowding_distance) for s in solutions])
+        
+    def test_sweep2(self):
+        self.check(2, 0, 200)
+        
+    def test_sweep3(self):
+        self.check(3, 0, 200)
+        
+    def test_constraints(self):
+        self.check(2, 1, 200)
+        self.check(3, 1, 200)
+        
+    @unittest.skipIf(np is None, "requires NumPy")
+    def test_matrix(self):
+        self.check(5, 0, 200)
+        self.check(5, 1, 200)
+        
+    @unittest.skipIf(np is None, "requires NumPy")
+    def test_population(self):
+        self.check(2, 0, 200, population=True)
+        self.check(3, 1, 200, population=True)
+        self.check(5, 1, 200, population=True)
+        
 class TestNormalize(unittest.TestCase):
     
     def test_normalize(self):
@@ -277,6 +548,125 @@ class TestNormalize(unittest.TestCase):
         self.assertEqual([1.0, 1.0], s2.normalized_objectives)
         self.assertEqual([0.5, 0.0], s3.normalized_objectives)
         
+@unittest.skipIf(np is None, "requires NumPy")
+class TestPopulation(unittest.TestCase):
+    
+    def setUp(self):
+        random.seed(12345)
+        self.problem = DTLZ2(3)
+        self.solutions = [self.problem.random() for _ in range(50)]
+        self.population = Population(self.problem, self.solutions, capacity=4)
+    
+    def test_copy_values(self):
+        self.assertEqual(50, len(self.population))
+        self.assertEqual((50, self.problem.nvars), self.population.variables.shape)
+        self.assertEqual((50, 3), self.population.objectives.shape)
+        
+        for original, view in zip(self.solutions, self.population):
+            self.assertIsInstance(view, SolutionView)
+            self.assertEqual(original.variables[:], view.variables[:])
+            self.assertEqual(original.objectives[:], view.objectives[:])
+            self.assertTrue(view.evaluated)
+    
+    def test_view_writes_through(self):
+        view = self.population[3]
+        view.objectives[1] = 42.0
+        view.constraint_violation = 1.5
+        
+        self.assertEqual(42.0, self.population.objectives[3, 1])
+        self.assertEqual(1.5, self.population.constraint_violation[3])
+        
+        view.evaluated = False
+        view.evaluate()
+        
+        self.assertTrue(self.population.evaluated[3])
+        self.assertEqual(self.solutions[3].objectives[:], view.objectives[:])
+        
+    def test_deepcopy(self):
+        view = self.population[0]
+        view.rank = 2
+        clone = copy.deepcopy(view)
+        
+        self.assertNotIsInstance(clone, SolutionView)
+        self.assertEqual(view.variables[:], clone.variables[:])
+        self.assertEqual(2, clone.rank)
+        
+        clone.variables[0] = 0.5
+        self.assertNotEqual(0.5, self.population.variables[0, 0])
+        
+    def test_copy_for_offspring(self):
+        view = self.population[0]
+        view.rank = 2
+        clone = view.copy_for_offspring()
+        
+        self.assertNotIsInstance(clone, SolutionView)
+        self.assertEqual(view.variables[:], clone.variables[:])
+        self.assertEqual(view.objectives[:], clone.objectives[:])
+        self.assertFalse(hasattr(clone, "rank"))
+        
+        clone.variables[0] = 0.5
+        self.assertNotEqual(0.5, self.population.variables[0, 0])
+        
+    def test_pickle(self):
+        clone = pickle.loads(pickle.dumps(self.population[0]))
+        
+        self.assertNotIsInstance(clone, SolutionView)
+        self.assertEqual(self.population[0].objectives[:], clone.objectives[:])
+        
+    def test_crowding_distance(self):
+        crowding_distance(self.solutions)
+        crowding_distance(self.population)
+        
+        for original, view in zip(self.solutions, self.population):
+            self.assertEqual(original.crowding_distance, view.crowding_distance)
+            
+    def test_normalize(self):
+        expected = normalize(self.solutions)
+        actual = normalize(self.population)
+        
+        self.assertEqual(expected, actual)
+        
+        for original, view in zip(self.solutions, self.population):
+            self.assertEqual(original.normalized_objectives, view.normalized_objectives)
+
+class TestAdaptiveGridArchive(unittest.TestCase):
+    
+    def test_density(self):
+        random.seed(3)
+        problem = Problem(0, 3)
+        archive = AdaptiveGridArchive(20, 3, 4)
+        
+        for _ in range(300):
+            solution = Solution(problem)
+            solution.objectives[:] = [random.randint(0, 8) / 4.0 for _ in range(3)]
+            archive.add(solution)
+            
+            if random.random() < 0.05:
+                archive.remove(random.choice(archive[:]))
+            
+            self.assertLessEqual(len(archive), 20)
+            
+            counts = {}
+            
+            for member in archive:
+                index = archive.find_index(member)
+                self.assertEqual(archive._compute_index(member), index)
+                counts[index] = counts.get(index, 0) + 1
+                
+            self.assertEqual(counts, dict(archive.density))
+            
+            if len(archive) > 0:
+                densest = max(counts.values())
+                expected = [m for m in archive if counts[archive.find_index(m)] == densest][0]
+                self.assertIs(expected, archive.pick_from_densest())
+                self.assertEqual(archive.find_index(expected), archive.find_densest())
+                
+    def test_sparse(self):
+        archive = AdaptiveGridArchive(100, 10, 8)
+        archive.add(createSolution(*range(10)))
+        
+        self.assertEqual(1, len(archive.density))
+
 class TestEpsilonBoxArchive(unittest.TestCase):
     
     def test_improvements(self):
@@ -290,4 +680,27 @@ class TestEpsilonBoxArchive(unittest.TestCase):
         archive = EpsilonBoxArchive([0.1])
         
         archive.extend([s1, s2, s3, s4, s5, s6])
-        self.assertEqual(2, archive.improvements)
\ No newline at end of file
+        self.assertEqual(2, archive.improvements)
+        
+    def test_box_index(self):
+        class LinearDominance(EpsilonDominance):
+            pass
+        
+        random.seed(7)
+        problem = Problem(0, 3, 1)
+        problem.directions[2] = Problem.MAXIMIZE
+        indexed = EpsilonBoxArchive([0.1, 0.2])
+        linear = EpsilonBoxArchive([0.1, 0.2])
+        linear._dominance = LinearDominance([0.1, 0.2])
+        
+        for _ in range(500):
+            solution = Solution(problem)
+            solution.objectives[:] = [random.random() for _ in range(3)]
+            solution.constraint_violation = random.choice([0.0, 0.0, 0.0, 1.0])
+            indexed.add(solution)
+            linear.add(solution)
+            
+            self.assertEqual(linear[:], indexed[:])
+            
+        self.assertEqual(linear.improvements, indexed.improvements)
+        self.assertIsNotNone(indexed._index)
@@ -0,0 +1,207 @@
+# Copyright 2015-2018 David Hadka
+#
+# This file is part of Platypus, a Python module for designing and using
+# evolutionary algorithms (EAs) and multiobjective evolutionary algorithms
+# (MOEAs).
+#
+# Platypus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Platypus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Platypus.  If not, see <http://www.gnu.org/licenses/>.
+import unittest
+import time
+import pickle
+from ..evaluator import Job, BatchJob, MapEvaluator, SubmitEvaluator, \
+    ProcessPoolEvaluator, ThreadPoolEvaluator, register_problem, unregister_problem, registered_key
+from ..core import Solution, _EvaluateJob
+from ..problems import DTLZ2
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None
+
+class _SleepJob(Job):
+    
+    def __init__(self, index, delay):
+        super(_SleepJob, self).__init__()
+        self.index = index
+        self.delay = delay
+        self.done = False
+        
+    def run(self):
+        time.sleep(self.delay)
+        self.done = True
+
+class TestEvaluateAsync(unittest.TestCase):
+    
+    def test_map(self):
+        jobs = [_SleepJob(i, 0.0) for i in range(5)]
+        results = list(MapEvaluator().evaluate_async(jobs))
+        
+        self.assertEqual(list(range(5)), [job.index for job in results])
+        self.assertTrue(all([job.done for job in results]))
+        
+    def test_lazy(self):
+        completed = []
+        
+        def jobs():
+            for i in range(5):
+                # each job is requested only after the previous one completed
+                self.assertEqual(i, len(completed))
+                yield _SleepJob(i, 0.0)
+        
+        for job in MapEvaluator().evaluate_async(jobs()):
+            completed.append(job)
+            
+        self.assertEqual(5, len(completed))
+        
+    @unittest.skipIf(ThreadPoolExecutor is None, "requires concurrent.futures")
+    def test_completion_order(self):
+        with ThreadPoolExecutor(2) as executor:
+            evaluator = SubmitEvaluator(executor.submit)
+            jobs = [_SleepJob(0, 0.2), _SleepJob(1, 0.0), _SleepJob(2, 0.0)]
+            results = list(evaluator.evaluate_async(jobs, max_pending=2))
+            
+        self.assertEqual([1, 2, 0], [job.index for job in results])
+        self.assertTrue(all([job.done for job in results]))
+        
+    @unittest.skipIf(ThreadPoolExecutor is None, "requires concurrent.futures")
+    def test_max_pending(self):
+        submitted = []
+        
+        with ThreadPoolExecutor(4) as executor:
+            evaluator = SubmitEvaluator(executor.submit)
+            
+            def jobs():
+                for i in range(6):
+                    submitted.append(i)
+                    yield _SleepJob(i, 0.01)
+                    
+            iterator = evaluator.evaluate_async(jobs(), max_pending=3)
+            next(iterator)
+            self.assertLessEqual(len(submitted), 4)
+            self.assertEqual(6, 1 + len(list(iterator)))
+
+@unittest.skipIf(ThreadPoolExecutor is None, "requires concurrent.futures")
+class TestThreadPoolEvaluator(unittest.TestCase):
+    
+    def test_evaluate_all(self):
+        for batch_size in [None, 2, "adaptive"]:
+            with ThreadPoolEvaluator(3, batch_size=batch_size) as evaluator:
+                results = evaluator.evaluate_all([_SleepJob(i, 0.001) for i in range(7)], log_frequency=3)
+                
+            self.assertEqual(list(range(7)), [job.index for job in results])
+            self.assertTrue(all([job.done for job in results]))
+            
+    def test_evaluate_async(self):
+        with ThreadPoolEvaluator(2) as evaluator:
+            jobs = [_SleepJob(0, 0.2), _SleepJob(1, 0.0), _SleepJob(2, 0.0)]
+            results = list(evaluator.evaluate_async(jobs))
+            
+        self.assertEqual([1, 2, 0], [job.index for job in results])
+
+class TestBatchedDispatch(unittest.TestCase):
+    
+    def test_fixed(self):
+        batches = []
+        
+        def map_func(func, jobs):
+            jobs = list(jobs)
+            batches.extend(jobs)
+            return map(func, jobs)
+        
+        evaluator = MapEvaluator(map_func, batch_size=3)
+        results = evaluator.evaluate_all([_SleepJob(i, 0.0) for i in range(7)])
+        
+        self.assertEqual(list(range(7)), [job.index for job in results])
+        self.assertTrue(all([job.done for job in results]))
+        self.assertEqual([3, 3, 1], [batch.size for batch in batches])
+        self.assertTrue(all([isinstance(batch, BatchJob) for batch in batches]))
+        
+    def test_adaptive(self):
+        evaluator = MapEvaluator(batch_size="adaptive")
+        results = evaluator.evaluate_all([_SleepJob(i, 0.001) for i in range(8)], log_frequency=4)
+        
+        self.assertEqual(list(range(8)), [job.index for job in results])
+        self.assertGreater(evaluator.job_time, 0.0)
+        
+    def test_solutions(self):
+        problem = DTLZ2()
+        solutions = [Solution(problem) for _ in range(10)]
+        expected = [Solution(problem) for _ in range(10)]
+        
+        for i in range(10):
+            solutions[i].variables[:] = [i / 10.0]*problem.nvars
+            expected[i].variables[:] = [i / 10.0]*problem.nvars
+            expected[i].evaluate()
+        
+        evaluator = MapEvaluator(batch_size=4)
+        results = evaluator.evaluate_all([_EvaluateJob(s) for s in solutions])
+        
+        self.assertEqual(solutions, [job.solution for job in results])
+        
+        for solution, expected_solution in zip(solutions, expected):
+            self.assertTrue(solution.evaluated)
+            self.assertEqual(expected_solution.objectives[:], solution.objectives[:])
+            self.assertEqual(0.0, solution.constraint_violation)
+
+class TestProblemRegistry(unittest.TestCase):
+    
+    def setUp(self):
+        self.problem = DTLZ2()
+        self.problem.table = list(range(10000))
+        
+    def tearDown(self):
+        unregister_problem(self.problem)
+        
+    def test_roundtrip(self):
+        solution = Solution(self.problem)
+        solution.variables[:] = [0.5]*self.problem.nvars
+        unregistered = len(pickle.dumps(_EvaluateJob(solution)))
+        
+        key = register_problem(self.problem)
+        self.assertEqual(key, registered_key(self.problem))
+        
+        # the worker receives only the variables
+        data = pickle.dumps(_EvaluateJob(solution))
+        self.assertLess(len(data), unregistered / 10)
+        
+        job = pickle.loads(data)
+        self.assertIs(self.problem, job.solution.problem)
+        self.assertIsNot(solution, job.solution)
+        self.assertEqual(solution.variables[:], job.solution.variables[:])
+        job.run()
+        
+        # the results are written into the original solution
+        result = pickle.loads(pickle.dumps(job))
+        self.assertIs(solution, result.solution)
+        self.assertTrue(solution.evaluated)
+        self.assertEqual(job.solution.objectives[:], solution.objectives[:])
+        
+    def test_unregister(self):
+        register_problem(self.problem)
+        unregister_problem(self.problem)
+        self.assertIsNone(registered_key(self.problem))
+        
+    @unittest.skipIf(ThreadPoolExecutor is None, "requires concurrent.futures")
+    def test_process_pool(self):
+        solutions = [Solution(self.problem) for _ in range(4)]
+        
+        for i, solution in enumerate(solutions):
+            solution.variables[:] = [i / 4.0]*self.problem.nvars
+        
+        with ProcessPoolEvaluator(2, problems=[self.problem]) as evaluator:
+            results = evaluator.evaluate_all([_EvaluateJob(s) for s in solutions])
+            
+        self.assertEqual(solutions, [job.solution for job in results])
+        self.assertTrue(all([s.evaluated for s in solutions]))
+        self.assertIsNone(registered_key(self.problem))
@@ -0,0 +1,68 @@
+# Copyright 2015-2018 David Hadka
+#
+# This file is part of Platypus, a Python module for designing and using
+# evolutionary algorithms (EAs) and multiobjective evolutionary algorithms
+# (MOEAs).
+#
+# Platypus is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Platypus is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Platypus.  If not, see <http://www.gnu.org/licenses/>.
+import shutil
+import os.path
+import tempfile
+import unittest
+from ..algorithms import NSGAII
+from ..core import PlatypusError
+from ..experimenter import experiment, calculate, load_results, ResultFile
+from ..indicators import Hypervolume
+from ..problems import DTLZ2
+
+class TestStreamingExperiment(unittest.TestCase):
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        
+    def test_output(self):
+        results = experiment([NSGAII, (NSGAII, {}, "NSGA/II")], DTLZ2, seeds=2, nfe=200, output=self.directory)
+        
+        self.assertEqual(["NSGAII", "NSGA/II"], list(results.keys()))
+        self.assertEqual(2, len(results["NSGA/II"]["DTLZ2"]))
+        self.assertTrue(all([isinstance(f, ResultFile) for f in results["NSGAII"]["DTLZ2"]]))
+        self.assertEqual(4, len(os.listdir(self.directory)))
+        
+        result_set = results["NSGAII"]["DTLZ2"][0].load()
+        self.assertEqual(100, len(result_set))
+        self.assertEqual(2, len(result_set[0].objectives))
+        
+    def test_calculate(self):
+        experiment(NSGAII, DTLZ2, seeds=2, nfe=200, output=self.directory)
+        results = load_results(self.directory)
+        
+        self.assertEqual(["NSGAII"], list(results.keys()))
+        self.assertEqual([0, 1], [f.header()["seed"] for f in results["NSGAII"]["DTLZ2"]])
+        
+        indicator = Hypervolume(minimum=[0, 0], maximum=[1, 1])
+        expected = [indicator(f.load()) for f in results["NSGAII"]["DTLZ2"]]
+        calculated = calculate(results, indicator)
+        
+        self.assertEqual(expected, calculated["NSGAII"]["DTLZ2"]["Hypervolume"])
+        
+    def test_existing_results(self):
+        experiment(NSGAII, DTLZ2, seeds=1, nfe=200, output=self.directory)
+        
+        with self.assertRaises(PlatypusError):
+            experiment(NSGAII, DTLZ2, seeds=2, nfe=200, output=self.directory)
+            
+        self.assertEqual(1, len(os.listdir(self.directory)))
@@ -17,11 +17,19 @@
 # You should have received a copy of the GNU General Public License
 # along with Platypus.  If not, see <http://www.gnu.org/licenses/>.
 import math
+import random
 import unittest
 from .test_core import createSolution
+from .. import indicators
 from ..indicators import GenerationalDistance, InvertedGenerationalDistance, \
-    EpsilonIndicator, Spacing, Hypervolume
-from ..core import Solution, Problem, POSITIVE_INFINITY
+    InvertedGenerationalDistancePlus, distance_to_nearest, \
+    EpsilonIndicator, Spacing, Hypervolume, ApproximateHypervolume, hypervolume
+from ..core import Solution, Problem, POSITIVE_INFINITY, normalize, PlatypusError
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 class TestGenerationalDistance(unittest.TestCase):
     
@@ -62,6 +70,45 @@ class TestInvertedGenerationalDistance(unittest.TestCase):
         set = [createSolution(2.0, 2.0)]
         self.assertEqual(2.0*math.sqrt(5.0)/2.0, igd(set))
 
+class TestInvertedGenerationalDistancePlus(unittest.TestCase):
+    
+    def test(self):
+        reference_set = [createSolution(0, 1), createSolution(1, 0)]
+        igd = InvertedGenerationalDistancePlus(reference_set)
+        
+        set = []
+        self.assertEqual(POSITIVE_INFINITY, igd(set))
+        
+        set = [createSolution(0.0, 1.0)]
+        self.assertEqual(0.5, igd(set))
+        
+        set = [createSolution(0.0, 0.0)]
+        self.assertEqual(0.0, igd(set))
+        
+        set = [createSolution(0.5, 0.5)]
+        self.assertEqual(0.5, igd(set))
+        
+        set = [createSolution(2.0, 2.0)]
+        self.assertEqual(math.sqrt(5.0), igd(set))
+        
+class TestNearestNeighborIndex(unittest.TestCase):
+    
+    def test(self):
+        random.seed(3)
+        reference_set = [createSolution(random.random(), random.random(), random.random()) for _ in range(100)]
+        set = [createSolution(random.random(), random.random(), random.random()) for _ in range(30)]
+        
+        gd = GenerationalDistance(reference_set, d=1.0)
+        igd = InvertedGenerationalDistance(reference_set)
+        
+        value = gd(set)
+        expected = sum([distance_to_nearest(s, gd.reference_set) for s in set]) / len(set)
+        self.assertAlmostEqual(expected, value, delta=1e-12)
+        
+        value = igd(set)
+        expected = sum([distance_to_nearest(s, set) for s in igd.reference_set]) / len(reference_set)
+        self.assertAlmostEqual(expected, value, delta=1e-12)
+
 class TestEpsilonIndicator(unittest.TestCase):
     
     def test(self):
@@ -80,6 +127,33 @@ class TestEpsilonIndicator(unittest.TestCase):
         set = [createSolution(2.0, 2.0)]
         self.assertEqual(2.0, ei(set))
 
+    def test_infeasible(self):
+        reference_set = [createSolution(0, 1), createSolution(1, 0)]
+        ei = EpsilonIndicator(reference_set)
+        
+        infeasible = createSolution(-1.0, -1.0)
+        infeasible.constraint_violation = 1.0
+        
+        self.assertEqual(2.0, ei([createSolution(2.0, 2.0), infeasible]))
+        
+    def test_blocks(self):
+        random.seed(7)
+        reference_set = [createSolution(random.random(), random.random(), random.random()) for _ in range(200)]
+        set = [createSolution(random.random(), random.random(), random.random()) for _ in range(50)]
+        ei = EpsilonIndicator(reference_set)
+        
+        value = ei(set)
+        expected = max([min([max([s2.normalized_objectives[k] - s1.normalized_objectives[k] for k in range(3)]) for s2 in set]) for s1 in ei.reference_set])
+        self.assertEqual(expected, value)
+        
+        block_size = indicators._BLOCK_SIZE
+        
+        try:
+            indicators._BLOCK_SIZE = 64
+            self.assertEqual(expected, ei(set))
+        finally:
+            indicators._BLOCK_SIZE = block_size
+
 class TestSpacing(unittest.TestCase):
     
     def test(self):
@@ -133,4 +207,110 @@ class TestHypervolume(unittest.TestCase):
         s2.objectives[:] = [1.0, 0.5]
         
         self.assertEqual(0.75, hyp([s1, s2]))
-        
\ No newline at end of file
+        
+        
+    def hso(self, hyp, set):
+        feasible = [s for s in set if s.constraint_violation==0.0]
+        normalize(feasible, hyp.minimum, hyp.maximum)
+        feasible = [s for s in feasible if all([o <= 1.0 for o in s.normalized_objectives])]
+        
+        if len(feasible) == 0:
+            return 0.0
+        
+        for s in feasible:
+            hyp.invert(s)
+            
+        return hyp.calc_internal(feasible, len(feasible), set[0].problem.nobjs)
+        
+    def test_engines(self):
+        random.seed(11)
+        
+        for nobjs in range(2, 7):
+            problem = Problem(0, nobjs)
+            problem.directions[0] = Problem.MAXIMIZE
+            hyp = Hypervolume(minimum=[0.0]*nobjs, maximum=[1.0]*nobjs)
+            
+            for _ in range(5):
+                set = []
+                
+                for _ in range(30):
+                    solution = Solution(problem)
+                    solution.objectives[:] = [random.choice([random.random(), 0.5]) for _ in range(nobjs)]
+                    set.append(solution)
+                    
+                self.assertAlmostEqual(self.hso(hyp, set), hyp(set), delta=1e-12)
+                
+    @unittest.skipIf(np is None, "requires NumPy")
+    def test_hypervolume(self):
+        self.assertEqual(0.0, hypervolume([], [1.0, 1.0]))
+        self.assertEqual(0.75, hypervolume([[0.5, 0.0], [0.0, 0.5], [0.5, 0.5]], [1.0, 1.0]))
+        self.assertEqual(0.875, hypervolume([[0.5, 0.0, 0.0], [0.0, 0.5, 0.0], [0.0, 0.0, 0.5]], [1.0, 1.0, 1.0]))
+        self.assertEqual(0.9375, hypervolume([[0.5, 0.0, 0.0, 0.0], [0.0, 0.5, 0.0, 0.0],
+                                              [0.0, 0.0, 0.5, 0.0], [0.0, 0.0, 0.0, 0.5]], [1.0]*4))
+        self.assertEqual(0.0, hypervolume([[1.0, 0.0]], [1.0, 1.0]))
+        
+    @unittest.skipIf(np is not None, "NumPy is installed")
+    def test_hypervolume_requires_numpy(self):
+        with self.assertRaises(PlatypusError):
+            hypervolume([[0.5, 0.5]], [1.0, 1.0])
+        
+    def test_custom_engine(self):
+        reference_set = [createSolution(0.0, 1.0), createSolution(1.0, 0.0)]
+        hyp = Hypervolume(reference_set, engine=lambda points, reference_point: len(points))
+        
+        self.assertEqual(2, hyp([createSolution(0.5, 0.5), createSolution(0.25, 0.75)]))
+
+@unittest.skipIf(np is None, "requires NumPy")
+class TestApproximateHypervolume(unittest.TestCase):
+    
+    def setUp(self):
+        random.seed(5)
+        self.problem = Problem(0, 4)
+        self.set = []
+        
+        for _ in range(50):
+            solution = Solution(self.problem)
+            solution.objectives[:] = [random.random() for _ in range(4)]
+            self.set.append(solution)
+    
+    def test(self):
+        reference_set = [createSolution(0.0, 1.0), createSolution(1.0, 0.0)]
+        hyp = ApproximateHypervolume(reference_set, seed=1)
+        
+        self.assertEqual(0.0, hyp([]))
+        self.assertEqual(1.0, hyp([createSolution(0.0, 0.0)]))
+        self.assertEqual(0.0, hyp([createSolution(1.0, 1.0)]))
+        self.assertAlmostEqual(0.75, hyp([createSolution(0.5, 0.0), createSolution(0.0, 0.5)]), delta=0.01)
+    
+    def test_confidence_interval(self):
+        exact = Hypervolume(minimum=[0.0]*4, maximum=[1.0]*4)(self.set)
+        estimate = ApproximateHypervolume(minimum=[0.0]*4, maximum=[1.0]*4, seed=2)(self.set)
+        
+        self.assertEqual(100000, estimate.samples)
+        self.assertLess(estimate.lower, float(estimate))
+        self.assertGreater(estimate.upper, float(estimate))
+        self.assertTrue(estimate.lower <= exact <= estimate.upper)
+        
+    def test_seed(self):
+        hyp = ApproximateHypervolume(minimum=[0.0]*4, maximum=[1.0]*4, samples=5000, seed=3)
+        self.assertEqual(hyp(self.set), hyp(self.set))
+        self.assertEqual(hyp(self.set).interval, hyp(self.set).interval)
+        
+    def test_standard_error(self):
+        hyp = ApproximateHypervolume(minimum=[0.0]*4, maximum=[1.0]*4, samples=10**6,
+                                     standard_error=0.01, batch_size=500, seed=4)
+        estimate = hyp(self.set)
+        
+        self.assertLessEqual(estimate.standard_error, 0.01)
+        self.assertLess(estimate.samples, 10**6)
+        self.assertEqual(0, estimate.samples % 500)
+        
+    def test_standard_error_all_dominated(self):
+        hyp = ApproximateHypervolume(minimum=[0.0]*4, maximum=[1.0]*4, samples=10**5,
+                                     standard_error=0.001, batch_size=10, seed=5)
+        estimate = hyp([createSolution(0.0, 0.0, 0.0, 0.0)])
+        
+        self.assertEqual(1.0, estimate)
+        self.assertGreater(estimate.samples, 10)
+        self.assertGreater(estimate.standard_error, 0.0)
+        self.assertLess(estimate.lower, 1.0)
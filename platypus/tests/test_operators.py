@@ -16,11 +16,19 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with Platypus.  If not, see <http://www.gnu.org/licenses/>.
+import random
 import unittest
-from mock import patch
-from ..core import Problem, Solution
+from mock import patch, Mock
+from ..core import Problem, Solution, PlatypusError
 from ..types import Permutation
-from ..operators import Swap
+from ..operators import Swap, SBX, PM, GAOperator, SBXPM, BatchDifferentialEvolution, RandomGenerator
+from ..algorithms import NSGAII, NSGAIII, SPEA2, IBEA, GDE3
+from ..problems import DTLZ2
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 class TestSwap(unittest.TestCase):
     
@@ -75,4 +83,116 @@ class TestSwap(unittest.TestCase):
         with patch('random.randrange', side_effect=[0, 0]):
             result = Swap(1.0).mutate(solution)
         
-        self.assertEqual(result.variables[0][0], 0)      
\ No newline at end of file
+        self.assertEqual(result.variables[0][0], 0)      
+
+@unittest.skipIf(np is None, "requires NumPy")
+class TestSBXPM(unittest.TestCase):
+    
+    def setUp(self):
+        self.problem = DTLZ2(2, 11)
+        self.parents = [self.problem.random() for _ in range(20)]
+        
+    def test_offspring(self):
+        pairs = [self.parents[i:i+2] for i in range(0, len(self.parents), 2)]
+        offspring = SBXPM(seed=1).evolve_batch(pairs)
+        
+        self.assertEqual(20, len(offspring))
+        
+        for child in offspring:
+            self.assertFalse(child.evaluated)
+            
+            for t, x in zip(self.problem.types, child.variables):
+                self.assertTrue(t.min_value <= x <= t.max_value)
+                
+    def test_seed(self):
+        pairs = [self.parents[i:i+2] for i in range(0, len(self.parents), 2)]
+        offspring1 = SBXPM(seed=1).evolve_batch(pairs)
+        offspring2 = SBXPM(seed=1).evolve_batch(pairs)
+        
+        self.assertEqual([c.variables[:] for c in offspring1], [c.variables[:] for c in offspring2])
+        
+    def test_unchanged(self):
+        offspring = SBXPM(sbx_probability=0.0, pm_probability=0.0).evolve(self.parents[:2])
+        
+        self.assertEqual(self.parents[0].variables[:], offspring[0].variables[:])
+        self.assertEqual(self.parents[1].variables[:], offspring[1].variables[:])
+        self.assertTrue(offspring[0].evaluated)
+        
+    def test_distribution(self):
+        parents = [Solution(self.problem), Solution(self.problem)]
+        parents[0].variables[:] = [0.2]*self.problem.nvars
+        parents[1].variables[:] = [0.7]*self.problem.nvars
+        
+        random.seed(1)
+        operator = GAOperator(SBX(), PM())
+        expected = np.array([c.variables[:] for _ in range(2000) for c in operator.evolve(parents)])
+        actual = np.array([c.variables[:] for c in SBXPM(seed=1).evolve_batch([parents]*2000)])
+        self.assertEqual(expected.shape, actual.shape)
+        
+        # compare the spread of the children around the nearest parent, which
+        # depends on both distribution indices and probabilities
+        expected = np.minimum(abs(expected - 0.2), abs(expected - 0.7))
+        actual = np.minimum(abs(actual - 0.2), abs(actual - 0.7))
+        
+        self.assertAlmostEqual(expected.mean(), actual.mean(), delta=0.05*expected.mean())
+        self.assertAlmostEqual(expected.var(), actual.var(), delta=0.15*expected.var())
+        
+    def test_algorithms(self):
+        for algorithm in [NSGAII(self.problem, variator=SBXPM()),
+                          SPEA2(self.problem, variator=SBXPM()),
+                          IBEA(self.problem, variator=SBXPM()),
+                          NSGAIII(self.problem, 12, variator=SBXPM())]:
+            algorithm.run(500)
+            self.assertTrue(algorithm.nfe >= 500)
+            
+    def test_bounds(self):
+        operator = SBXPM(seed=1)
+        operator.evolve(self.parents[:2])
+        bounds = operator._cached_bounds
+        operator.evolve(self.parents[2:4])
+        
+        self.assertIs(bounds, operator._cached_bounds)
+        self.assertEqual([t.max_value for t in self.problem.types], bounds[2].tolist())
+            
+    def test_old_numpy(self):
+        # NumPy versions before 1.17 lack np.random.default_rng
+        with patch("platypus.operators.np", Mock(random=Mock(spec=[]))):
+            with self.assertRaises(PlatypusError):
+                SBXPM()
+
+@unittest.skipIf(np is None, "requires NumPy")
+class TestBatchDifferentialEvolution(unittest.TestCase):
+    
+    def setUp(self):
+        self.problem = DTLZ2(2, 11)
+        self.population = [RandomGenerator().generate(self.problem) for _ in range(20)]
+        
+    def test_select(self):
+        indices = BatchDifferentialEvolution(seed=1)._select(5)
+        
+        for i, row in enumerate(indices.tolist()):
+            self.assertEqual(3, len(set(row)))
+            self.assertNotIn(i, row)
+            
+    def test_evolve_population(self):
+        offspring = BatchDifferentialEvolution(crossover_rate=0.0, seed=1).evolve_population(self.population)
+        
+        self.assertEqual(20, len(offspring))
+        
+        for parent, child in zip(self.population, offspring):
+            self.assertFalse(child.evaluated)
+            self.assertEqual(self.problem.nvars - 1, sum([x == y for x, y in zip(parent.variables, child.variables)]))
+            
+            for t, x in zip(self.problem.types, child.variables):
+                self.assertTrue(t.min_value <= x <= t.max_value)
+                
+    def test_GDE3(self):
+        algorithm = GDE3(self.problem, variator=BatchDifferentialEvolution())
+        algorithm.run(500)
+        self.assertTrue(algorithm.nfe >= 500)
+        
+    def test_old_numpy(self):
+        # NumPy versions before 1.17 lack np.random.default_rng
+        with patch("platypus.operators.np", Mock(random=Mock(spec=[]))):
+            with self.assertRaises(PlatypusError):
+                BatchDifferentialEvolution()